@@ -1,18 +1,119 @@
 import cv2
 import threading
 import time
+from functools import lru_cache
+import numpy as np
+from core.config import AppConfig
+
+class PanelGeometry:
+    """
+    [New] 源画面 -> 左侧面板的几何映射：缩放到面板高度、居中裁剪 (或左右补黑边)、水平镜像
+    - scaled_w : 缩放后画面宽度 (与 crop_mirror_panel 的 int() 截断一致)
+    - crop_x / pad_x : 缩放画面上的裁剪起点 / 面板上的补边宽度 (二者至多一个非 0)
+    - roi : 可 "先裁后缩" 的源画面列区间 (x0, x1)，None 表示只能整帧缩放 (见 crop_mirror_panel)
+    坐标映射按连续像素坐标计算 (关键点 = 归一化坐标 * 尺寸)，to_source / to_panel 互为逆映射。
+    """
+    def __init__(self, src_w, src_h, out_w=AppConfig.HALF_W, out_h=AppConfig.H):
+        self.src_w, self.src_h = src_w, src_h
+        self.out_w, self.out_h = out_w, out_h
+        self.scaled_w = int(src_w * (out_h / src_h)) if src_h != out_h else src_w
+        self.sx, self.sy = self.scaled_w / src_w, out_h / src_h # 实际缩放比 (宽度经取整，与高度略有差别)
+        if self.scaled_w >= out_w: self.crop_x, self.pad_x = (self.scaled_w - out_w) // 2, 0
+        else: self.crop_x, self.pad_x = 0, (out_w - self.scaled_w) // 2
+
+        # 缩小时若裁剪窗口在源画面上恰为整数像素区间 (缩放比不变)，先裁后缩与先缩后裁逐位相同；
+        # 放大时插值需要窗口外的邻点，不走此路径
+        self.roi = None
+        if src_h > out_h and self.scaled_w >= out_w:
+            x0, r0 = divmod(self.crop_x * src_w, self.scaled_w)
+            rw, r1 = divmod(out_w * src_w, self.scaled_w)
+            if r0 == 0 and r1 == 0: self.roi = (x0, x0 + rw)
+
+    def to_source(self, xy):
+        """面板像素坐标 (..., 2) -> 源画面像素坐标"""
+        xy = np.asarray(xy, dtype=np.float64)
+        out = np.empty_like(xy)
+        out[..., 0] = (self.out_w - xy[..., 0] - self.pad_x + self.crop_x) / self.sx
+        out[..., 1] = xy[..., 1] / self.sy
+        return out
+
+    def to_panel(self, xy):
+        """源画面像素坐标 (..., 2) -> 面板像素坐标"""
+        xy = np.asarray(xy, dtype=np.float64)
+        out = np.empty_like(xy)
+        out[..., 0] = self.out_w - (xy[..., 0] * self.sx - self.crop_x + self.pad_x)
+        out[..., 1] = xy[..., 1] * self.sy
+        return out
+
+    def __repr__(self):
+        return f"PanelGeometry({self.src_w}x{self.src_h} -> {self.out_w}x{self.out_h}, scaled_w={self.scaled_w}, crop_x={self.crop_x}, pad_x={self.pad_x}, roi={self.roi})"
+
+@lru_cache(maxsize=16)
+def panel_geometry(src_w, src_h, out_w=AppConfig.HALF_W, out_h=AppConfig.H):
+    """[New] 按尺寸缓存的 PanelGeometry (逐帧调用无需重复计算)"""
+    return PanelGeometry(src_w, src_h, out_w, out_h)
+
+def crop_mirror_panel(frame, out_w=AppConfig.HALF_W, out_h=AppConfig.H, out=None):
+    """
+    将原始画面缩放至目标高度、居中裁剪为左侧面板宽度并做镜像翻转。
+    与主窗口左侧分屏的预处理保持一致，离线分析复用同一逻辑保证结果可比。
+    [Mod] out 为预分配的 (out_h, out_w, 3) 缓冲区时，裁剪与镜像一步写入 out (不产生中间拷贝)，
+          frame 可以是只读视图 (CameraLoader.read_new)
+    [Mod] 1080p / 4K 等缩小场景先裁出面板对应的源画面列区间再缩放 (结果逐位相同，见 PanelGeometry.roi)，
+          不再整帧缩放后丢弃大部分像素
+    """
+    h, w = frame.shape[:2]
+    if out is None: out = np.empty((out_h, out_w, 3), dtype=np.uint8)
+    g = panel_geometry(w, h, out_w, out_h)
+    if g.roi is not None:
+        cv2.resize(frame[:, g.roi[0] : g.roi[1]], (out_w, out_h), dst=out)
+        return cv2.flip(out, 1, dst=out) # 原地镜像
+
+    if h != out_h:
+        w, h = g.scaled_w, out_h
+        frame = cv2.resize(frame, (w, h))
+
+    if w >= out_w:
+        sx = g.crop_x
+        cv2.flip(frame[:, sx : sx + out_w], 1, dst=out) # 镜像
+    else:
+        # 居中补黑边：镜像后画面落在 [out_w - sx - w, out_w - sx)
+        sx = g.pad_x
+        out[:] = 0
+        cv2.flip(frame, 1, dst=out[:, out_w - sx - w : out_w - sx])
+    return out
 
 class CameraLoader:
-    def __init__(self, src=0, w=1280, h=720):
+    """
+    后台线程持续采集的摄像头 / 视频读取器
+    [Mod] 帧环形缓冲：预分配 ring_size 个帧槽，采集线程用 cap.read(slot) 直接解码进槽位，
+          read_new / read_view 交出最新完成槽位的只读视图 (不拷贝)。
+          槽位在之后第 ring_size 次采集时才会被改写，消费方需在此之前用完 (或自行拷贝)，
+          可用 is_fresh(seq) 检查；read() / read_indexed() 仍返回独立拷贝，供需要长期持有帧的调用方使用。
+    [New] panel_size=(out_w, out_h) 时直接输出面板：采集线程把原始帧解码进复用缓冲，
+          一次性缩放 / 裁剪 / 镜像写入槽位 (crop_mirror_panel)，槽位只有面板大小；
+          几何映射见 self.geometry (PanelGeometry)，可将面板上的关键点坐标映射回源画面。
+          摄像头按面板高度协商采集分辨率 (保持 w:h 宽高比)，实际分辨率以首帧为准。
+    """
+    def __init__(self, src=0, w=1280, h=720, ring_size=4, panel_size=None):
         self.cap = cv2.VideoCapture(src)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
         self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.panel_size = tuple(panel_size) if panel_size else None
+        if self.panel_size:
+            # 请求与面板同高的采集分辨率，省去逐帧缩放
+            w, h = int(round(w * self.panel_size[1] / h)), self.panel_size[1]
         self.w, self.h = w, h
+        self.geometry = None # [New] 当前源的 PanelGeometry (仅 panel_size 模式，首帧到达后可用)
+        self._raw = None # [New] 原始帧解码缓冲 (仅 panel_size 模式)
         self.ret, self.frame = False, None
         self.running = True
         self.lock = threading.Lock()
         self.is_video, self.video_len, self.current_pos = False, 0, 0
+        self.frame_idx = -1 # [New] 当前帧在视频中的序号 (摄像头为 -1)，用于查找关键点缓存
+        self.seq = 0 # [New] 采集计数 (每读到一帧 +1，跨切换源单调递增)，流水线据此判断是否有新帧
+        self.ring = [None] * max(2, int(ring_size)) # [New] 帧槽 (首帧到达时按实际分辨率分配)
         self.seek_req = -1 
         self.src = src
         self.paused = False
@@ -26,7 +127,9 @@ class CameraLoader:
             self.current_pos = 0; self.seek_req = -1; 
             self.ret = False 
             self.frame = None
+            self.frame_idx = -1
             self.paused = False
+            self.geometry = None
             
             if isinstance(src, int): self.cap = cv2.VideoCapture(src, cv2.CAP_DSHOW) 
             else: self.cap = cv2.VideoCapture(src)
@@ -59,19 +162,90 @@ class CameraLoader:
                 self.seek_req = -1; force = True
             if self.is_video and self.paused and not force:
                 time.sleep(0.03); continue
-            if self.cap.isOpened(): ret, frame = self.cap.read()
+            # 解码进下一个槽位 (不持锁：读取方只会拿到已完成的槽位)
+            slot_i = (self.seq + 1) % len(self.ring)
+            dst = self._raw if self.panel_size else self.ring[slot_i]
+            if self.cap.isOpened(): ret, frame = self.cap.read(dst)
             else: ret, frame = False, None
             if not ret:
                 if self.is_video and self.video_len > 0: self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0); continue
                 else: time.sleep(0.1); continue
+            # 首帧 / 分辨率变化时 OpenCV 会新分配数组，留作下次的解码缓冲
+            geom = None
+            if self.panel_size:
+                self._raw = frame
+                out_w, out_h = self.panel_size
+                geom = panel_geometry(frame.shape[1], frame.shape[0], out_w, out_h)
+                if self.ring[slot_i] is None: self.ring[slot_i] = np.empty((out_h, out_w, 3), dtype=np.uint8)
+                frame = crop_mirror_panel(frame, out_w, out_h, out=self.ring[slot_i])
+            elif frame is not self.ring[slot_i]: self.ring[slot_i] = frame
             if self.is_video: self.current_pos = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-            with self.lock: self.ret, self.frame = ret, frame
+            view = frame.view()
+            view.flags.writeable = False
+            with self.lock:
+                self.ret, self.frame, self.geometry = ret, view, geom
+                self.frame_idx = int(self.current_pos) - 1 if self.is_video else -1
+                self.seq += 1
             time.sleep(0.005 if not self.is_video else 0.03)
 
     def read(self):
         with self.lock:
             return self.ret, self.frame.copy() if self.frame is not None else None
 
+    def read_indexed(self):
+        """[New] 同 read()，额外返回帧序号 (与帧在同一把锁内读取，保证一致)"""
+        with self.lock:
+            return self.ret, self.frame.copy() if self.frame is not None else None, self.frame_idx
+
+    def read_view(self):
+        """[New] 同 read_indexed()，但返回最新槽位的只读视图 (不拷贝)，另附 seq 供 is_fresh() 校验"""
+        with self.lock:
+            return self.ret, self.frame, self.frame_idx, self.seq
+
+    def read_new(self, after_seq):
+        """
+        [New] 仅当有比 after_seq 更新的帧时返回 (seq, frame, frame_idx)，否则返回 (after_seq, None, -1)
+        [Mod] frame 为环形缓冲槽位的只读视图 (不拷贝)，有效期见类说明
+        """
+        with self.lock:
+            if self.frame is None or self.seq == after_seq: return after_seq, None, -1
+            return self.seq, self.frame, self.frame_idx
+
+    def is_fresh(self, seq):
+        """[New] seq 对应的槽位是否尚未被采集线程改写"""
+        return self.seq - seq < len(self.ring) - 1
+
     def release(self):
         self.running = False
-        self.cap.release()
\ No newline at end of file
+        self.cap.release()
+
+class VideoFrameReader:
+    """
+    [New] 离线视频顺序读取器 (无线程、无节拍等待)
+    与 CameraLoader 不同：不丢帧、不循环播放、不 sleep，按解码速度尽可能快地输出每一帧。
+    迭代产出 (帧序号, 时间戳秒, BGR 帧)。
+    """
+    def __init__(self, src, start_frame=0, end_frame=None):
+        self.src = src
+        self.cap = cv2.VideoCapture(src)
+        if not self.cap.isOpened():
+            raise IOError(f"Cannot open video: {src}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.video_len = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.start_frame = max(0, int(start_frame))
+        # 部分容器无法读取总帧数 (video_len=0)，此时读到文件结束为止
+        if end_frame is None: self.end_frame = self.video_len if self.video_len > 0 else None
+        else: self.end_frame = min(int(end_frame), self.video_len) if self.video_len > 0 else int(end_frame)
+        if self.start_frame > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+    def __iter__(self):
+        idx = self.start_frame
+        while self.end_frame is None or idx < self.end_frame:
+            ret, frame = self.cap.read()
+            if not ret: break
+            yield idx, idx / self.fps, frame
+            idx += 1
+
+    def release(self):
+        self.cap.release()
@@ -0,0 +1,30 @@
+"""
+时钟抽象 (Clock)
+计次冷却 (COUNT_COOLDOWN)、门控超时 (GATEKEEPER_TIMEOUT)、提示语计时、熔断超时、轨迹时间窗等
+计时逻辑统一从注入的时钟取 "当前时间"，而不是直接调用 time.time()：
+- 实时：Engine 每帧用采集时间推进帧时钟
+- 回放：用视频时间戳 (帧序号 / fps) 推进，快于实时的离线回放计时结果与实时播放一致
+"""
+import time
+
+class SystemClock:
+    """墙上时钟 (time.time)。未注入时钟的独立用法 (工具脚本 / 旧调用方) 默认使用"""
+    def now(self):
+        return time.time()
+
+    def tick(self, t):
+        pass # 墙上时钟自行走时，忽略外部推进
+
+class FrameClock:
+    """
+    帧时钟：时间只在 tick() 时前进，同一帧内所有计时读到同一时刻
+    :param t: 初始时间 (秒)。回放传 0.0 (与视频时间戳同一时间轴)，实时默认取当前墙上时间
+    """
+    def __init__(self, t=None):
+        self.t = time.time() if t is None else float(t)
+
+    def now(self):
+        return self.t
+
+    def tick(self, t):
+        self.t = float(t)
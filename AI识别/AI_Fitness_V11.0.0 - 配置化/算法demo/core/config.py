@@ -1,6 +1,7 @@
 """
 系统配置模块 V24.0.0 (Ratio Optimization)
 """
+import os
 from dataclasses import dataclass
 
 ERR_NAMES_MAP = {
@@ -57,7 +58,6 @@ class AlgoConfig:
     # --- 动作具体参数 ---
     PRESS_VERT_TOLERANCE: int = 20 
     SHRUG_COMPRESSION_TH: float = 0.20
-    SHRUG_SMOOTH_FACTOR: float = 0.6
     PRESS_START_Y_OFFSET: int = 0
     PRESS_UP_TH: int = 120 
 
@@ -86,6 +86,41 @@ class AlgoConfig:
     RAISE_HEIGHT_RATIO: float = 0.5
     COUNT_COOLDOWN: float = 0.3
     GATEKEEPER_TIMEOUT: float = 2.0 
+    PREDICTED_FEEDBACK_RATIO: float = 0.5 # [New] 本轮动作中预测帧占比超过此值时不触发新的纠错提示
+
+    # --- [New] 关键点平滑 (utils/smoother.py) ---
+    SMOOTH_FILTER: str = 'one_euro'  # 'one_euro' / 'kalman' / 'ema' (旧版自适应 EMA，取整)
+    SMOOTH_MIN_CUTOFF: float = 1.5   # One-Euro 静止截止频率 (Hz)
+    SMOOTH_BETA: float = 0.05        # One-Euro 速度系数 (1/像素)
+    SMOOTH_D_CUTOFF: float = 1.0     # One-Euro 速度估计的低通截止频率 (Hz)
+    SMOOTH_KALMAN_Q: float = 20000.0 # Kalman 加速度噪声谱密度 (像素²/秒³)
+    SMOOTH_KALMAN_R: float = 4.0     # Kalman 观测噪声方差 (像素²)
+    SMOOTH_GAP: float = 0.5          # 关键点缺失超过此时长 (秒) 后重新起始滤波
+
+    # --- [New] 短时遮挡补点 (utils/gap_filler.py) ---
+    GAP_FILL_ENABLE: bool = True
+    GAP_FILL_MAX: float = 0.3        # 关键点消失后最长补点时长 (秒)，置信度在此时长内衰减到 0
+    GAP_FILL_HISTORY: int = 5        # 每个关键点保留的实测次数 (估计外推速度)
+
+    # --- [New] 节奏分析 (logic/tempo.py) ---
+    TEMPO_BUFFER: int = 512          # 节奏环形缓冲帧数 (单次动作超出部分的速度只取最近的帧，时长不受影响)
+    TEMPO_SPEED_LAG: int = 2         # 关节速度按相隔若干处理帧的位移差分估计 (抑制逐帧抖动)
+
+    # --- [New] 轨迹拟合 (logic/trajectory.py) ---
+    TRAJECTORY_BUFFER: int = 512     # 轨迹环形缓冲帧数
+    TRAJECTORY_SAMPLES: int = 32     # 每轮轨迹重采样点数 (单轮比对耗时固定，与动作快慢、帧率无关)
+    TRAJECTORY_BAND: float = 0.2     # DTW 对齐带宽 (占重采样点数的比例)
+    TRAJECTORY_TOLERANCE: float = 0.5 # 平均偏差达到该值 (模板尺度，躯干长度) 时拟合度为 0
+
+    # --- [New] 姿态相似 (logic/pose_similarity.py) ---
+    POSE_TOLERANCE: float = 0.25     # 加权均方根偏差 (单位 180°) 达到该值 (即 45°) 时相似度为 0
+    POSE_MIN_SIMILARITY: float = 0.85 # pose_similarity 条件默认达标阈值
+    POSE_MAX_TEMPLATES: int = 64     # 由参考片段建库时保留的模板数上限
+    POSE_TEMPLATE_MIN_DIST: float = 0.02 # 建库时与已选模板偏差低于此值的帧视为重复姿态
+
+    # --- [New] 容忍度档位 (exercises/config_compiler.py) ---
+    TOLERANCE_TIER: str = 'standard' # 加载配置时的默认档位：'strict' / 'standard' / 'loose' (严格 / 标准 / 宽松)
+    GUIDANCE_GOOD_SEC: float = 1.5   # 纠错解除后 "good" 引导词的显示时长 (秒)
 
 @dataclass(frozen=True)
 class TextConfig:
@@ -158,6 +193,32 @@ class AppConfig:
     VOL: float = 0.5
     MENU_ANIM_STEP: float = 0.15 
 
+    # --- [New] 帧级共享度量 (logic/metrics.py) ---
+    METRICS_PROFILE: bool = False     # 统计各度量的计算次数 / 缓存命中 / 耗时 (metric_stats())
+
+    # --- [New] 姿态估计后端 (core/pose_backend.py) ---
+    POSE_BACKEND: str = 'solutions'   # 'solutions' (mp.solutions.pose 同步) / 'live_stream' (MediaPipe Tasks 异步)
+    POSE_ASYNC_MAX_INFLIGHT: int = 4  # 异步后端最多在途 (已提交未返回) 的帧数，超出时丢弃最旧的帧
+    POSE_TASK_MODEL: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'models', 'pose_landmarker_full.task')
+    POSE_TEMPLATE_DIR: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'pose_templates') # 姿态模板库 (logic/pose_similarity.py)
+
+    # --- [New] 推理 ROI 裁剪 (core/pose_roi.py) ---
+    POSE_ROI_ENABLE: bool = True
+    POSE_ROI_MARGIN: float = 0.25     # 关键点包围盒四周外扩比例 (相对包围盒宽/高)
+    POSE_ROI_REDETECT: int = 30       # 连续 ROI 推理 N 帧后做一次整帧重检测
+    POSE_ROI_MIN_SIZE: int = 160      # ROI 最小边长 (像素)
+    POSE_ROI_MAX_FRAC: float = 0.6    # ROI 面积超过面板此比例时直接整帧推理
+    POSE_ROI_INPUT_H: int = 384       # ROI 缩放后的推理输入高度
+    POSE_ROI_VIS_TH: float = 0.5      # 参与包围盒计算 / 跟踪判定的可见度阈值
+
+    # --- [New] 推理调度 (core/inference_scheduler.py) ---
+    INFER_SCHED_ENABLE: bool = True
+    INFER_FRAME_BUDGET: float = 1 / 30 # 目标帧间隔 (秒)，单帧等待推理结果的上限
+    INFER_MAX_INTERVAL: int = 4        # 相邻两次推理最多间隔的帧数 (其间为预测帧)
+    INFER_FAST_MOTION: float = 0.5     # 关节速度 (归一化坐标/秒) 达到此值时按推理速度上限逐帧推理
+    INFER_MAX_PREDICT: float = 0.25    # 预测最多外推的时长 (秒)，超过则等待推理结果
+    INFER_PRED_BETA: float = 0.7       # 常速度模型 (α-β 滤波) 的速度修正增益
+
 # --- 动作调参树 (Tuning Tree) ---
 TUNING_TREE = {
     TextConfig.ACT_PRESS: [
@@ -0,0 +1,126 @@
+"""
+健身动作核心引擎 (Engine)
+从 main.py 中抽离，供交互窗口 (main.py) 与离线批处理 (offline/) 共同复用。
+本模块不依赖任何窗口/GUI 组件，可在无显示环境下运行。
+"""
+import time
+import numpy as np
+from core.config import AppConfig, TextConfig, AlgoConfig
+from core.sound import SoundManager
+from core.clock import FrameClock
+from utils.smoother import PointSmoother
+from utils.gap_filler import GapFiller
+from utils.pose_frame import PoseFrame, LANDMARK_NAMES
+from logic.spine import SpineAnalyzer
+from logic.gatekeeper import Gatekeeper
+from exercises import PressExercise, SquatExercise, LungeExercise, FrontRaiseExercise, LateralRaiseExercise
+
+# MediaPipe 关键点 ID -> 引擎内部点名 映射表 (定义见 utils/pose_frame.py)
+MP_LANDMARK_MAP = LANDMARK_NAMES
+
+def landmarks_to_array(landmarks):
+    """
+    [New] MediaPipe 关键点列表 -> (33, 4) float32 数组 [x, y, z, visibility]
+    用于关键点缓存；无检测结果时返回 None
+    """
+    if landmarks is None: return None
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
+
+def extract_keypoints_array(lm_arr, w=AppConfig.HALF_W, h=AppConfig.H, vis_th=0.5):
+    """
+    [Mod] (33, 4) 归一化关键点数组 -> PoseFrame (像素坐标 + 可见性掩码)
+    MediaPipe 内部即为 float32，实时推理与缓存回放得到的像素坐标逐位相同。
+    """
+    return PoseFrame.from_landmarks(lm_arr, w, h, vis_th)
+
+def extract_keypoints(landmarks, w=AppConfig.HALF_W, h=AppConfig.H, vis_th=0.5):
+    """
+    将 MediaPipe 归一化关键点转换为引擎使用的 PoseFrame
+    :param landmarks: res.pose_landmarks.landmark (可按 ID 下标访问)，None 表示无检测
+    """
+    return extract_keypoints_array(landmarks_to_array(landmarks), w, h, vis_th)
+
+class Engine:
+    """
+    健身动作核心引擎
+    [New] 所有计时 (计次冷却、门控超时、提示语、熔断等) 读取同一个帧时钟 self.clock，
+          由 update() 的 ts 逐帧推进：实时传采集时间，离线回放传视频时间戳
+    """
+    def __init__(self, sound_mgr=None, clock=None):
+        # [New] 支持外部注入音效管理器 (离线模式传入静音实现)
+        self.sound = sound_mgr if sound_mgr is not None else SoundManager()
+        self.clock = clock if clock is not None else FrameClock()
+        self.exercises = {
+            TextConfig.ACT_PRESS: PressExercise(self.sound, self.clock),
+            TextConfig.ACT_SQUAT: SquatExercise(self.sound, self.clock),
+            TextConfig.ACT_RAISE: FrontRaiseExercise(self.sound, self.clock),
+            TextConfig.ACT_LUNGE: LungeExercise(self.sound, self.clock),
+            TextConfig.ACT_LATERAL_RAISE: LateralRaiseExercise(self.sound, self.clock)
+        }
+        self.current_mode = TextConfig.ACT_PRESS
+        self.spine = SpineAnalyzer()
+        self.gatekeeper = Gatekeeper(self.clock)
+        self.smoother = PointSmoother()
+        self.gap_filler = GapFiller() # [New] 短时遮挡补点
+
+    def set_mode(self, mode_name):
+        if mode_name in self.exercises and mode_name != self.current_mode:
+            self.current_mode = mode_name
+            ex = self.exercises[self.current_mode]
+            ex.stage = "start"
+            ex.counter = 0
+            ex.bad_reps = 0
+            ex.feedback.error_counts.clear()
+            ex.history = {}
+            ex.feedback.active_feedback.clear()
+            self.gatekeeper.last_act_time = self.clock.now()
+
+    def update(self, pts, world_pts, h_val, ts=None):
+        """
+        :param pts: PoseFrame (见 extract_keypoints)
+        :param ts: [New] 本帧时间戳 (秒)，None 时取当前墙上时间
+        """
+        # 无检测帧也推进时钟 (提示语到期等计时不依赖是否检测到人体)
+        self.clock.tick(time.time() if ts is None else ts)
+        if not pts: return [], pts
+
+        # 1. 短时遮挡补点 + 平滑处理
+        if AlgoConfig.GAP_FILL_ENABLE: pts = self.gap_filler.fill(pts, self.clock.now())
+        pts = self.smoother.filter(pts, self.clock.now())
+
+        # 2. 脊柱物理分析
+        current_ex = self.exercises[self.current_mode]
+        self.spine.analyze(pts, stage=current_ex.stage)
+
+        # 3. 动作门控检查 (是否在做当前动作)
+        if not self.gatekeeper.check(pts, self.current_mode, current_ex):
+            return [], pts
+
+        # 4. 动作计数与纠错
+        shared = {
+            'max_torso_len': self.spine.get_max_len(),
+            'rounding_bad': pts.get('rounding_bad', False),
+            'base_shrug_dist': 0
+        }
+        vis = current_ex.process(pts, shared)
+
+        # 5. 追加通用可视化 (如脊柱红线)
+        if pts.get('rounding_bad') and 'rounding' in current_ex.active_feedback:
+            vis.append({
+                'type': 'rounding_guide',
+                'neck': pts['neck'], 'thorax': pts['thorax'],
+                'waist': pts['waist'], 'hip': pts['hip']
+            })
+        return vis, pts
+
+    def get_ui_data(self):
+        ex = self.exercises[self.current_mode]
+        msg, col = ex.get_msg()
+        return {
+            'mode': self.current_mode,
+            'count': ex.counter,
+            'msg': msg,
+            'msg_col': col,
+            'errs': ex.feedback.error_counts,
+            'bad': ex.bad_reps
+        }
@@ -0,0 +1,169 @@
+"""
+自适应推理调度 (Inference Scheduler)
+低端设备上姿态推理耗时超过帧间隔时，逐帧同步推理会把整条流水线拖慢到推理速度。
+这里把模型放到独立的推理工作线程，推理线程每帧只做调度：
+- 模型空闲且距上次推理已满 interval 帧时提交本帧，并最多等待一个帧间隔 (INFER_FRAME_BUDGET)：
+  按时返回则输出实测关键点；超时则本帧先输出预测关键点，结果到达的那一帧按实测帧输出
+  (推理慢于帧间隔时输出整体滞后约一个推理耗时，与原先逐帧同步推理的延迟相同，但帧率不再受推理拖累)
+- 其余帧输出常速度模型 (LandmarkPredictor) 外推的关键点，标记为预测帧 (predicted=True)
+- interval 由实测推理耗时与当前关节速度决定：动作快或推理慢时尽量多推理，静止时降低推理频率
+
+预测帧在下游的处理：GenericExercise 的 latch 纠错不因预测帧锁定 (只依据实测帧)，
+预测帧占比过高的一轮动作不触发新的纠错提示 (见 BaseExercise._end_cycle)。
+"""
+import math
+import queue
+import threading
+import time
+import numpy as np
+from core.config import AppConfig
+from utils.pose_frame import EXPOSED
+
+class LandmarkPredictor:
+    """
+    逐关键点常速度模型 (α-β 滤波，即稳态增益的 Kalman 滤波)，坐标为面板归一化坐标
+    实测帧位置直接取测量值 (α=1，不改变推理结果，平滑由下游 PointSmoother 负责)，速度按残差以 beta 增益修正
+    """
+    def __init__(self, beta=AppConfig.INFER_PRED_BETA):
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        self.lm = None    # 最近一次实测 (33, 4)
+        self.vel = None   # (33, 2) 速度 (归一化坐标/秒)
+        self.t = 0.0      # 最近一次实测的时间戳
+
+    def update(self, lm, t):
+        """输入一次实测 (lm 为 None 表示未检测到人体，清空模型)"""
+        if lm is None:
+            self.reset(); return
+        if self.lm is None or t <= self.t:
+            self.vel = np.zeros((len(lm), 2))
+        else:
+            dt = t - self.t
+            resid = lm[:, :2] - (self.lm[:, :2] + self.vel * dt)
+            self.vel += self.beta * resid / dt
+        self.lm, self.t = lm, t
+
+    def predict(self, t):
+        """外推到时刻 t，模型为空或外推时长超过 INFER_MAX_PREDICT 时返回 None"""
+        if self.lm is None: return None
+        dt = t - self.t
+        if dt > AppConfig.INFER_MAX_PREDICT: return None
+        out = self.lm.copy()
+        out[:, :2] += self.vel * max(dt, 0.0)
+        return out
+
+    def speed(self):
+        """引擎所用关键点中的最大速度 (归一化坐标/秒)"""
+        if self.vel is None: return 0.0
+        v = self.vel[EXPOSED]
+        return float(np.hypot(v[:, 0], v[:, 1]).max())
+
+class InferenceScheduler:
+    """
+    :param estimator: 推理实现 (需提供 process(rgb, ts) -> (33, 4) 数组或 None，如 RoiPoseEstimator)，只在工作线程中调用
+    :param enable: False 时逐帧同步推理 (等同直接调用 estimator.process)
+    """
+    def __init__(self, estimator, enable=AppConfig.INFER_SCHED_ENABLE):
+        self.estimator = estimator
+        self.enable = enable
+        self.predictor = LandmarkPredictor()
+        self.latency = 0.0   # 推理耗时 EMA (秒)
+        self.interval = 1    # 当前推理间隔 (帧)
+        self.since = 0       # 距上次提交推理的帧数
+        self.stats = {'inferred': 0, 'predicted': 0}
+
+        self._buf = None     # 工作线程的输入图像缓冲 (仅在工作线程空闲时写入)
+        self._busy = False
+        self._last_lm, self._last_t = None, None # 最近一次取回的推理结果及其时间戳
+        self._req = queue.Queue(1)
+        self._res = queue.Queue(1)
+        self._worker = threading.Thread(target=self._work, name='pose-model', daemon=True)
+        self._worker.start()
+
+    def reset(self):
+        """切换视频源时调用：丢弃在途结果并清空预测模型"""
+        if self._busy:
+            self._res.get(); self._busy = False
+        self.predictor.reset()
+        self.since = 0
+
+    def stop(self):
+        self._req.put(None)
+        self._worker.join(timeout=1.0) # 等在途推理结束，调用方随后可释放后端
+
+    def process(self, rgb, t):
+        """
+        :param rgb: 面板 RGB 图像 (调用方可在返回后复用该缓冲)
+        :param t: 本帧采集时间戳 (秒)
+        :return: (lm, predicted)，lm 为 (33, 4) 数组或 None
+        """
+        if not self.enable:
+            return self.estimator.process(rgb, t), False
+
+        budget = AppConfig.INFER_FRAME_BUDGET
+        fresh = self._collect(block=False)
+        self.since += 1
+        if not self._busy and self.since >= self.interval:
+            self._submit(rgb, t)
+            # 等待本帧结果 (最多一个帧间隔)；预测模型为空时只能等到结果为止
+            if not self._collect(timeout=budget) and self.predictor.lm is None:
+                self._collect()
+            if self._last_t == t: return self._measured()
+        # 推理慢于帧间隔时结果会迟到约一个推理耗时：到达即按实测帧输出
+        if fresh and self._last_lm is not None: return self._measured()
+
+        # 预测帧与迟到的实测帧对齐到同一条时间线 (滞后一个推理耗时)，画面不会前后跳动
+        target = t - self.latency if self.latency > budget else t
+        lm = self.predictor.predict(target)
+        if lm is None:
+            # 模型为空 / 外推过久：先取回在途结果，仍无法预测时对本帧同步推理
+            if self._busy:
+                self._collect()
+                lm = self.predictor.predict(target)
+            if lm is None:
+                self._submit(rgb, t); self._collect()
+                return self._measured()
+        self.stats['predicted'] += 1
+        return lm, True
+
+    def _measured(self):
+        self.stats['inferred'] += 1
+        return self._last_lm, False
+
+    def _submit(self, rgb, t):
+        if self._buf is None or self._buf.shape != rgb.shape: self._buf = np.empty_like(rgb)
+        np.copyto(self._buf, rgb)
+        self._busy = True
+        self.since = 0
+        self._req.put((self._buf, t))
+
+    def _collect(self, block=True, timeout=None):
+        """取回在途推理结果并更新预测模型与推理间隔，返回是否取到"""
+        if not self._busy: return False
+        try: lm, t, cost = self._res.get(block=block, timeout=timeout)
+        except queue.Empty: return False
+        self._busy = False
+        self._last_lm, self._last_t = lm, t
+        self.predictor.update(lm, t)
+        self.latency = cost if self.latency == 0.0 else 0.8 * self.latency + 0.2 * cost
+        self._adapt()
+        return True
+
+    def _adapt(self):
+        """推理越慢间隔越大 (模型本就跟不上)；动作越快间隔越小，静止时放宽到 INFER_MAX_INTERVAL"""
+        n_max = AppConfig.INFER_MAX_INTERVAL
+        n_lat = max(1, math.ceil(self.latency / AppConfig.INFER_FRAME_BUDGET))
+        motion = min(self.predictor.speed() / AppConfig.INFER_FAST_MOTION, 1.0)
+        n_motion = 1 + int(round((1.0 - motion) * (n_max - 1)))
+        self.interval = min(n_max, max(n_lat, n_motion))
+
+    def _work(self):
+        while True:
+            job = self._req.get()
+            if job is None: return
+            img, t = job
+            t0 = time.perf_counter()
+            lm = self.estimator.process(img, t)
+            self._res.put((lm, t, time.perf_counter() - t0))
@@ -0,0 +1,242 @@
+"""
+实时流水线 (Capture -> Inference -> Logic -> Render)
+原主循环串行执行 采集/裁剪 -> 推理 -> 引擎更新 -> 绘制 -> 显示，单帧延迟是各阶段之和。
+这里把前三个阶段各放到一个线程，阶段之间用有界队列连接，主线程只负责绘制与显示：
+推理第 N+1 帧的同时绘制第 N 帧 (MediaPipe / OpenCV 计算期间会释放 GIL)。
+
+- 背压策略：队列满时丢弃最旧的帧 (DropQueue)，始终处理最新画面，延迟不会累积
+- 帧标记：每帧携带 FramePacket.fid 与其对应的面板图像，绘制时骨骼/特效叠加在推理所用的同一帧上
+- 引擎状态由逻辑线程独占更新；主线程切换动作等操作需持有 engine_lock
+- 零拷贝交接：采集阶段直接从 CameraLoader 环形缓冲的只读视图裁剪镜像进面板缓冲池 (PanelPool)，
+  被丢弃或被主线程替换下来的帧把面板归还缓冲池，稳态下不再逐帧分配图像内存
+- 异步后端 (LIVE_STREAM)：推理阶段整帧 submit() 后立即取下一帧，poll() 取回的结果按帧号回填到在途帧再交给逻辑阶段；
+  模型忙时 MediaPipe 丢弃的帧 (不再回调) 随之丢弃。同步后端仍经 ROI 裁剪 + 自适应跳帧调度推理
+"""
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from core.config import AppConfig
+from core.camera import crop_mirror_panel, panel_geometry
+from core.engine import extract_keypoints_array
+from core.pose_roi import RoiPoseEstimator
+from core.inference_scheduler import InferenceScheduler
+from core.pose_backend import CachedPoseBackend
+
+class DropQueue:
+    """
+    有界队列：满时丢弃最旧的一项
+    :param on_drop: 被丢弃项的回调 (用于归还其占用的缓冲区)
+    """
+    def __init__(self, maxsize=1, on_drop=None):
+        self.q = queue.Queue(maxsize)
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def _drop(self, item):
+        self.dropped += 1
+        if self.on_drop is not None: self.on_drop(item)
+
+    def put(self, item):
+        while True:
+            try:
+                self.q.put_nowait(item); return
+            except queue.Full:
+                try: self._drop(self.q.get_nowait())
+                except queue.Empty: pass
+
+    def get(self, timeout=None):
+        """取一项，超时返回 None"""
+        try: return self.q.get(timeout=timeout)
+        except queue.Empty: return None
+
+    def get_latest(self, timeout=None):
+        """取最新一项 (丢弃积压的旧项)，超时返回 None"""
+        item = self.get(timeout)
+        while item is not None:
+            try: newer = self.q.get_nowait()
+            except queue.Empty: break
+            self._drop(item); item = newer
+        return item
+
+class PanelPool:
+    """
+    [New] 面板图像缓冲池：取用 acquire()，用完 release() 归还
+    池空时新分配 (不阻塞)，因此漏还只会多占内存、不影响正确性；稳态下池大小等于在途帧数上限
+    """
+    def __init__(self, shape=(AppConfig.H, AppConfig.HALF_W, 3)):
+        self.shape = shape
+        self.free = []
+        self.allocated = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.free: return self.free.pop()
+            self.allocated += 1
+        return np.empty(self.shape, dtype=np.uint8)
+
+    def release(self, buf):
+        if buf is None or buf.shape != self.shape: return
+        with self.lock: self.free.append(buf)
+
+class FramePacket:
+    """在各阶段间传递的一帧数据"""
+    __slots__ = ('fid', 'src', 'src_idx', 'panel', 'geom', 'lm', 'predicted', 'pts', 'vis', 'data', 't_cap', 't_infer', 't_logic')
+    def __init__(self, fid, src, src_idx, panel):
+        self.fid = fid           # 流水线帧号 (单调递增)
+        self.src = src           # 视频源 (路径或摄像头 ID)
+        self.src_idx = src_idx   # 视频内帧序号 (摄像头为 -1)
+        self.panel = panel       # 左侧面板 BGR 图像 (已裁剪镜像)
+        self.geom = None         # [New] 源画面 -> 面板的几何映射 (PanelGeometry)，关键点可据此映射回源画面
+        self.lm = None
+        self.predicted = False   # [New] lm 为运动预测值而非本帧推理结果 (见 core/inference_scheduler.py)
+        self.pts = None
+        self.vis = None
+        self.data = None
+        self.t_cap = time.time()
+        self.t_infer = 0.0
+        self.t_logic = 0.0
+
+class FramePipeline:
+    """
+    :param loader: CameraLoader (自带采集线程，这里只取其最新帧)
+    :param backend: 姿态估计后端 (core/pose_backend.py，仅在推理线程中调用，经 RoiPoseEstimator 裁剪 ROI 后推理)
+    :param engine: Engine 实例 (仅在逻辑线程中更新)
+    :param depth: 阶段间队列长度
+    """
+    def __init__(self, loader, backend, engine, model_complexity=1, depth=1):
+        self.loader = loader
+        self.backend = backend
+        self.estimator = RoiPoseEstimator(backend) # [New] 关键点引导的 ROI 裁剪推理
+        self.scheduler = InferenceScheduler(self.estimator) # [New] 自适应跳帧推理 + 运动预测补帧
+        self.engine = engine
+        self.model_complexity = model_complexity
+        self.engine_lock = threading.Lock()
+        self.h_val = 180.0 # 身高 (主线程写，逻辑线程读)
+
+        self.pool = PanelPool()
+        self.inflight = {} # [New] 异步后端在途帧 {fid: FramePacket} (推理线程独占)
+        self.async_dropped = 0
+        self.q_infer = DropQueue(depth, self.release)
+        self.q_logic = DropQueue(depth, self.release)
+        self.q_render = DropQueue(depth, self.release)
+        self.latency = 0.0 # 最近一帧 采集 -> 逻辑完成 的耗时 (秒)
+
+        self._stop = threading.Event()
+        self._threads = [threading.Thread(target=fn, name=name, daemon=True)
+                         for name, fn in (('capture', self._capture_loop), ('inference', self._infer_loop), ('logic', self._logic_loop))]
+
+    def start(self):
+        for t in self._threads: t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads: t.join(timeout=1.0)
+        self.scheduler.stop()
+        self.estimator.close()
+
+    def get_result(self, timeout=None):
+        """主线程取最新的已处理帧 (FramePacket)，超时返回 None"""
+        return self.q_render.get_latest(timeout)
+
+    def release(self, pkt):
+        """
+        [New] 归还帧的面板缓冲 (此后不得再访问 pkt.panel)
+        主线程在用新帧替换掉上一帧时调用；被队列丢弃的帧由队列自动归还
+        """
+        if pkt is None or pkt.panel is None: return
+        self.pool.release(pkt.panel)
+        pkt.panel = None
+
+    @property
+    def dropped(self):
+        return self.q_infer.dropped + self.q_logic.dropped + self.q_render.dropped + self.async_dropped
+
+    # --- 阶段 1: 采集 + 面板预处理 ---
+    def _capture_loop(self):
+        last_seq, fid = -1, 0
+        while not self._stop.is_set():
+            seq, frame, idx = self.loader.read_new(last_seq)
+            if frame is None:
+                time.sleep(0.002); continue
+            last_seq = seq
+            # frame 为采集环形缓冲的只读视图：加载器已输出面板时只做一次拷贝，否则裁剪镜像进池中的面板缓冲
+            panel = self.pool.acquire()
+            if self.loader.panel_size:
+                np.copyto(panel, frame); geom = self.loader.geometry
+            else:
+                crop_mirror_panel(frame, out=panel); geom = panel_geometry(frame.shape[1], frame.shape[0])
+            if not self.loader.is_fresh(seq):
+                self.pool.release(panel); continue # 处理期间槽位已被采集线程改写 (极端卡顿)，丢弃此帧
+            pkt = FramePacket(fid, self.loader.src, idx, panel)
+            pkt.geom = geom
+            self.q_infer.put(pkt)
+            fid += 1
+
+    # --- 阶段 2: 推理 (关键点缓存命中时跳过) ---
+    def _infer_loop(self):
+        cached, cache_src = None, None # 当前视频源的缓存回放后端
+        rgb = None # 颜色转换缓冲 (推理线程独占，process() 为同步调用，可逐帧复用)
+        is_async = self.backend.asynchronous
+        while not self._stop.is_set():
+            # 有在途帧时短等待，及时取回异步结果
+            pkt = self.q_infer.get(timeout=0.005 if self.inflight else 0.1)
+            if pkt is not None:
+                # 切换视频源时重新查找缓存
+                if pkt.src != cache_src:
+                    cache_src = pkt.src
+                    self.scheduler.reset(); self.estimator.reset(); self._drop_inflight()
+                    try: cached = CachedPoseBackend.load(cache_src, self.model_complexity) if isinstance(cache_src, str) else None
+                    except OSError: cached = None
+
+                if cached is not None and cached.covers(pkt.src_idx):
+                    pkt.lm = cached.process(None, pkt.t_cap, pkt.src_idx).lm
+                elif is_async:
+                    # 每帧独立的输入缓冲：模型在提交返回后仍可能读取图像
+                    self.backend.submit(cv2.cvtColor(pkt.panel, cv2.COLOR_BGR2RGB), pkt.t_cap, pkt.fid)
+                    self.inflight[pkt.fid] = pkt
+                    pkt = None
+                else:
+                    rgb = cv2.cvtColor(pkt.panel, cv2.COLOR_BGR2RGB, dst=rgb)
+                    pkt.lm, pkt.predicted = self.scheduler.process(rgb, pkt.t_cap)
+                if pkt is not None:
+                    pkt.t_infer = time.time()
+                    self.q_logic.put(pkt)
+            if self.inflight: self._collect_async()
+
+    def _collect_async(self):
+        """[New] 取回异步推理结果，回填到对应的在途帧后按提交顺序交给逻辑阶段"""
+        for res in self.backend.poll():
+            pkt = self.inflight.pop(res.fid, None)
+            if pkt is None: continue # 已因超限 / 切换视频源被丢弃
+            # 比本帧更早提交的帧已被 MediaPipe 丢弃，不会再有回调
+            for fid in [f for f in self.inflight if f < res.fid]: self._drop_inflight(fid)
+            pkt.lm = res.lm
+            pkt.t_infer = time.time()
+            self.q_logic.put(pkt)
+        while len(self.inflight) > AppConfig.POSE_ASYNC_MAX_INFLIGHT:
+            self._drop_inflight(min(self.inflight))
+
+    def _drop_inflight(self, fid=None):
+        """丢弃一个 (fid=None 时全部) 在途帧并归还其面板"""
+        for f in ([fid] if fid is not None else list(self.inflight)):
+            self.async_dropped += 1
+            self.release(self.inflight.pop(f))
+
+    # --- 阶段 3: 引擎更新 ---
+    def _logic_loop(self):
+        while not self._stop.is_set():
+            pkt = self.q_logic.get(timeout=0.1)
+            if pkt is None: continue
+            pts = extract_keypoints_array(pkt.lm)
+            if pkt.predicted and pkt.lm is not None: pts['predicted'] = True # 供动作逻辑区分预测帧
+            with self.engine_lock:
+                pkt.vis, pkt.pts = self.engine.update(pts, None, self.h_val, ts=pkt.t_cap) # 计时以采集时刻为准
+                pkt.data = self.engine.get_ui_data()
+                pkt.data['errs'] = dict(pkt.data['errs']) # 快照，避免绘制时与逻辑线程并发修改
+            pkt.t_logic = time.time()
+            self.latency = pkt.t_logic - pkt.t_cap
+            self.q_render.put(pkt)
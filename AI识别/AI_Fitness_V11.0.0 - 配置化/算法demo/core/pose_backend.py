@@ -0,0 +1,196 @@
+"""
+姿态估计后端 (Pose Backend)
+把 "图像 -> 关键点" 抽象为统一接口，主循环 / 流水线 / 离线分析不再直接依赖某一种 MediaPipe API。
+所有后端输出同一种结果 PoseResult：帧号 + 时间戳 + (33, 4) 归一化关键点 + (33, 4) 世界坐标。
+
+- SolutionsPoseBackend : 旧版 mp.solutions.pose 同步 API (默认)
+- LiveStreamPoseBackend: MediaPipe Tasks PoseLandmarker (LIVE_STREAM 模式)，detect_async 提交、回调返回，
+                         推理进行期间调用方可继续采集 / 绘制
+- CachedPoseBackend    : 从关键点缓存 (offline/landmark_cache.py) 按视频帧号回放，不需要摄像头与模型，
+                         下游基准测试结果可复现
+
+接口：
+    submit(rgb, ts, fid)   提交一帧 (异步后端立即返回)
+    poll()                 取回已完成的结果 list[PoseResult] (按完成顺序)
+    process(rgb, ts, fid)  同步便捷接口：提交并等待本帧结果
+    close()
+asynchronous 为 True 的后端 (LIVE_STREAM) 应由调用方 submit / poll 驱动 (见 core/pipeline.py 推理阶段、main_config.py)：
+提交后立即返回继续采集 / 绘制，结果按帧号回到对应的帧上。
+tracking 为 True 的后端 (mp.solutions.pose 视频模式、LIVE_STREAM) 跨帧跟踪，须逐帧输入同一尺寸的整帧；
+ROI 裁剪推理 (core/pose_roi.py) 经 for_crops() 取一个逐帧独立检测的后端。
+"""
+import collections
+import itertools
+from abc import ABC, abstractmethod
+import os
+import threading
+from core.config import AppConfig
+from core.engine import landmarks_to_array
+from offline.landmark_cache import LandmarkCache, DEFAULT_CACHE_DIR
+
+class PoseResult:
+    """一帧推理结果 (lm / world 为 None 表示未检测到人体)"""
+    __slots__ = ('fid', 'ts', 'lm', 'world')
+    def __init__(self, fid, ts, lm=None, world=None):
+        self.fid = fid      # 提交时的帧号
+        self.ts = ts        # 提交时的时间戳 (秒)
+        self.lm = lm        # (33, 4) float32 [x, y, z, visibility]，x/y 相对输入图像归一化
+        self.world = world  # (33, 4) float32 世界坐标 (米)
+
+class PoseBackend(ABC):
+    """后端基类：实现 submit()，完成时调用 _emit()；process() / poll() 由基类提供"""
+    asynchronous = False # submit() 是否立即返回 (结果经 poll() 取回)
+    tracking = False     # 模型是否跨帧跟踪 (输入须为同一尺寸的连续整帧)
+
+    def __init__(self):
+        self._done = collections.deque()
+        self._cond = threading.Condition()
+        self._fids = itertools.count()
+
+    @abstractmethod
+    def submit(self, rgb, ts, fid=None):
+        """提交一帧 RGB 图像 (fid 为 None 时自动编号)，完成时经 _emit() 交付 PoseResult"""
+
+    def _next_fid(self, fid):
+        return next(self._fids) if fid is None else fid
+
+    def _emit(self, result):
+        with self._cond:
+            self._done.append(result)
+            self._cond.notify_all()
+
+    def poll(self):
+        with self._cond:
+            out = list(self._done)
+            self._done.clear()
+        return out
+
+    def process(self, rgb, ts=0.0, fid=None, timeout=1.0):
+        """
+        提交并等待本帧结果；超时 (异步后端丢帧) 返回空结果
+        同步调用方独占后端时使用，等待期间到达的其他帧结果会被丢弃
+        """
+        fid = self._next_fid(fid)
+        self.submit(rgb, ts, fid)
+        with self._cond:
+            ok = self._cond.wait_for(lambda: any(r.fid == fid for r in self._done), timeout)
+            if not ok: return PoseResult(fid, ts)
+            while True:
+                r = self._done.popleft()
+                if r.fid == fid: return r
+
+    def for_crops(self):
+        """可接收 ROI 裁剪图 (尺寸逐帧变化、与整帧交替) 的后端；跨帧跟踪的后端返回 None (不做 ROI 裁剪)"""
+        return None if self.tracking else self
+
+    def close(self):
+        pass
+
+class SolutionsPoseBackend(PoseBackend):
+    """
+    旧版 mp.solutions.pose (同步)：submit() 内完成推理
+    :param static_image_mode: True 时每帧独立检测 (不跨帧跟踪)
+    """
+    def __init__(self, model_complexity=1, pose=None, static_image_mode=False):
+        super().__init__()
+        if pose is None:
+            import mediapipe as mp # 延迟导入，回放缓存时无需 mediapipe
+            pose = mp.solutions.pose.Pose(static_image_mode=static_image_mode, min_detection_confidence=0.6,
+                                          min_tracking_confidence=0.6, model_complexity=model_complexity)
+        self.pose = pose
+        self.model_complexity = model_complexity
+        self.tracking = not static_image_mode
+
+    def for_crops(self):
+        # 视频模式跨帧跟踪，裁剪图交给另一个逐帧独立检测的实例
+        return self if not self.tracking else SolutionsPoseBackend(self.model_complexity, static_image_mode=True)
+
+    def submit(self, rgb, ts, fid=None):
+        res = self.pose.process(rgb)
+        self._emit(PoseResult(
+            self._next_fid(fid), ts,
+            landmarks_to_array(res.pose_landmarks.landmark if res.pose_landmarks else None),
+            landmarks_to_array(res.pose_world_landmarks.landmark if getattr(res, 'pose_world_landmarks', None) else None)))
+
+    def close(self):
+        self.pose.close()
+
+class LiveStreamPoseBackend(PoseBackend):
+    """
+    MediaPipe Tasks PoseLandmarker，LIVE_STREAM 模式
+    模型忙时 MediaPipe 会直接丢弃新提交的帧 (不回调)，process() 对此按超时返回空结果
+    :param model_path: .task 模型文件
+    """
+    asynchronous = True
+    tracking = True
+
+    def __init__(self, model_path=AppConfig.POSE_TASK_MODEL):
+        super().__init__()
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"Pose landmarker model not found: {model_path}")
+        import mediapipe as mp
+        from mediapipe.tasks.python import BaseOptions, vision
+        self._mp = mp
+        self._pending = {} # timestamp_ms -> (fid, ts)
+        self._last_ms = -1
+        options = vision.PoseLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path),
+            running_mode=vision.RunningMode.LIVE_STREAM,
+            min_pose_detection_confidence=0.6, min_tracking_confidence=0.6,
+            result_callback=self._on_result)
+        self.landmarker = vision.PoseLandmarker.create_from_options(options)
+
+    def submit(self, rgb, ts, fid=None):
+        fid = self._next_fid(fid)
+        # LIVE_STREAM 要求时间戳 (毫秒) 严格递增
+        ms = max(int(ts * 1000), self._last_ms + 1)
+        self._last_ms = ms
+        with self._cond: self._pending[ms] = (fid, ts)
+        image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=rgb)
+        self.landmarker.detect_async(image, ms)
+
+    def _on_result(self, result, _image, ms):
+        with self._cond:
+            fid, ts = self._pending.pop(ms, (None, ms / 1000.0))
+            # 比本帧更早、已被 MediaPipe 丢弃的提交不会再有回调
+            for k in [k for k in self._pending if k < ms]: del self._pending[k]
+        lm = landmarks_to_array(result.pose_landmarks[0]) if result.pose_landmarks else None
+        world = landmarks_to_array(result.pose_world_landmarks[0]) if result.pose_world_landmarks else None
+        self._emit(PoseResult(fid, ts, lm, world))
+
+    def close(self):
+        self.landmarker.close()
+
+class CachedPoseBackend(PoseBackend):
+    """
+    关键点缓存回放：fid 为视频帧序号，忽略输入图像
+    """
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+
+    @classmethod
+    def load(cls, video_path, model_complexity=1, cache_dir=DEFAULT_CACHE_DIR):
+        """缓存命中返回后端实例，否则返回 None"""
+        cache = LandmarkCache.load(video_path, model_complexity, cache_dir)
+        return cls(cache) if cache is not None else None
+
+    def __len__(self):
+        return len(self.cache)
+
+    def covers(self, fid):
+        return fid is not None and 0 <= fid < len(self.cache)
+
+    def submit(self, rgb, ts, fid=None):
+        fid = self._next_fid(fid)
+        lm, world = self.cache.frame(fid)
+        self._emit(PoseResult(fid, ts, lm, world))
+
+def create_pose_backend(kind=AppConfig.POSE_BACKEND, model_complexity=1):
+    """
+    按配置创建实时推理后端
+    :param kind: 'solutions' (mp.solutions.pose 同步) / 'live_stream' (MediaPipe Tasks 异步)
+    """
+    if kind == 'live_stream': return LiveStreamPoseBackend()
+    if kind == 'solutions': return SolutionsPoseBackend(model_complexity)
+    raise ValueError(f"Unknown pose backend: {kind}")
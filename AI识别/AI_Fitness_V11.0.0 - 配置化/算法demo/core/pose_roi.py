@@ -0,0 +1,128 @@
+"""
+关键点引导的推理 ROI 裁剪 (Pose ROI Front-end)
+原先每帧都把整块 640x720 左侧面板送入 pose.process()，人站得远时人体只占画面一小块。
+这里用上一帧关键点的包围盒预测本帧人体所在区域：
+1. 包围盒按速度外推 (上一帧 -> 本帧的中心位移)，四周外扩 POSE_ROI_MARGIN，并保证最小边长
+2. 裁出 ROI 缩放到固定高度 POSE_ROI_INPUT_H 后推理，关键点再映射回面板归一化坐标
+3. 跟踪丢失 (无检测 / 可见点过少) 时当帧立即回退整帧推理；每隔 POSE_ROI_REDETECT 帧整帧重检测一次，
+   防止 ROI 锁死在局部 (人走出 ROI、画面中换人)
+
+输出与整帧推理相同格式的 (33, 4) 数组 [x, y, z, visibility] (x/y 相对面板归一化)，下游 Engine 无需改动。
+离线批处理 (offline/pipeline.py) 仍为整帧推理，关键点缓存语义不变。
+跨帧跟踪的后端 (mp.solutions.pose 视频模式) 不能接收尺寸逐帧变化的裁剪图：整帧仍送原后端，
+裁剪图送 backend.for_crops() 给出的逐帧独立检测实例；没有这样的实例 (LIVE_STREAM) 时不做 ROI 裁剪。
+"""
+import cv2
+import numpy as np
+from core.config import AppConfig
+from utils.pose_frame import EXPOSED
+
+class RoiPoseEstimator:
+    """
+    :param backend: 姿态估计后端 (core/pose_backend.py，只调用其 process())，整帧推理
+    :param enable: False 时始终整帧推理 (等同直接调用 backend.process)
+    """
+    def __init__(self, backend, enable=None):
+        self.backend = backend
+        enable = AppConfig.POSE_ROI_ENABLE if enable is None else enable
+        self.roi_backend = backend.for_crops() if enable else None # 裁剪图推理 (不跨帧跟踪)
+        self.enable = self.roi_backend is not None
+        self.stats = {'full': 0, 'roi': 0, 'retry': 0} # 整帧 / ROI / ROI 失败后整帧重试 次数
+        self.reset()
+
+    def close(self):
+        """释放单独创建的裁剪图推理后端 (整帧后端由调用方关闭)"""
+        if self.roi_backend is not None and self.roi_backend is not self.backend: self.roi_backend.close()
+        self.roi_backend = None
+        self.enable = False
+
+    def reset(self):
+        """切换视频源时调用，下一帧整帧检测"""
+        self.box = None            # 上一帧可见关键点包围盒 (x0, y0, x1, y1)，面板像素
+        self.vel = (0.0, 0.0)      # 包围盒中心的逐帧位移
+        self.since_full = 0        # 距上次整帧推理的帧数
+        self.last_roi = None       # 最近一次实际使用的 ROI (None 为整帧)
+
+    def process(self, img, ts=0.0):
+        """
+        :param img: 面板 RGB 图像 (H, W, 3)
+        :param ts: 本帧时间戳 (秒)，透传给后端
+        :return: (33, 4) float32 关键点数组 (面板归一化坐标)，未检测到人体时为 None
+        """
+        h, w = img.shape[:2]
+        roi = self._predict(w, h) if self.enable else None
+        if roi is not None:
+            lm = self._infer(img, roi, ts)
+            if self._tracked(lm):
+                self.stats['roi'] += 1; self.since_full += 1
+                self.last_roi = roi
+                self._track(lm, w, h)
+                return lm
+            self.stats['retry'] += 1
+
+        lm = self._infer(img, None, ts)
+        self.stats['full'] += 1; self.since_full = 0
+        self.last_roi = None
+        self._track(lm, w, h)
+        return lm
+
+    def _predict(self, w, h):
+        """按上一帧包围盒 + 速度外推本帧 ROI (x0, y0, x1, y1)，需整帧推理时返回 None"""
+        if self.box is None or self.since_full >= AppConfig.POSE_ROI_REDETECT: return None
+        x0, y0, x1, y1 = self.box
+        vx, vy = self.vel
+        mx = (x1 - x0) * AppConfig.POSE_ROI_MARGIN
+        my = (y1 - y0) * AppConfig.POSE_ROI_MARGIN
+        x0, x1 = x0 + vx - mx, x1 + vx + mx
+        y0, y1 = y0 + vy - my, y1 + vy + my
+
+        # 最小边长 (以中心为准扩展)
+        min_size = AppConfig.POSE_ROI_MIN_SIZE
+        if x1 - x0 < min_size: cx = (x0 + x1) / 2; x0, x1 = cx - min_size / 2, cx + min_size / 2
+        if y1 - y0 < min_size: cy = (y0 + y1) / 2; y0, y1 = cy - min_size / 2, cy + min_size / 2
+
+        x0, y0 = max(0, int(x0)), max(0, int(y0))
+        x1, y1 = min(w, int(np.ceil(x1))), min(h, int(np.ceil(y1)))
+        if x1 - x0 < 2 or y1 - y0 < 2: return None
+        # ROI 已接近整帧时裁剪收益不大
+        if (x1 - x0) * (y1 - y0) > AppConfig.POSE_ROI_MAX_FRAC * w * h: return None
+        return x0, y0, x1, y1
+
+    def _infer(self, img, roi, ts):
+        if roi is None:
+            return self.backend.process(img, ts).lm
+
+        h, w = img.shape[:2]
+        x0, y0, x1, y1 = roi
+        cw, ch = x1 - x0, y1 - y0
+        in_h = AppConfig.POSE_ROI_INPUT_H
+        in_w = max(1, int(round(cw * in_h / ch)))
+        crop = cv2.resize(img[y0:y1, x0:x1], (in_w, in_h))
+        lm = self.roi_backend.process(crop, ts).lm
+        if lm is None: return None
+
+        # ROI 归一化坐标 -> 面板归一化坐标 (z 与 x 同尺度)
+        lm[:, 0] = (x0 + lm[:, 0] * cw) / w
+        lm[:, 1] = (y0 + lm[:, 1] * ch) / h
+        lm[:, 2] *= cw / w
+        return lm
+
+    @staticmethod
+    def _tracked(lm):
+        """ROI 推理结果是否可信：引擎使用的关键点至少一半可见"""
+        if lm is None: return False
+        return np.count_nonzero(lm[EXPOSED, 3] > AppConfig.POSE_ROI_VIS_TH) * 2 >= len(EXPOSED)
+
+    def _track(self, lm, w, h):
+        """用本帧结果更新包围盒与速度"""
+        vis = lm[:, 3] > AppConfig.POSE_ROI_VIS_TH if lm is not None else None
+        if vis is None or np.count_nonzero(vis) < 4:
+            self.box, self.vel = None, (0.0, 0.0)
+            return
+        xs, ys = lm[vis, 0] * w, lm[vis, 1] * h
+        box = (float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()))
+        if self.box is not None:
+            self.vel = ((box[0] + box[2] - self.box[0] - self.box[2]) / 2, (box[1] + box[3] - self.box[1] - self.box[3]) / 2)
+        else:
+            self.vel = (0.0, 0.0)
+        self.box = box
@@ -34,4 +34,12 @@ class SoundManager:
             try:
                 self.sounds[name].set_volume(AppConfig.VOL)
                 self.sounds[name].play()
-            except: pass
\ No newline at end of file
+            except: pass
+
+class SilentSoundManager:
+    """[New] 静音实现 (离线批处理/无声卡环境使用)，接口与 SoundManager 一致"""
+    def __init__(self):
+        self.sounds = {}
+
+    def play(self, name):
+        pass
\ No newline at end of file
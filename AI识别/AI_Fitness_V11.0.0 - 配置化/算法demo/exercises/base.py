@@ -1,21 +1,23 @@
-import time
 from core.config import AlgoConfig, ColorConfig, TextConfig
 from logic.feedback import FeedbackSystem
-from logic.common_checks import CommonChecks 
+from core.clock import SystemClock
 
 class BaseExercise:
-    def __init__(self, sound_mgr):
+    def __init__(self, sound_mgr, clock=None):
         self.sound = sound_mgr
+        self.clock = clock if clock is not None else SystemClock() # [New] 计时统一走注入的时钟 (见 core/clock.py)
         self.feedback = FeedbackSystem(sound_mgr)
-        self.common = CommonChecks()
         
         self.stage = "start"
         self.counter = 0
         self.bad_reps = 0
         
         self.cycle_flags = {}
+        self.last_cycle_flags = {} # [New] 最近一次结算时已启用错误项的快照 (供离线统计读取，冷却期内的一轮为空)
         self.current_rep_has_error = False
         self.last_count_time = 0
+        self.cycle_frames = 0    # [New] 本轮动作处理的帧数 / 其中的预测帧与补点帧数 (见 core/inference_scheduler.py、utils/gap_filler.py)
+        self.cycle_predicted = 0
         
         self.msg = ""
         self.msg_color = ColorConfig.TEXT_DIM
@@ -47,13 +49,13 @@ class BaseExercise:
         return []
 
     def _set_msg(self, t, c, dur=0, perm=False, priority=0):
-        if priority < self.msg_priority and time.time() < self.msg_timer: return
+        if priority < self.msg_priority and self.clock.now() < self.msg_timer: return
         self.msg, self.msg_color = t, c
-        self.msg_timer = (time.time() + dur) if dur > 0 else 0
+        self.msg_timer = (self.clock.now() + dur) if dur > 0 else 0
         self.msg_priority = priority
 
     def get_msg(self):
-        if self.msg_timer > 0 and time.time() > self.msg_timer:
+        if self.msg_timer > 0 and self.clock.now() > self.msg_timer:
             self.msg = ""
             self.msg_priority = 0
             self.msg_timer = 0
@@ -61,7 +63,11 @@ class BaseExercise:
         return self.msg, self.msg_color 
 
     def _end_cycle(self, keys):
-        if time.time() - self.last_count_time < AlgoConfig.COUNT_COOLDOWN: return
+        if self.clock.now() - self.last_count_time < AlgoConfig.COUNT_COOLDOWN:
+            self.last_cycle_flags = {} # 冷却期内的一轮不判定，不记录错误项
+            return
+        self.last_cycle_flags = {k: self.cycle_flags.get(k, True) for k in keys
+                                 if getattr(AlgoConfig, f"ENABLE_{k.upper()}", True)}
         
         self.current_rep_has_error = False
         is_bad_rep = False
@@ -79,6 +85,8 @@ class BaseExercise:
             return getattr(AlgoConfig, cfg_name, 99)
 
         sorted_keys = sorted(keys, key=get_prio)
+        # [New] 本轮主要由预测帧构成时结果可信度低：照常结算，但不触发新的纠错提示
+        low_conf = self.cycle_predicted > AlgoConfig.PREDICTED_FEEDBACK_RATIO * self.cycle_frames
         
         for k in sorted_keys:
             cfg_enable = f"ENABLE_{k.upper()}"
@@ -88,7 +96,7 @@ class BaseExercise:
             is_good = self.cycle_flags.get(k, True)
             if not is_good: is_bad_rep = True
             
-            self.feedback.process_error(k, is_good, set_msg_callback=self._set_msg)
+            self.feedback.process_error(k, is_good, block_feedback=low_conf, set_msg_callback=self._set_msg)
             
         if is_bad_rep: 
             self.bad_reps += 1
@@ -98,10 +106,11 @@ class BaseExercise:
             if not self.feedback.active_feedback:
                 self.sound.play('count')
             
-        self.last_count_time = time.time()
+        self.last_count_time = self.clock.now()
         
         for k in self.cycle_flags:
             self.cycle_flags[k] = True
+        self.cycle_frames = self.cycle_predicted = 0
         
     @property
     def active_feedback(self):
@@ -0,0 +1,898 @@
+"""
+动作配置编译器 (Config Compiler)
+GenericExercise 原先每帧都要重新遍历 JSON 字典：按 calc/type 字符串分派、反查基准点对、
+反复按优先级排序。这里在加载时一次性完成校验与解析，将配置编译为一份扁平的执行计划：
+- 点引用解析为绑定好的取点函数 (原始点 / 虚拟点)
+- 虚拟点 / 度量 / 条件 / 渲染元素编译为闭包，按配置顺序存放在列表中
+- 基准变量、优先级顺序、颜色等在编译期确定
+每帧评估只剩下对这些列表的紧凑循环。配置不合法时抛出 ConfigError。
+[New] 度量中的几何部分 (角度、点对垂直距离) 经帧级度量上下文 (logic/metrics.py) 缓存，
+      触发器 / 条件 / 纠错约束 / chain_sync 引用同一度量时每帧只计算一次。
+[New] 滑窗度量 (range / mean / std / min / max / slope，"幅动" 即 range 除以参考值)：窗口状态随计划保存，
+      每个处理帧更新一次 (GenericExercise._update_windows)，更新为均摊 O(1) (utils/window_stats.py)。
+[New] 节奏度量 (tempo，logic/tempo.py)：每个处理帧记录关节速度，每轮结束时按状态机阶段分相；
+      correction_mode 为 rep_end 的条件在一轮结束、结算之前评估一次 (如 "离心时长 < 1.5s 判为过快")。
+[New] 轨迹度量 (trajectory，logic/trajectory.py)：每个处理帧记录跟踪点，一轮结束时与参考模板比对一次；
+      跟踪点 / 参考点 / 模板 / 比对方式相同的度量共用一个跟踪器 (拟合度与各分段诊断只是读数不同)。
+[New] 姿态相似 (pose_similarity，logic/pose_similarity.py)：逐帧与模板库比对 (同一帧内姿态向量只算一次)，
+      或 "at": "peak" 时逐帧比对本轮顶峰阶段的姿态，一轮结束时取均值。
+[New] 按需求值：编译期沿点引用建立依赖图，没有读取方的虚拟点不进入执行计划；度量经帧级上下文
+      惰性计算，只有当前阶段实际求值的触发器 / 条件才会拉取 (阶段门控见 GenericExercise._evaluate_conditions)。
+[New] 状态机编译为阶段转移表 (logic/phase_machine.py)：准备 / 向心 / 顶峰 / 离心 / 复位，带驻留时长、
+      分阶段纠错区间与基准采集开关；条件可用 "phases" 指定检测时机，各阶段只求值生效的条件。
+      旧写法 trigger_down / trigger_up 编译为等价的两阶段表。
+[New] 容忍度档位 (严格 / 标准 / 宽松)：条件的判定阈值可按档位给出，编译期为每档各绑定一个判定函数，
+      引导词中的 {阈值} 占位符按档预先格式化；切档 (ExercisePlan.set_tier) 只换用预编译的函数，不重新解析配置。
+"""
+import math
+from core.config import AlgoConfig
+from logic.metrics import FrameMetrics
+from utils.geometry import GeomUtils
+from logic.tempo import TempoTracker, PHASES as TEMPO_PHASES, MEASURES as TEMPO_MEASURES
+from logic.trajectory import TrajectoryTracker, MEASURES as TRAJECTORY_MEASURES
+from logic.pose_similarity import PeakPoseTracker, load_library, feature_weights, similarity
+from logic.phase_machine import PhaseMachine, Phase, Transition, REP_PHASES, BEGIN, END
+from utils.window_stats import SlidingWindow, STATS as WINDOW_STATS
+from utils.pose_frame import LANDMARK_NAMES
+
+class ConfigError(ValueError):
+    """动作配置校验失败"""
+
+VIRTUAL_ID_MIN = 100
+CORRECTION_MODES = ('realtime', 'latch_fail', 'latch_pass', 'strict_pass', 'rep_end')
+
+# =========================================================================
+# 基础：取点与字段校验
+# =========================================================================
+
+def _require(cfg, key, where):
+    if not isinstance(cfg, dict) or key not in cfg:
+        raise ConfigError(f"{where}: missing '{key}'")
+    return cfg[key]
+
+def _point_getter(pid, mp_map):
+    """
+    点引用 -> 取点函数 f(raw_pts, v_pts)
+    规则与 GenericExercise._get_pt 一致：<100 的整数为 MediaPipe ID，其余为虚拟点 ID
+    """
+    if isinstance(pid, int) and pid < VIRTUAL_ID_MIN:
+        key = mp_map.get(pid)
+        if key is None: return lambda raw, v: None
+        return lambda raw, v: raw.get(key)
+    if pid is None: return lambda raw, v: None
+    return lambda raw, v: v.get(pid)
+
+def _per_frame(compute, kind, points, scope):
+    """
+    compute(raw, v) -> f(raw, v)，同一帧内只计算一次
+    缓存键为 (度量类型, 点引用, 所属配置)：同一份配置中点引用相同的度量共享结果，
+    scope 取该配置编译期的 var_points (闭包持有引用，id 在计划存活期间唯一)，虚拟点 ID 不会与其他动作冲突。
+    编译度量只在 GenericExercise.process() 内求值，此时本帧虚拟点已更新。
+    """
+    key = (kind, tuple(points), id(scope))
+    return lambda raw, v, _scope=scope: FrameMetrics.of(raw).memo(key, compute, raw, v)
+
+def _point_getters(pids, mp_map, where, n=None):
+    if not isinstance(pids, list) or (n is not None and len(pids) < n):
+        raise ConfigError(f"{where}: expected a list of {n or 'N'} point ids, got {pids!r}")
+    return [_point_getter(p, mp_map) for p in pids]
+
+# =========================================================================
+# 虚拟点
+# =========================================================================
+
+def _compile_virtual_point(vp, mp_map):
+    pid = _require(vp, 'id', 'virtual_points[]')
+    calc = _require(vp, 'calc', f"virtual_points[{pid}]")
+    where = f"virtual_points[{pid}]"
+
+    if calc == 'midpoint':
+        srcs = _point_getters(_require(vp, 'sources', where), mp_map, where, 1)
+        n = len(srcs)
+        def fn(raw, v):
+            ps = [g(raw, v) for g in srcs]
+            if all(ps):
+                v[pid] = (int(sum(p[0] for p in ps) / n), int(sum(p[1] for p in ps) / n))
+
+    elif calc == 'projection_vertical':
+        src = _point_getter(_require(vp, 'source', where), mp_map)
+        off_y = vp.get('offset_y', 0)
+        def fn(raw, v):
+            p = src(raw, v)
+            if p: v[pid] = (p[0], p[1] + off_y)
+
+    elif calc == 'offset':
+        src = _point_getter(_require(vp, 'source', where), mp_map)
+        off_x, off_y = vp.get('offset_x', 0), vp.get('offset_y', 0)
+        def fn(raw, v):
+            p = src(raw, v)
+            if p: v[pid] = (p[0] + off_x, p[1] + off_y)
+
+    elif calc == 'compose':
+        gx = _point_getter(_require(vp, 'source_x', where), mp_map)
+        gy = _point_getter(_require(vp, 'source_y', where), mp_map)
+        def fn(raw, v):
+            px, py = gx(raw, v), gy(raw, v)
+            if px and py: v[pid] = (px[0], py[1])
+
+    elif calc == 'extend_horizontal':
+        src = _point_getter(_require(vp, 'source', where), mp_map)
+        r1 = _point_getter(_require(vp, 'ref_start', where), mp_map)
+        r2 = _point_getter(_require(vp, 'ref_end', where), mp_map)
+        direction = vp.get('direction', 1.0)
+        def fn(raw, v):
+            p, a, b = src(raw, v), r1(raw, v), r2(raw, v)
+            if p and a and b:
+                length = math.hypot(a[0] - b[0], a[1] - b[1])
+                v[pid] = (int(p[0] + length * direction), p[1])
+
+    else:
+        raise ConfigError(f"{where}: unknown calc '{calc}'")
+    return fn
+
+# =========================================================================
+# 依赖图 (虚拟点池)
+# =========================================================================
+
+# 配置片段中可能出现点引用的字段 (虚拟点 / 度量 / 条件 / 绘制)
+_POINT_KEYS = ('sources', 'source', 'source_x', 'source_y', 'ref_start', 'ref_end', 'points',
+               'numerator_points', 'denominator_points', 'from', 'to', 'start', 'center', 'point', 'origin')
+# 嵌套的度量 / 绘制配置 ('metric' 为字符串时是度量名，为字典时是 threshold 条件的度量配置)
+_NESTED_KEYS = ('metric', 'value', 'metric_1', 'metric_2', 'correction_constraint', 'reset_condition', 'on_good', 'on_bad')
+
+def _point_refs(cfg, var_points, out=None):
+    """配置片段 (可嵌套) 直接引用的点 ID 集合 (MediaPipe ID 与虚拟点 ID)"""
+    out = set() if out is None else out
+    if isinstance(cfg, str): cfg = {'metric': cfg} # 度量简写
+    if not isinstance(cfg, dict): return out
+    stack = [cfg.get(k) for k in _POINT_KEYS]
+    # compression_ratio 未显式给点对时取基准定义的点对 (同 compile_metric)
+    if cfg.get('metric') == 'compression_ratio' and not cfg.get('points'):
+        stack.append(var_points.get(cfg.get('baseline', 'standing_baseline')) or [101, 102])
+    # 姿态相似读取整帧姿态
+    if 'pose_similarity' in (cfg.get('metric'), cfg.get('type')):
+        stack.append(list(LANDMARK_NAMES))
+    while stack:
+        r = stack.pop()
+        if isinstance(r, list): stack.extend(r)
+        elif r is not None: out.add(r)
+    for k in _NESTED_KEYS:
+        sub = cfg.get(k)
+        if isinstance(sub, dict) or (k != 'metric' and isinstance(sub, str)):
+            _point_refs(sub, var_points, out)
+    return out
+
+def _virtual_refs(cfg, var_points):
+    """配置片段 (可嵌套) 直接引用的虚拟点 ID 集合"""
+    return {r for r in _point_refs(cfg, var_points) if not (isinstance(r, int) and r < VIRTUAL_ID_MIN)}
+
+def _landmark_refs(cfg, vp_refs, var_points, mp_map):
+    """
+    [New] 配置片段直接或经虚拟点间接读取的原始关键点名集合 (补点帧判定，见 GenericExercise._evaluate_conditions)
+    :param vp_refs: {虚拟点 ID: 直接引用的点 ID 集合}
+    """
+    names, seen = set(), set()
+    stack = list(_point_refs(cfg, var_points))
+    while stack:
+        r = stack.pop()
+        if isinstance(r, int) and r < VIRTUAL_ID_MIN:
+            if r in mp_map: names.add(mp_map[r])
+        elif r not in seen:
+            seen.add(r)
+            stack.extend(vp_refs.get(r, ()))
+    return frozenset(names)
+
+def _state_machine_roots(sm):
+    """状态机中引用度量的配置片段 (旧写法的触发器 / 阶段表的转移触发器与纠错区间 / 熔断)"""
+    out = [sm.get(k) for k in ('trigger_down', 'trigger_up', 'zombie_breaker')]
+    for tr in sm.get('transitions', []):
+        trig = tr.get('trigger') if isinstance(tr, dict) else None
+        out += trig if isinstance(trig, list) else [trig]
+    for p in sm.get('phases', []):
+        zone = p.get('zone') if isinstance(p, dict) else None
+        if isinstance(zone, dict): out += [zone.get('enter'), zone.get('leave')]
+    return out
+
+def _live_virtual_points(config, var_points):
+    """
+    从各消费方 (动态基准 / 状态机触发器 / 条件 / 渲染元素) 出发，沿虚拟点之间的引用求可达集合
+    不可达的虚拟点没有任何读取方，编译计划中直接剔除
+    """
+    edges = {vp.get('id'): _virtual_refs(vp, var_points) for vp in config.get('virtual_points', [])}
+    eval_cfg = config.get('evaluation', {})
+    roots = [{'points': pts} for pts in var_points.values()]
+    roots += _state_machine_roots(eval_cfg.get('state_machine', {}))
+    roots.append(eval_cfg.get('tempo'))
+    roots += eval_cfg.get('conditions', []) + config.get('elements', [])
+    live, stack = set(), []
+    for r in roots: stack.extend(_virtual_refs(r, var_points))
+    while stack:
+        pid = stack.pop()
+        if pid in live: continue
+        live.add(pid)
+        stack.extend(edges.get(pid, ()))
+    return live
+
+# =========================================================================
+# 动态基准
+# =========================================================================
+
+class DynamicVar:
+    __slots__ = ('name', 'p1', 'p2', 'points', 'decay', 'damping', 'active_state', 'active_phases')
+    def __init__(self, var, mp_map):
+        self.name = _require(var, 'name', 'dynamic_vars[]')
+        where = f"dynamic_vars[{self.name}]"
+        src_type = _require(var, 'source_type', where)
+        if src_type != 'distance_y':
+            raise ConfigError(f"{where}: unknown source_type '{src_type}'")
+        self.points = _require(var, 'points', where)
+        self.p1, self.p2 = _point_getters(self.points, mp_map, where, 2)[:2]
+        self.decay = var.get('decay', 0.9995)
+        self.damping = var.get('damping', 0.05)
+        self.active_state = var.get('active_state', 'START').lower()
+        self.active_phases = frozenset((self.active_state,)) # 采集阶段，状态机编译后由 PhaseMachine.phases_for 确定
+
+# =========================================================================
+# 度量
+# =========================================================================
+
+class WindowedMetric:
+    """
+    滑窗度量：最近 N 个处理帧 (window) 和 / 或 N 秒 (window_sec) 内某个度量的统计量
+    update() 在每个处理帧调用一次 (与当前阶段是否求值该度量无关)，求值时只读取窗口
+    """
+    __slots__ = ('source', 'stat', 'window')
+    def __init__(self, source, stat, size, span):
+        self.source, self.stat = source, stat
+        self.window = SlidingWindow(size, span)
+
+    def update(self, raw, v, dyn, t):
+        self.window.push(self.source(raw, v, dyn), t)
+
+    def value(self):
+        return self.window.stat(self.stat)
+
+class TrackedPath:
+    """轨迹度量的跟踪点：update() 在每个处理帧调用一次，把跟踪点 (相对参考点) 送入跟踪器"""
+    __slots__ = ('tracker', 'point', 'origin')
+    def __init__(self, tracker, point, origin):
+        self.tracker, self.point, self.origin = tracker, point, origin
+
+    def update(self, raw, v, t, scale):
+        p = self.point(raw, v)
+        if p and self.origin:
+            o = self.origin(raw, v)
+            p = (p[0] - o[0], p[1] - o[1]) if o else None
+        self.tracker.push(t, p, scale)
+
+def _tracked_path(plan, cfg, mp_map, where):
+    """取 (或创建) 轨迹度量对应的跟踪器，配置相同的度量共用"""
+    template = _require(cfg, 'template', where)
+    key = (cfg.get('point'), cfg.get('origin'), repr(template), cfg.get('strategy', 'dtw'),
+           cfg.get('band', AlgoConfig.TRAJECTORY_BAND), bool(cfg.get('fit', True)))
+    path = plan.trajectories.get(key)
+    if path is None:
+        try:
+            tracker = TrajectoryTracker(template, key[3], key[4], key[5])
+        except ValueError as e:
+            raise ConfigError(f"{where}: {e}")
+        origin = cfg.get('origin')
+        path = plan.trajectories[key] = TrackedPath(tracker, _point_getter(_require(cfg, 'point', where), mp_map),
+                                                    _point_getter(origin, mp_map) if origin is not None else None)
+    return path.tracker
+
+def compile_metric(metric_cfg, mp_map, var_points, where, plan=None):
+    """
+    度量配置 -> f(raw_pts, v_pts, dyn_vars) -> float
+    :param plan: 所属执行计划 (滑窗度量登记到 plan.windows，节奏度量读取 plan.tempo，
+                 轨迹 / 顶峰姿态度量登记到 plan.trajectories / plan.peak_poses)；None 表示此处不允许有状态的度量
+    """
+    if isinstance(metric_cfg, str): metric_cfg = {'metric': metric_cfg}
+    name = _require(metric_cfg, 'metric', where)
+
+    if name == 'compression_ratio':
+        base_name = metric_cfg.get('baseline', 'standing_baseline')
+        # 点对优先取显式配置，其次在编译期反查定义该基准的 dynamic_var
+        points = metric_cfg.get('points') or var_points.get(base_name) or [101, 102]
+        g1, g2 = _point_getters(points, mp_map, where, 2)[:2]
+        def dist(raw, v):
+            p1, p2 = g1(raw, v), g2(raw, v)
+            return abs(p1[1] - p2[1]) if (p1 and p2) else 0.0
+        curr = _per_frame(dist, 'distance_y', points, var_points)
+        def fn(raw, v, dyn):
+            return curr(raw, v) / max(dyn.get(base_name, 1.0), 1.0)
+
+    elif name == 'vertical_diff':
+        points = metric_cfg.get('points', [])
+        if len(points) < 2: return lambda raw, v, dyn: 0.0
+        g1, g2 = _point_getters(points, mp_map, where, 2)[:2]
+        def diff(raw, v):
+            p1, p2 = g1(raw, v), g2(raw, v)
+            return p1[1] - p2[1] if (p1 and p2) else 0.0
+        val = _per_frame(diff, name, points, var_points)
+        def fn(raw, v, dyn):
+            return val(raw, v)
+
+    elif name == 'angle':
+        points = metric_cfg.get('points', [])
+        if len(points) != 3: return lambda raw, v, dyn: 0.0
+        ga, gb, gc = _point_getters(points, mp_map, where, 3)
+        def angle(raw, v):
+            a, b, c = ga(raw, v), gb(raw, v), gc(raw, v)
+            return GeomUtils.angle(a, b, c) if (a and b and c) else 0.0
+        val = _per_frame(angle, name, points, var_points)
+        def fn(raw, v, dyn):
+            return val(raw, v)
+
+    elif name in WINDOW_STATS:
+        # 例: {"metric": "range", "value": {"metric": "angle", ...}, "window": 5, "reference": "standing_baseline"}
+        if plan is None: raise ConfigError(f"{where}: windowed metric '{name}' is not allowed here")
+        size, span = metric_cfg.get('window'), metric_cfg.get('window_sec')
+        if size is None and span is None: raise ConfigError(f"{where}: windowed metric '{name}' needs 'window' or 'window_sec'")
+        source = compile_metric(_require(metric_cfg, 'value', where), mp_map, var_points, where + '.value', plan)
+        w = WindowedMetric(source, name, size, span)
+        plan.windows.append(w)
+        ref = metric_cfg.get('reference')
+        if ref is None:
+            def fn(raw, v, dyn):
+                return w.value()
+        elif isinstance(ref, str): # 动态基准名
+            def fn(raw, v, dyn):
+                return w.value() / max(dyn.get(ref, 1.0), 1.0)
+        else:
+            def fn(raw, v, dyn):
+                return w.value() / ref
+
+    elif name == 'tempo':
+        # 例: {"metric": "tempo", "phase": "eccentric", "measure": "duration"} (最近一轮离心时长)
+        #     "reps": 3 时为最近 3 轮的变异系数 (节奏一致性)
+        #     phase 为状态机一轮内的阶段名 (旧写法为 down) 或 full / rest
+        if plan is None: raise ConfigError(f"{where}: tempo metric is not allowed here")
+        if plan.tempo is None: raise ConfigError(f"{where}: tempo metric is not allowed in the state machine")
+        phase, measure = metric_cfg.get('phase', 'full'), metric_cfg.get('measure', 'duration')
+        phases = TEMPO_PHASES + tuple(p.name for p in plan.machine.phases if p.in_rep)
+        if phase not in phases: raise ConfigError(f"{where}: unknown tempo phase '{phase}' (expected one of {list(phases)})")
+        if measure not in TEMPO_MEASURES: raise ConfigError(f"{where}: unknown tempo measure '{measure}'")
+        reps = metric_cfg.get('reps')
+        tempo = plan.tempo
+        if reps: tempo.track(phase, measure, reps)
+        plan.uses_tempo = True
+        def fn(raw, v, dyn):
+            return tempo.value(phase, measure, reps)
+
+    elif name == 'trajectory':
+        # 例: {"metric": "trajectory", "point": 15, "origin": 11, "template": "vertical_up", "strategy": "dtw"}
+        #     最近一轮的拟合度 (0~1)；"segment": [0.0, 0.3] 为模板行程 0~30% 区间的拟合度 (分段诊断)
+        if plan is None: raise ConfigError(f"{where}: trajectory metric is not allowed here")
+        tracker = _tracked_path(plan, metric_cfg, mp_map, where)
+        measure = metric_cfg.get('measure', 'score')
+        if measure not in TRAJECTORY_MEASURES: raise ConfigError(f"{where}: unknown trajectory measure '{measure}'")
+        segment = metric_cfg.get('segment')
+        if segment is not None:
+            if not (isinstance(segment, list) and len(segment) == 2 and 0.0 <= segment[0] <= segment[1] <= 1.0):
+                raise ConfigError(f"{where}: segment must be [start, end] within [0, 1], got {segment!r}")
+            tracker.segments = True
+        tol = metric_cfg.get('tolerance', AlgoConfig.TRAJECTORY_TOLERANCE)
+        def fn(raw, v, dyn):
+            return tracker.value(measure, segment, tol)
+
+    elif name == 'pose_similarity':
+        # 例: {"metric": "pose_similarity", "library": "plank_std", "features": {"angle_l_hip": 2.0, "dir_torso": 1.0}}
+        #     与最近模板的相似度 (0~1)；"at": "peak" 为最近一轮顶峰阶段各帧的平均相似度 (可为任一一轮内的阶段名)
+        try:
+            lib = load_library(_require(metric_cfg, 'library', where))
+            weights = feature_weights(metric_cfg.get('features'))
+        except ValueError as e:
+            raise ConfigError(f"{where}: {e}")
+        tol = metric_cfg.get('tolerance', AlgoConfig.POSE_TOLERANCE)
+        at = metric_cfg.get('at', 'frame')
+        if at == 'frame':
+            key = (name, (metric_cfg['library'],), weights[0].tobytes(), tol)
+            def score(raw):
+                rms, _ = lib.query(FrameMetrics.of(raw)['pose_embedding'], weights)
+                return similarity(rms[0], tol)
+            def fn(raw, v, dyn):
+                return FrameMetrics.of(raw).memo(key, score, raw)
+        else:
+            if plan is None: raise ConfigError(f"{where}: peak pose metric is not allowed here")
+            if plan.machine is None: raise ConfigError(f"{where}: peak pose metric is not allowed in the state machine")
+            rep = [p.name for p in plan.machine.phases if p.in_rep]
+            if at not in rep: raise ConfigError(f"{where}: unknown pose similarity 'at' value '{at}' (expected 'frame' or one of {rep})")
+            tracker = PeakPoseTracker(lib, weights, tol, at)
+            plan.peak_poses.append(tracker)
+            def fn(raw, v, dyn):
+                return tracker.value()
+
+    else:
+        raise ConfigError(f"{where}: unknown metric '{name}'")
+    return fn
+
+def _compile_trigger(cfg, mp_map, var_points, where, default_op, plan=None):
+    """
+    触发器 -> f(raw, v, dyn) -> bool
+    default_op: 未指定 operator 时的比较方向 (trigger_down 默认 '>', trigger_up 默认 '<'，与原实现一致)
+    """
+    metric = compile_metric(cfg, mp_map, var_points, where, plan)
+    th = _require(cfg, 'threshold', where)
+    op = cfg.get('operator', default_op)
+    if default_op == '>':
+        lt = (op == '<')
+    else:
+        lt = (op != '>')
+    if lt: return lambda raw, v, dyn: metric(raw, v, dyn) < th
+    return lambda raw, v, dyn: metric(raw, v, dyn) > th
+
+# =========================================================================
+# 状态机
+# =========================================================================
+
+def _trigger_list(cfg, where):
+    """触发器配置 -> [触发器] (列表表示同时成立)"""
+    if cfg is None: return []
+    items = cfg if isinstance(cfg, list) else [cfg]
+    if not all(isinstance(c, dict) for c in items):
+        raise ConfigError(f"{where}: trigger must be a dict or a list of dicts")
+    return items
+
+def _all_of(tests):
+    if not tests: return None
+    if len(tests) == 1: return tests[0]
+    return lambda *args: all(t(*args) for t in tests)
+
+def compile_state_machine(sm, compile_trigger):
+    """
+    状态机配置 -> PhaseMachine
+    :param compile_trigger: f(触发器配置, where, 默认运算符) -> 谓词 (实时路径与整段回放各自编译度量)
+
+    旧写法: {"trigger_down": {...}, "trigger_up": {...}, "zombie_breaker": {...}} -> start -> down -> start
+    阶段表写法 (例：深蹲):
+        "phases": [{"id": "prepare"},
+                   {"id": "concentric", "zone": {"enter": {...< 0.8}, "leave": {...< 0.2}}},
+                   {"id": "peak"}, {"id": "eccentric"}, {"id": "reset"}],
+        "transitions": [{"from": "prepare", "to": "concentric", "trigger": {"metric": "compression_ratio", "operator": "<", "threshold": 0.85}},
+                        {"from": "concentric", "to": "peak", "trigger": {... "<", 0.1}, "dwell_sec": 0.2},
+                        {"from": "peak", "to": "eccentric", "trigger": {... ">", 0.3}},
+                        {"from": "eccentric", "to": "reset", "trigger": {... ">", 0.92}},
+                        {"from": "reset", "to": "prepare", "dwell_sec": 0.5}]
+    阶段属性: in_rep (是否属于一轮，默认 向心 / 顶峰 / 离心)、calibrate (允许采集动态基准，默认一轮外除复位外的阶段)
+    第一个阶段为初始阶段 (熔断后回到这里)，须在一轮之外
+    """
+    where = 'state_machine'
+    if 'phases' not in sm:
+        down_cfg = _require(sm, 'trigger_down', where)
+        start, down = Phase('start', False, True), Phase('down', True, False)
+        start.transitions.append(Transition(down, compile_trigger(down_cfg, 'trigger_down', '>'), 0.0, BEGIN))
+        down.transitions.append(Transition(start, compile_trigger(_require(sm, 'trigger_up', where), 'trigger_up', '<'), 0.0, END))
+        phases = [start, down]
+    else:
+        phases, by_name = [], {}
+        for p in _require(sm, 'phases', where):
+            name = _require(p, 'id', 'state_machine.phases[]')
+            if name in by_name: raise ConfigError(f"state_machine.phases: duplicate id '{name}'")
+            in_rep = bool(p.get('in_rep', name in REP_PHASES))
+            phase = Phase(name, in_rep, bool(p.get('calibrate', not in_rep and name != 'reset')))
+            zone = p.get('zone')
+            if zone:
+                pw = f"state_machine.phases[{name}].zone"
+                phase.zone = tuple(compile_trigger(_require(zone, k, pw), f"{pw}.{k}", '>') for k in ('enter', 'leave'))
+            phases.append(phase); by_name[name] = phase
+        if not phases: raise ConfigError("state_machine.phases: empty")
+        if phases[0].in_rep: raise ConfigError(f"state_machine.phases: initial phase '{phases[0].name}' must be outside a rep")
+
+        for n, tr in enumerate(_require(sm, 'transitions', where)):
+            tw = f"state_machine.transitions[{n}]"
+            src, dst = (by_name.get(_require(tr, k, tw)) for k in ('from', 'to'))
+            if src is None or dst is None: raise ConfigError(f"{tw}: unknown phase in {tr.get('from')!r} -> {tr.get('to')!r}")
+            triggers = _trigger_list(tr.get('trigger'), tw)
+            test = _all_of([compile_trigger(c, f"{tw}.trigger", '>') for c in triggers])
+            event = BEGIN if dst.in_rep and not src.in_rep else END if src.in_rep and not dst.in_rep else None
+            if event == BEGIN and not triggers: raise ConfigError(f"{tw}: the transition into a rep needs a trigger")
+            src.transitions.append(Transition(dst, test, float(tr.get('dwell_sec', 0.0)), event))
+        if not any(t.event == BEGIN for p in phases for t in p.transitions):
+            raise ConfigError("state_machine.transitions: no transition enters a rep phase")
+        if not any(t.event == END for p in phases for t in p.transitions):
+            raise ConfigError("state_machine.transitions: no transition leaves a rep (reps would never count)")
+
+    timeout = timeout_test = None
+    zb = sm.get('zombie_breaker')
+    if zb:
+        timeout = _require(zb, 'timeout_sec', 'zombie_breaker')
+        reset = _require(zb, 'reset_condition', 'zombie_breaker')
+        # 与原实现一致：熔断条件恒按 '>' 比较 (忽略 operator)
+        timeout_test = compile_trigger(dict(reset, operator='>'), 'zombie_breaker.reset_condition', '>')
+    return PhaseMachine(phases, timeout, timeout_test)
+
+def _compile_tempo(plan, tempo_cfg, mp_map):
+    """节奏跟踪配置，例: "tempo": {"points": [23, 24]} (速度跟踪点；分相取状态机阶段，见 logic/tempo.py)"""
+    where = 'evaluation.tempo'
+    points = tempo_cfg.get('points', [])
+    plan.tempo_points = _point_getters(points, mp_map, where) if points else []
+    plan.tempo = TempoTracker(len(points))
+
+# =========================================================================
+# 容忍度档位
+# =========================================================================
+
+TIERS = ('strict', 'standard', 'loose')
+TIER_ALIASES = {'严格': 'strict', '标准': 'standard', '宽松': 'loose'}
+TIER_FIELDS = ('min', 'max', 'threshold', 'tolerance') # 条件判定中可分档的阈值字段
+
+def tier_index(tier):
+    """档位名 (英文 / 中文) 或下标 -> 下标"""
+    if isinstance(tier, int) and not isinstance(tier, bool) and 0 <= tier < len(TIERS): return tier
+    name = TIER_ALIASES.get(tier, tier)
+    if name not in TIERS: raise ValueError(f"Unknown tolerance tier: {tier!r} (expected one of {TIERS})")
+    return TIERS.index(name)
+
+def _tier_values(val, where):
+    """{"strict": a, "standard": b, "loose": c} -> [a, b, c] (未给出的档位取 standard)"""
+    vals = {TIER_ALIASES.get(k, k): x for k, x in val.items()}
+    unknown = set(vals) - set(TIERS)
+    if unknown: raise ConfigError(f"{where}: unknown tiers {sorted(unknown)}")
+    if 'standard' not in vals: raise ConfigError(f"{where}: tiered value needs a 'standard' entry")
+    out = [vals.get(t, vals['standard']) for t in TIERS]
+    if not all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in out):
+        raise ConfigError(f"{where}: tier values must be numbers, got {val!r}")
+    return out
+
+def tier_views(cond, where):
+    """
+    条件配置 -> 各档位的配置视图 (分档字段替换为该档数值)；没有分档字段时返回 None
+    例: "max": {"strict": 0.3, "standard": 0.5, "loose": 0.7} (键也可以是 严格 / 标准 / 宽松)
+    """
+    tiered = {k: _tier_values(cond[k], f"{where}.{k}") for k in TIER_FIELDS if isinstance(cond.get(k), dict)}
+    if not tiered: return None
+    return [dict(cond, **{k: vals[i] for k, vals in tiered.items()}) for i in range(len(TIERS))]
+
+def tier_view(cond, tier, where):
+    """条件配置在指定档位下的视图 (整段回放按档位编译判定列)"""
+    views = tier_views(cond, where)
+    return cond if views is None else views[tier_index(tier)]
+
+def _format_guidance(text, view, where):
+    """{阈值} / {阈值_min} / {阈值_max} (或 {threshold} / {threshold_min} / {threshold_max}) -> 该档生效的阈值"""
+    primary = next((view[k] for k in ('threshold', 'max', 'min', 'tolerance') if view.get(k) is not None), None)
+    fields = {'阈值': primary, '阈值_min': view.get('min'), '阈值_max': view.get('max')}
+    fields.update({'threshold': fields['阈值'], 'threshold_min': fields['阈值_min'], 'threshold_max': fields['阈值_max']})
+    try:
+        return text.format_map({k: f"{x:g}" for k, x in fields.items() if x is not None})
+    except (KeyError, ValueError, IndexError) as e:
+        raise ConfigError(f"{where}: cannot fill placeholder {e} in {text!r} (the threshold must be set in the config)")
+
+def compile_guidance(cond, where):
+    """
+    引导词 "guidance": {"bad": "...", "good": "..."} (字符串即只有 bad)
+    -> 各档位预先格式化好的 [(bad, good)]；未配置时为 None
+    """
+    g = cond.get('guidance')
+    if g is None: return None
+    if isinstance(g, str): g = {'bad': g}
+    if not isinstance(g, dict) or not set(g) <= {'bad', 'good'}:
+        raise ConfigError(f"{where}.guidance: expected a string or {{'bad': ..., 'good': ...}}")
+    views = tier_views(cond, where) or [cond] * len(TIERS)
+    return [tuple(_format_guidance(g[k], view, f"{where}.guidance.{k}") if g.get(k) else None for k in ('bad', 'good'))
+            for view in views]
+
+# =========================================================================
+# 条件
+# =========================================================================
+
+class Condition:
+    __slots__ = ('cid', 'check', 'checks', 'mode', 'in_range', 'priority', 'phases', 'guidance', 'landmarks')
+
+def _compile_check(cond, mp_map, var_points, where, plan=None):
+    """
+    条件判定 -> [f(raw, v, dyn) -> is_good]，每个容忍度档位一个 (见 TIERS)
+    [Mod] 取点 / 度量与档位无关，只编译一次；判定阈值在 bind(各档配置视图) 中绑定为闭包常量。
+    阈值不分档时各档共用同一个函数。
+    """
+    ctype = _require(cond, 'type', where)
+
+    if ctype == 'ratio_width':
+        n1, n2 = _point_getters(_require(cond, 'numerator_points', where), mp_map, where, 2)[:2]
+        d1, d2 = _point_getters(_require(cond, 'denominator_points', where), mp_map, where, 2)[:2]
+        def bind(c):
+            lo = c.get('min', 0.0)
+            def fn(raw, v, dyn):
+                a, b, c, d = n1(raw, v), n2(raw, v), d1(raw, v), d2(raw, v)
+                if a and b and c and d:
+                    return abs(a[0] - b[0]) / max(abs(c[0] - d[0]), 1.0) >= lo
+                return True
+            return fn
+
+    elif ctype == 'ratio_vertical_dynamic':
+        g1, g2 = _point_getters(_require(cond, 'points', where), mp_map, where, 2)[:2]
+        base_name = _require(cond, 'baseline_var', where)
+        def bind(c):
+            hi, lo = c.get('max', 999.0), c.get('min', -999.0)
+            def fn(raw, v, dyn):
+                p1, p2 = g1(raw, v), g2(raw, v)
+                if p1 and p2:
+                    val = abs(p1[1] - p2[1]) / max(dyn.get(base_name, 1.0), 1.0)
+                    return lo <= val <= hi
+                return True
+            return fn
+
+    elif ctype == 'angle_vertical':
+        groups = _require(cond, 'points', where)
+        if len(groups) > 0 and not isinstance(groups[0], list): groups = [groups] # 兼容单组配置
+        pairs = [tuple(_point_getters(g, mp_map, where, 2)[:2]) for g in groups]
+        side_mode = cond.get('side_mode', 'any')
+        if side_mode not in ('any', 'all'):
+            raise ConfigError(f"{where}: unknown side_mode '{side_mode}'")
+        n_groups = len(pairs)
+        def bind(c):
+            threshold = c.get('max', 20.0)
+            def fn(raw, v, dyn):
+                fail = 0
+                for g1, g2 in pairs:
+                    p1, p2 = g1(raw, v), g2(raw, v)
+                    if p1 and p2 and GeomUtils.angle_vertical(p1, p2) > threshold: fail += 1
+                if side_mode == 'any': return fail == 0
+                return fail != n_groups
+            return fn
+
+    elif ctype == 'deviation':
+        points = _require(cond, 'points', where)
+        if len(points) != 3: return [lambda raw, v, dyn: True] * len(TIERS)
+        gs, ge, gt = _point_getters(points, mp_map, where, 3)
+        normalize = cond.get('normalize', True)
+        def bind(c):
+            hi = c.get('max', 0.1)
+            def fn(raw, v, dyn):
+                ps, pe, pt = gs(raw, v), ge(raw, v), gt(raw, v)
+                if not (ps and pe and pt): return True
+                return GeomUtils.line_deviation(pt, ps, pe, normalize) <= hi
+            return fn
+
+    elif ctype == 'chain_sync':
+        m1 = compile_metric(_require(cond, 'metric_1', where), mp_map, var_points, where + '.metric_1', plan)
+        m2 = compile_metric(_require(cond, 'metric_2', where), mp_map, var_points, where + '.metric_2', plan)
+        scale, offset = cond.get('scale', 1.0), cond.get('offset', 0.0)
+        def bind(c):
+            tol = c.get('tolerance', 15.0)
+            def fn(raw, v, dyn):
+                return abs(m1(raw, v, dyn) - (m2(raw, v, dyn) * scale + offset)) <= tol
+            return fn
+
+    elif ctype == 'pose_similarity':
+        # 姿态相似：与模板库最近模板的相似度不低于 min 为合格 (关键点缺失的分量不参与比对)
+        if isinstance(cond.get('tolerance'), dict):
+            raise ConfigError(f"{where}: 'tolerance' is the similarity scale and cannot be tiered (tier 'min' instead)")
+        metric = compile_metric(dict(cond, metric='pose_similarity'), mp_map, var_points, where, plan)
+        def bind(c):
+            lo = c.get('min', AlgoConfig.POSE_MIN_SIMILARITY)
+            def fn(raw, v, dyn):
+                return metric(raw, v, dyn) >= lo
+            return fn
+
+    elif ctype == 'threshold':
+        # 阈值：度量 (可为滑窗度量，如躯干晃动率) 落在 min / max / threshold 限定的范围内为合格
+        metric = compile_metric(_require(cond, 'metric', where), mp_map, var_points, where + '.metric', plan)
+        def bind(c):
+            within = _bounds_test(c)
+            def fn(raw, v, dyn):
+                return within(metric(raw, v, dyn))
+            return fn
+
+    else:
+        raise ConfigError(f"{where}: unknown condition type '{ctype}'")
+    views = tier_views(cond, where)
+    if views is None: return [bind(cond)] * len(TIERS)
+    return [bind(c) for c in views]
+
+def _bounds_test(cfg):
+    """max / min / threshold + operator -> f(val) -> bool"""
+    hi, lo = cfg.get('max'), cfg.get('min')
+    th, op = cfg.get('threshold'), cfg.get('operator', '>')
+    def fn(val):
+        if hi is not None and val > hi: return False
+        if lo is not None and val < lo: return False
+        if th is not None:
+            if op == '>' and not (val > th): return False
+            if op == '<' and not (val < th): return False
+        return True
+    return fn
+
+def _compile_constraint(constraint, mp_map, var_points, where, plan=None):
+    """纠错区间约束 -> f(raw, v, dyn) -> in_fix_range"""
+    metric = compile_metric(constraint, mp_map, var_points, where, plan)
+    within = _bounds_test(constraint)
+    return lambda raw, v, dyn: within(metric(raw, v, dyn))
+
+def _compile_condition(cond, mp_map, var_points, plan=None):
+    cid = _require(cond, 'id', 'conditions[]')
+    where = f"conditions[{cid}]"
+    c = Condition()
+    c.cid = cid
+    c.checks = _compile_check(cond, mp_map, var_points, where, plan) # 各档位的判定函数
+    c.check = c.checks[TIERS.index('standard')] # 当前档位 (见 ExercisePlan.set_tier)
+    c.guidance = compile_guidance(cond, where)
+    c.mode = cond.get('correction_mode', 'realtime')
+    if c.mode not in CORRECTION_MODES:
+        raise ConfigError(f"{where}: unknown correction_mode '{c.mode}'")
+    constraint = cond.get('correction_constraint')
+    c.in_range = _compile_constraint(constraint, mp_map, var_points, where + '.correction_constraint', plan) if constraint else None
+    c.priority = cond.get('priority', 99)
+    c.phases = condition_phases(cond, where)
+    c.landmarks = frozenset() # 判定与约束读取的原始关键点名 (见 compile_config)
+    return c
+
+def condition_phases(cond, where):
+    """
+    [New] 检测时机 "phases": "all" (全程，默认) | 阶段名 | "zone" (纠错区间) | 上述名称的列表
+    -> None (全程) 或名称集合 (阶段名在状态机编译后校验，见 PhaseMachine.assign_conditions)
+    """
+    when = cond.get('phases', 'all')
+    if isinstance(when, str): when = [when]
+    if not isinstance(when, list) or not when:
+        raise ConfigError(f"{where}: 'phases' must be a phase name or a non-empty list")
+    return None if 'all' in when else frozenset(when)
+
+# =========================================================================
+# 渲染元素
+# =========================================================================
+
+def _compile_draw(draw_cfg, elem, mp_map, resolve_color):
+    """绘制配置 -> f(raw, v) -> 绘图指令 (点缺失时返回 None)"""
+    etype = draw_cfg.get('type', elem.get('type'))
+    color = resolve_color(draw_cfg.get('style_key', 'default'))
+
+    if etype == 'line':
+        g1 = _point_getter(draw_cfg.get('from'), mp_map)
+        g2 = _point_getter(draw_cfg.get('to'), mp_map)
+        style = 'dash' if draw_cfg.get('is_dashed') else 'solid'
+        thick = draw_cfg.get('width', 2)
+        def fn(raw, v):
+            p1, p2 = g1(raw, v), g2(raw, v)
+            if p1 and p2: return {'cmd': 'line', 'start': p1, 'end': p2, 'color': color, 'thick': thick, 'style': style}
+
+    elif etype == 'arrow':
+        g1 = _point_getter(draw_cfg.get('start') or draw_cfg.get('from'), mp_map)
+        common_opts = {k: draw_cfg[k] for k in ['gap', 'len', 'anim'] if k in draw_cfg}
+        has_to, has_dir = 'to' in draw_cfg, 'direction' in draw_cfg
+        g2 = _point_getter(draw_cfg['to'], mp_map) if has_to else None
+        d = draw_cfg.get('direction')
+        length = draw_cfg.get('len', 50)
+        def fn(raw, v):
+            p1 = g1(raw, v)
+            if p1 is None and has_to and has_dir:
+                # "终点 + 方向" 模式 (反推起点)
+                p2 = g2(raw, v)
+                if p2:
+                    start = (int(p2[0] - d[0] * length), int(p2[1] - d[1] * length))
+                    cmd = {'cmd': 'arrow', 'start': start, 'target': p2, 'color': color, 'mode': 'point', 'gap': 0}
+                    cmd.update(common_opts); return cmd
+            elif has_to:
+                p2 = g2(raw, v)
+                if p1 and p2:
+                    cmd = {'cmd': 'arrow', 'start': p1, 'target': p2, 'color': color, 'mode': 'point', 'gap': 25}
+                    cmd.update(common_opts); return cmd
+            elif has_dir:
+                if p1:
+                    cmd = {'cmd': 'arrow', 'start': p1, 'target': d, 'color': color, 'mode': 'vec'}
+                    cmd.update(common_opts); return cmd
+
+    elif etype == 'circle':
+        gc = _point_getter(draw_cfg.get('center'), mp_map)
+        radius = draw_cfg.get('radius', 10)
+        def fn(raw, v):
+            c = gc(raw, v)
+            if c: return {'cmd': 'circle', 'center': c, 'radius': radius, 'color': color, 'thick': -1}
+
+    elif etype == 'icon':
+        gc = _point_getter(draw_cfg.get('center'), mp_map)
+        is_check = draw_cfg.get('icon_name') == 'check'
+        def fn(raw, v):
+            c = gc(raw, v)
+            if c and is_check: return {'cmd': 'check', 'center': c, 'color': color, 'scale': 1.2}
+
+    else:
+        # 未知元素类型原实现即不绘制，这里保持宽松
+        return None
+    return fn
+
+class Element:
+    __slots__ = ('ref', 'on_good', 'on_bad', 'draw')
+
+def _compile_element(elem, mp_map, resolve_color):
+    e = Element()
+    e.ref = elem.get('condition_ref')
+    e.on_good = _compile_draw(elem['on_good'], elem, mp_map, resolve_color) if e.ref and elem.get('on_good') else None
+    e.on_bad = _compile_draw(elem['on_bad'], elem, mp_map, resolve_color) if e.ref and elem.get('on_bad') else None
+    e.draw = None if e.ref else _compile_draw(elem, elem, mp_map, resolve_color)
+    return e
+
+# =========================================================================
+# 执行计划
+# =========================================================================
+
+class ExercisePlan:
+    """编译后的动作执行计划 (只读；滑窗窗口与节奏 / 轨迹跟踪器的状态除外，每个 GenericExercise 实例各自编译一份)"""
+    def __init__(self):
+        self.virtual_points = []   # [f(raw, v)] 仅包含有读取方的虚拟点
+        self.windows = []          # [WindowedMetric] 依赖顺序 (内层先于外层)
+        self.tempo = None          # TempoTracker
+        self.tempo_points = []     # [f(raw, v)] 速度跟踪点
+        self.uses_tempo = False    # 是否有节奏度量 (没有时不逐帧送入 tempo)
+        self.trajectories = {}     # {配置键: TrackedPath} 轨迹度量的跟踪器
+        self.peak_poses = []       # [PeakPoseTracker] 顶峰姿态度量
+        self.landmarks = frozenset() # 条件与状态机读取的原始关键点名 (本帧补出的点与之无交集时不计为低可信度帧)
+        self.rep_trackers = []     # 随状态机 begin / end / cancel 的跟踪器 (用到的节奏 + 轨迹 + 顶峰姿态)
+        self.dynamic_var_names = []
+        self.dynamic_vars = []     # [DynamicVar]
+        self.machine = None        # PhaseMachine 阶段转移表 (谓词为 f(raw, v, dyn))
+        self.conditions = []       # [Condition] 配置顺序
+        self.rep_end_conditions = [] # [Condition] correction_mode 为 rep_end 的条件
+        self.by_priority = []      # [Condition] 优先级升序 (数值小优先)
+        self.check_ids = []
+        self.suppress_lower_priority = False
+        self.exclusive = False
+        self.elements = []         # [Element]
+        self.tier = TIERS.index('standard') # 当前容忍度档位下标
+        self.tiered = []           # [Condition] 阈值分档的条件
+        self.guidance = {}         # {条件 ID: [(bad, good)] 各档位引导词}
+
+    def set_tier(self, tier):
+        """[New] 切换容忍度档位：分档条件换用编译期绑定好的判定函数，逐帧求值路径不变"""
+        i = tier_index(tier)
+        for c in self.tiered: c.check = c.checks[i]
+        self.tier = i
+
+def compile_config(config, mp_map, resolve_color):
+    """
+    校验并编译动作配置
+    :param mp_map: MediaPipe ID -> 点名
+    :param resolve_color: style_key -> BGR 颜色
+    :raises ConfigError: 配置缺失必填字段或含未知类型
+    """
+    plan = ExercisePlan()
+    raw_vars = config.get('dynamic_vars', [])
+    plan.dynamic_vars = [DynamicVar(var, mp_map) for var in raw_vars]
+    plan.dynamic_var_names = [dv.name for dv in plan.dynamic_vars]
+    var_points = {dv.name: dv.points for dv in plan.dynamic_vars}
+
+    # 全部虚拟点都参与校验，只有可达的进入执行计划 (保持配置顺序)
+    vps = [(vp.get('id'), _compile_virtual_point(vp, mp_map)) for vp in config.get('virtual_points', [])]
+    live = _live_virtual_points(config, var_points)
+    plan.virtual_points = [fn for pid, fn in vps if pid in live]
+
+    eval_cfg = _require(config, 'evaluation', 'config')
+    sm = _require(eval_cfg, 'state_machine', 'evaluation')
+    plan.machine = compile_state_machine(
+        sm, lambda cfg, where, op: _compile_trigger(cfg, mp_map, var_points, where, op, plan))
+    _compile_tempo(plan, eval_cfg.get('tempo', {}), mp_map)
+    for dv in plan.dynamic_vars:
+        dv.active_phases = plan.machine.phases_for(dv.active_state)
+
+    conds = _require(eval_cfg, 'conditions', 'evaluation')
+    plan.conditions = [_compile_condition(c, mp_map, var_points, plan) for c in conds]
+    ids = [c.cid for c in plan.conditions]
+    if len(set(ids)) != len(ids):
+        raise ConfigError(f"conditions: duplicate ids in {ids}")
+    plan.check_ids = ids
+    vp_refs = {vp.get('id'): _point_refs(vp, var_points) for vp in config.get('virtual_points', [])}
+    for c, cfg in zip(plan.conditions, conds):
+        c.landmarks = _landmark_refs(cfg, vp_refs, var_points, mp_map)
+    plan.landmarks = frozenset().union(*(c.landmarks for c in plan.conditions),
+                                       *(_landmark_refs(r, vp_refs, var_points, mp_map) for r in _state_machine_roots(sm)))
+    plan.rep_end_conditions = [c for c in plan.conditions if c.mode == 'rep_end']
+    try:
+        plan.machine.assign_conditions([(c, c.phases, c.mode != 'realtime') for c in plan.conditions if c.mode != 'rep_end'])
+    except ValueError as e:
+        raise ConfigError(f"conditions: {e}")
+    plan.rep_trackers = ([plan.tempo] if plan.uses_tempo else []) + [p.tracker for p in plan.trajectories.values()] + plan.peak_poses
+    plan.by_priority = sorted(plan.conditions, key=lambda c: c.priority)
+    plan.tiered = [c for c in plan.conditions if len({id(f) for f in c.checks}) > 1]
+    plan.guidance = {c.cid: c.guidance for c in plan.conditions if c.guidance}
+    try:
+        plan.set_tier(AlgoConfig.TOLERANCE_TIER)
+    except ValueError as e:
+        raise ConfigError(f"AlgoConfig.TOLERANCE_TIER: {e}")
+
+    logic_ctrl = eval_cfg.get('logic_control', {})
+    plan.suppress_lower_priority = bool(logic_ctrl.get('suppress_lower_priority', False))
+    plan.exclusive = logic_ctrl.get('display_mode') == 'exclusive'
+
+    plan.elements = [_compile_element(e, mp_map, resolve_color) for e in config.get('elements', [])]
+    return plan
@@ -5,8 +5,8 @@ from logic.detectors.rounding import RoundingDetector
 from utils.geometry import GeomUtils
 
 class FrontRaiseExercise(BaseExercise):
-    def __init__(self, sound_mgr):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, clock=None):
+        super().__init__(sound_mgr, clock)
         
         # 保存实例
         self.shrug_detector = ShrugDetector(
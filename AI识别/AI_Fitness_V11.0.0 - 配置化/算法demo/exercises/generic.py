@@ -1,11 +1,13 @@
 import json
 import os
-import time
 import re
-import math
 from exercises.base import BaseExercise
-from core.config import ColorConfig
-from utils.geometry import GeomUtils
+from exercises.config_compiler import compile_config, ConfigError
+from core.config import ColorConfig, AlgoConfig
+from logic.tempo import torso_scale
+from logic.pose_similarity import frame_xy
+from logic.phase_machine import BEGIN, END, CANCEL
+from utils.pose_frame import CONFIG_POINT_NAMES
 
 class GenericExercise(BaseExercise):
     """
@@ -14,7 +16,7 @@ class GenericExercise(BaseExercise):
     职责：
     1. 读取并解析 JSON 动作配置文件。
     2. 执行通用的生物力学计算 (虚拟点、动态基准)。
-    3. 驱动通用状态机 (State Machine)。
+    3. 驱动通用状态机 (State Machine)。[Mod] 编译后的阶段转移表 (logic/phase_machine.py)。
     4. 渲染通用视觉元素 (Visual Elements)。
     
     【纠错判定模式汇总 (Correction Modes)】
@@ -33,28 +35,29 @@ class GenericExercise(BaseExercise):
     4. realtime (实时跟随):
        - 逻辑: 无记忆，所见即所得。
        - 场景: 辅助线、非关键性软提示。
+    5. rep_end (整轮结算): [New]
+       - 逻辑: 一轮结束时 (节奏已分相、轨迹已比对) 评估一次，结果直接计入本轮。
+       - 场景: 节奏速率类 (如离心时长过短、顶峰未停顿、多次节奏不稳定)、轨迹拟合类 (如推举轨迹偏离垂直线)。
     
     任何具体的动作 (如深蹲、推举) 只需要继承此类并指定 config_file 即可。
     """
 
-    # MediaPipe 关键点 ID 映射表
-    MP_MAP = {
-        0: 'nose', 11: 'ls', 12: 'rs', 13: 'le', 14: 're', 15: 'lw', 16: 'rw',
-        23: 'lh', 24: 'rh', 25: 'lk', 26: 'rk', 27: 'la', 28: 'ra', 29: 'lt', 30: 'rt',
-        31: 'lf', 32: 'rf'
-    }
+    # MediaPipe 关键点 ID 映射表 (与 utils/pose_frame.py 共用)
+    MP_MAP = CONFIG_POINT_NAMES
 
-    def __init__(self, sound_mgr, config_file):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, config_file, clock=None):
+        super().__init__(sound_mgr, clock)
         self.config_file = config_file
         self.config = self._load_config()
+        self.plan = self._compile() # [New] 编译后的执行计划
         
         # --- 引擎状态存储 ---
         self.dynamic_vars = {} 
         self._init_dynamic_vars()
         
         self.v_pts = {}          # 虚拟点缓存
-        self.down_start_time = 0.0 # 状态机计时
+        self.phase = None        # [New] 当前细分阶段 (准备 / 向心 / 顶峰 / 离心 / 复位，旧写法为 start / down)
+        if self.plan: self._stage, self.phase = self.plan.machine.stage, self.plan.machine.phase.name
         self.latch_states = {}   # [Fix] 状态锁定记忆 (替代简单的 fix_memory)
         self.last_rep_results = {} # 上一轮结果
         self.styles = self.config.get('styles', {})
@@ -79,9 +82,19 @@ class GenericExercise(BaseExercise):
             print(f"[GenericEngine] JSON parse error: {e}")
             return {}
 
+    def _compile(self):
+        """[New] 加载时校验并编译配置 (见 exercises/config_compiler.py)，失败时禁用该动作"""
+        if not self.config: return None
+        try:
+            return compile_config(self.config, self.MP_MAP, self._resolve_color)
+        except ConfigError as e:
+            print(f"[GenericEngine] Config error in {self.config_file}: {e}")
+            self.config = {}
+            return None
+
     def _init_dynamic_vars(self):
-        for var in self.config.get('dynamic_vars', []):
-            self.dynamic_vars[var['name']] = 0.0
+        for name in (self.plan.dynamic_var_names if self.plan else []):
+            self.dynamic_vars[name] = 0.0
 
     def _get_pt(self, pid, raw_pts):
         """获取点坐标 (支持 原始点ID 和 虚拟点ID)"""
@@ -93,343 +106,192 @@ class GenericExercise(BaseExercise):
         return None
 
     def _calc_virtual_points(self, raw_pts):
-        """计算虚拟关键点"""
-        for vp in self.config.get('virtual_points', []):
-            pid = vp['id']
-            calc_type = vp['calc']
-            
-            if calc_type == 'midpoint':
-                srcs = [self._get_pt(s, raw_pts) for s in vp['sources']]
-                if all(srcs):
-                    x = sum(p[0] for p in srcs) / len(srcs)
-                    y = sum(p[1] for p in srcs) / len(srcs)
-                    self.v_pts[pid] = (int(x), int(y))
-            
-            elif calc_type == 'projection_vertical':
-                src = self._get_pt(vp['source'], raw_pts)
-                if src:
-                    off_y = vp.get('offset_y', 0)
-                    self.v_pts[pid] = (src[0], src[1] + off_y)
-            
-            elif calc_type == 'offset':
-                src = self._get_pt(vp['source'], raw_pts)
-                if src:
-                    self.v_pts[pid] = (src[0] + vp.get('offset_x', 0), src[1] + vp.get('offset_y', 0))
-            
-            elif calc_type == 'compose':
-                # [New] 组合点：取 source_x 的 X 和 source_y 的 Y
-                px = self._get_pt(vp['source_x'], raw_pts)
-                py = self._get_pt(vp['source_y'], raw_pts)
-                if px and py:
-                    self.v_pts[pid] = (px[0], py[1])
-            
-            elif calc_type == 'extend_horizontal':
-                # [New] 水平延伸：起点 + (长度参考段长度 * 方向)
-                p_src = self._get_pt(vp['source'], raw_pts)
-                p_ref1 = self._get_pt(vp['ref_start'], raw_pts)
-                p_ref2 = self._get_pt(vp['ref_end'], raw_pts)
-                
-                if p_src and p_ref1 and p_ref2:
-                    length = math.hypot(p_ref1[0]-p_ref2[0], p_ref1[1]-p_ref2[1])
-                    direction = vp.get('direction', 1.0)
-                    self.v_pts[pid] = (int(p_src[0] + length * direction), p_src[1])
+        """计算虚拟关键点 (按配置顺序，后定义的点可引用先定义的点)"""
+        v = self.v_pts
+        for fn in self.plan.virtual_points:
+            fn(raw_pts, v)
 
     def _update_dynamic_vars(self, raw_pts):
         """更新动态基准值"""
-        for var in self.config.get('dynamic_vars', []):
-            name = var['name']
-            
-            curr_val = 0.0
-            if var['source_type'] == 'distance_y':
-                p1 = self._get_pt(var['points'][0], raw_pts)
-                p2 = self._get_pt(var['points'][1], raw_pts)
-                if p1 and p2: curr_val = abs(p1[1] - p2[1])
-            
+        v, dyn = self.v_pts, self.dynamic_vars
+        for var in self.plan.dynamic_vars:
+            p1, p2 = var.p1(raw_pts, v), var.p2(raw_pts, v)
+            curr_val = abs(p1[1] - p2[1]) if (p1 and p2) else 0.0
             if curr_val <= 0: continue
 
             # [Optimization] 统一使用"智能基准校准"策略 (Smart Calibration)
             # 逻辑：Max Hold + Damping + Decay
+            name = var.name
             
             # 1. 全局微衰减 (防止基准值卡死在虚高位置)
-            decay = var.get('decay', 0.9995)
-            self.dynamic_vars[name] *= decay
+            dyn[name] *= var.decay
             
-            # 2. 状态门控更新 (仅在特定状态下，如 START，尝试推高基准值)
-            active_state = var.get('active_state', 'START').lower()
-            if self.stage == active_state:
-                if curr_val > self.dynamic_vars[name]:
-                    damping = var.get('damping', 0.05) # 默认 0.05 的阻尼
-                    self.dynamic_vars[name] = self.dynamic_vars[name] * (1.0 - damping) + curr_val * damping
+            # 2. 状态门控更新 (仅在允许采集的阶段，如 准备 / START，尝试推高基准值)
+            if self.phase in var.active_phases and curr_val > dyn[name]:
+                dyn[name] = dyn[name] * (1.0 - var.damping) + curr_val * var.damping
             
             # 3. 强制初始化 (首帧保护)
-            if self.dynamic_vars[name] < 1.0 and curr_val > 10.0: 
-                self.dynamic_vars[name] = curr_val
-
-    def _get_metric_value(self, metric_cfg, raw_pts):
-        """获取用于状态机或条件的度量值 (完全动态化)"""
-        name = metric_cfg if isinstance(metric_cfg, str) else metric_cfg.get('metric')
-        if name == 'compression_ratio':
-            # [Fix] 支持自定义基准变量名，不再硬编码 'standing_baseline'
-            base_var_name = 'standing_baseline'
-            if isinstance(metric_cfg, dict):
-                base_var_name = metric_cfg.get('baseline', base_var_name)
-            
-            base_val = self.dynamic_vars.get(base_var_name, 1.0)
-            
-            # 动态查找定义该基准值的点对
-            points = None
-            # 1. 优先使用 metric_cfg 中显式指定的 points
-            if isinstance(metric_cfg, dict) and 'points' in metric_cfg:
-                points = metric_cfg['points']
-            else:
-                # 2. 否则从 dynamic_vars 配置中反查
-                for var in self.config.get('dynamic_vars', []):
-                    if var['name'] == base_var_name and 'points' in var:
-                        points = var['points']
-                        break
-            
-            if not points: points = [101, 102] # 默认回退
-            
-            p1 = self._get_pt(points[0], raw_pts)
-            p2 = self._get_pt(points[1], raw_pts)
-            
-            curr_dist = 0.0
-            if p1 and p2: curr_dist = abs(p1[1] - p2[1])
-            
-            return curr_dist / max(base_val, 1.0)
-            
-        elif name == 'vertical_diff':
-            # 计算垂直差值 (p1.y - p2.y)
-            points = metric_cfg.get('points', [])
-            if len(points) >= 2:
-                p1 = self._get_pt(points[0], raw_pts)
-                p2 = self._get_pt(points[1], raw_pts)
-                if p1 and p2: return p1[1] - p2[1] # Y轴向下为正: p1在下则为正
-        
-        elif name == 'angle':
-            # [New] 支持角度计算 (用于动力链)
-            pts = [self._get_pt(p, raw_pts) for p in metric_cfg.get('points', [])]
-            if len(pts) == 3 and all(pts):
-                return GeomUtils.angle(pts[0], pts[1], pts[2])
-                
-        return 0.0
+            if dyn[name] < 1.0 and curr_val > 10.0: 
+                dyn[name] = curr_val
+
+    def _update_windows(self, raw_pts):
+        """[New] 滑窗度量入窗 (每个处理帧一次，窗口内容与当前阶段求值哪些度量无关)"""
+        v, dyn, t = self.v_pts, self.dynamic_vars, self.clock.now()
+        for w in self.plan.windows:
+            w.update(raw_pts, v, dyn, t)
+
+    def _update_trackers(self, raw_pts):
+        """[New] 节奏 / 轨迹跟踪入帧 (跟踪点，见 logic/tempo.py、trajectory.py)"""
+        plan, v, t = self.plan, self.v_pts, self.clock.now()
+        if not (plan.uses_tempo or plan.trajectories): return # [Fix] 没有节奏 / 轨迹度量时结果无读取方 (同整段回放)
+        scale = torso_scale(raw_pts.get('ls'), raw_pts.get('rs'), raw_pts.get('lh'), raw_pts.get('rh'))
+        if plan.uses_tempo:
+            plan.tempo.push(t, [g(raw_pts, v) for g in plan.tempo_points], scale)
+        for path in plan.trajectories.values():
+            path.update(raw_pts, v, t, scale)
+
+    def _update_peak_poses(self, raw_pts):
+        """[Fix] 顶峰姿态在状态机步进之后入帧：只比对处于顶峰阶段的帧 (见 logic/pose_similarity.py)"""
+        for peak in self.plan.peak_poses:
+            peak.push(self.phase, lambda: frame_xy(raw_pts))
+
+    @property
+    def stage(self):
+        return self._stage
+
+    @stage.setter
+    def stage(self, value):
+        """
+        [Fix] 外部重置 (切换动作时直接把 stage 设为 "start") 时状态机回到初始阶段，进入时间记在下一次步进。
+        一轮之外的阶段对外也是 "start"，不能再靠比较 stage 发现重置；内部同步直接写 _stage。
+        """
+        self._stage = value
+        plan = getattr(self, 'plan', None) # BaseExercise.__init__ 赋初值时尚未编译
+        if plan:
+            plan.machine.reset()
+            self._stage, self.phase = plan.machine.stage, plan.machine.phase.name
 
     def _update_state_machine(self, raw_pts):
-        """状态机流转"""
-        sm_config = self.config['evaluation']['state_machine']
-        current_time = time.time()
-        # 注意：这里不再预计算 ratio，而是根据配置动态计算
-        
-        if self.stage != "down":
-            cfg = sm_config['trigger_down']
-            val = self._get_metric_value(cfg, raw_pts)
-            
-            # 支持 < 和 > 操作符
-            triggered = (val < cfg['threshold']) if cfg.get('operator') == '<' else (val > cfg['threshold'])
-            
-            if triggered:
-                self.stage = "down"
-                self.down_start_time = current_time
-                self.latch_states = {} # [Fix] 重置锁定状态
-                self.cycle_flags = {}
-        
-        elif self.stage == "down":
-            cfg = sm_config['trigger_up']
-            val = self._get_metric_value(cfg, raw_pts)
-            
-            triggered = (val > cfg['threshold']) if cfg.get('operator') == '>' else (val < cfg['threshold'])
-            
-            if triggered:
-                self.stage = "start"
-                self.counter += 1
-                
-                eval_cfg = self.config['evaluation']
-                check_ids = [c['id'] for c in eval_cfg['conditions']]
-                
-                for cid in check_ids:
-                    res = self.cycle_flags.get(cid, False)
-                    self.last_rep_results[cid] = res
-                
-                self._end_cycle(check_ids)
-            
-            zb = sm_config.get('zombie_breaker')
-            if zb:
-                if (current_time - self.down_start_time > zb['timeout_sec']):
-                    reset_cond = zb['reset_condition']
-                    val = self._get_metric_value(reset_cond, raw_pts)
-                    if val > reset_cond['threshold']: # 假设熔断通常是 >
-                        self.stage = "start"
+        """[Mod] 状态机流转：转移表逐帧步进 (驻留计时、超时熔断、纠错区间见 PhaseMachine.step)，这里只处理一轮的开始 / 结束 / 熔断"""
+        plan = self.plan
+        current_time = self.clock.now()
+        m = plan.machine
+        prev = m.phase
+        event = m.step(current_time, raw_pts, self.v_pts, self.dynamic_vars)
+        self._stage, self.phase = m.stage, m.phase.name # [Fix] 一轮内的阶段切换不产生事件，也要逐帧同步
+        if event is None:
+            if m.phase is not prev and plan.uses_tempo: plan.tempo.enter(self.phase, current_time) # [Fix] 节奏按状态机阶段分相
+            return
+
+        if event == BEGIN:
+            for tr in plan.rep_trackers: tr.begin(current_time)
+            if plan.uses_tempo: plan.tempo.enter(self.phase, current_time)
+            self.latch_states = {} # [Fix] 重置锁定状态
+            self.cycle_flags = {}
+            self.cycle_frames = self.cycle_predicted = 0
+
+        elif event == END:
+            self.counter += 1
+            for tr in plan.rep_trackers: tr.end(current_time)
+            self._evaluate_rep_end(raw_pts)
+
+            for cid in plan.check_ids:
+                self.last_rep_results[cid] = self.cycle_flags.get(cid, False)
+
+            locked = self.feedback.locked_key
+            self._end_cycle(plan.check_ids)
+            if plan.guidance: self._show_guidance(locked)
+
+        elif event == CANCEL:
+            for tr in plan.rep_trackers: tr.cancel(current_time)
+
+    def _show_guidance(self, prev_locked):
+        """[New] 纠错锁定 / 解除时显示条件配置的引导词 (按当前容忍度档位预先格式化好的文案)"""
+        guidance, tier = self.plan.guidance, self.plan.tier
+        key = self.feedback.locked_key
+        if key in guidance and guidance[key][tier][0]:
+            self._set_msg(guidance[key][tier][0], ColorConfig.NEON_RED, priority=2)
+        elif prev_locked != key and prev_locked in guidance and guidance[prev_locked][tier][1]:
+            self._set_msg(guidance[prev_locked][tier][1], ColorConfig.NEON_GREEN, dur=AlgoConfig.GUIDANCE_GOOD_SEC, priority=2)
+
+    def set_tier(self, tier):
+        """[New] 切换容忍度档位 ('strict' / 'standard' / 'loose' 或 严格 / 标准 / 宽松)，训练中随时生效，不重新加载配置"""
+        if self.plan: self.plan.set_tier(tier)
+
+    def _evaluate_rep_end(self, raw_pts):
+        """[New] rep_end 条件：一轮结束 (节奏已分相、轨迹已比对)、结算之前评估一次，结果写入 cycle_flags"""
+        v, dyn = self.v_pts, self.dynamic_vars
+        for c in self.plan.rep_end_conditions:
+            if c.in_range and not c.in_range(raw_pts, v, dyn): continue
+            self.cycle_flags[c.cid] = c.check(raw_pts, v, dyn)
 
     def _evaluate_conditions(self, raw_pts):
-        """条件评估"""
+        """
+        条件评估
+        【纠错判定模式】
+        1. 全程纠错 (Full Process): latch_fail (无约束)
+        2. 区间纠错 (Interval): latch_pass, strict_pass, latch_fail (带 correction_constraint)
+
+        [New] 按阶段惰性求值 (度量经帧级上下文按需计算，不被拉取的度量本帧不计算)：
+        - 非 down 阶段不评估任何条件：渲染读取上一轮结果，latch 状态在进入 down 时清空，
+          本帧的条件结果没有读取方 (多数用户大部分帧处于 start，这部分计算全部省去)
+        - [New] 一轮之内按阶段 (及纠错区间) 取预先算好的条件集：检测时机 ("phases") 不含当前阶段的条件不求值，
+          latch 类只读出锁定状态 (同纠错区间约束不成立)
+        - latch 类条件先求纠错区间约束，约束不成立、预测帧 / 读取的点被补出、或 latch 已锁定到终态
+          (latch_fail 已判坏 / latch_pass 已达标) 时不再求判定本身
+        """
+        if self.stage != "down": return {}
+        plan = self.plan
+        v, dyn = self.v_pts, self.dynamic_vars
+        latch = self.latch_states
         results = {}
-        eval_cfg = self.config['evaluation']
-        
-        # [Fix] 获取逻辑控制配置
-        logic_ctrl = eval_cfg.get('logic_control', {})
+        # [New] 预测帧 (运动外推的关键点) 不参与 latch 锁定，各模式只依据实测帧改变状态；
+        # [Fix] 补点 (遮挡外推，见 utils/gap_filler.py) 只冻结读取了补出点的条件
+        predicted = raw_pts.get('predicted', False)
+        filled = raw_pts.get('filled')
         
-        for cond in eval_cfg['conditions']:
-            cid = cond['id']
-            ctype = cond['type']
-            is_good = True
+        for c, active in plan.machine.conditions(): # rep_end 条件不在其中 (一轮结束时评估，见 _evaluate_rep_end)
+            cid = c.cid
+            mode = c.mode
             
-            if ctype == 'ratio_width':
-                n_pts = [self._get_pt(p, raw_pts) for p in cond['numerator_points']]
-                d_pts = [self._get_pt(p, raw_pts) for p in cond['denominator_points']]
-                if all(n_pts) and all(d_pts):
-                    num = abs(n_pts[0][0] - n_pts[1][0])
-                    den = abs(d_pts[0][0] - d_pts[1][0])
-                    val = num / max(den, 1.0)
-                    if val < cond.get('min', 0.0): is_good = False
-            
-            elif ctype == 'ratio_vertical_dynamic':
-                pts = [self._get_pt(p, raw_pts) for p in cond['points']]
-                if all(pts):
-                    dist = abs(pts[0][1] - pts[1][1])
-                    base = self.dynamic_vars.get(cond['baseline_var'], 1.0)
-                    val = dist / max(base, 1.0)
-                    if val > cond.get('max', 999.0): is_good = False
-                    # [New] 支持 min 阈值 (用于耸肩检测: 压缩率不能太小 -> 距离不能太短)
-                    if val < cond.get('min', -999.0): is_good = False
-
-            elif ctype == 'angle_vertical':
-                # 垂直角度检测 (支持单双侧定义)
-                # points: [[p1, p2], [p3, p4]]
-                pts_groups = cond['points']
-                if len(pts_groups) > 0 and not isinstance(pts_groups[0], list):
-                    pts_groups = [pts_groups] # 兼容单组配置
-                
-                threshold = cond.get('max', 20.0)
-                side_mode = cond.get('side_mode', 'any') # [New] 单双侧定义: any | all
-                
-                fail_count = 0
-                for pair in pts_groups:
-                    p1 = self._get_pt(pair[0], raw_pts)
-                    p2 = self._get_pt(pair[1], raw_pts)
-                    if p1 and p2:
-                        dx = abs(p1[0] - p2[0])
-                        dy = abs(p1[1] - p2[1])
-                        angle = 90.0 if dy == 0 else math.degrees(math.atan(dx/dy))
-                        if angle > threshold: fail_count += 1
-                
-                # [New] 单双侧判定逻辑
-                if side_mode == 'any' and fail_count > 0: is_good = False
-                elif side_mode == 'all' and fail_count == len(pts_groups): is_good = False
-            
-            elif ctype == 'deviation':
-                # [New] 共线/偏移检测 (Collinearity)
-                # points: [start, end, target] -> 计算 target 到 start-end 直线的距离
-                # 场景: 弓背检测 (肩-髋连线，背部点偏移)
-                if len(cond['points']) == 3:
-                    p_start = self._get_pt(cond['points'][0], raw_pts)
-                    p_end = self._get_pt(cond['points'][1], raw_pts)
-                    p_target = self._get_pt(cond['points'][2], raw_pts)
-                    
-                    if p_start and p_end and p_target:
-                        # 点到直线距离公式
-                        x0, y0 = p_target
-                        x1, y1 = p_start
-                        x2, y2 = p_end
-                        
-                        num = abs((x2-x1)*(y1-y0) - (x1-x0)*(y2-y1))
-                        den = math.hypot(x2-x1, y2-y1)
-                        dist = num / max(den, 1.0)
-                        
-                        # 归一化偏移量 (相对于直线长度的百分比)
-                        if cond.get('normalize', True):
-                            dist /= max(den, 1.0)
-                        
-                        if dist > cond.get('max', 0.1): is_good = False
-            
-            elif ctype == 'chain_sync':
-                # [New] 动力链同步检测 (Kinetic Chain Sync)
-                # 逻辑: 比较两个指标的线性关系 |m1 - (m2 * scale + offset)| <= tolerance
-                # 场景: 硬拉伸膝与伸髋同步
-                m1 = self._get_metric_value(cond['metric_1'], raw_pts)
-                m2 = self._get_metric_value(cond['metric_2'], raw_pts)
-                
-                scale = cond.get('scale', 1.0)
-                offset = cond.get('offset', 0.0)
-                tolerance = cond.get('tolerance', 15.0)
-                
-                diff = abs(m1 - (m2 * scale + offset))
-                if diff > tolerance: is_good = False
-            
-            # --- 3. 核心纠错模式处理 (Correction Modes) ---
-            # [逻辑闭环] 将 4 种代码模式归纳为 2 大类：
-            # 1. 全程纠错 (Full Process): latch_fail (无约束)
-            # 2. 区间纠错 (Interval): latch_pass, strict_pass, latch_fail (带约束)
-            
-            mode = cond.get('correction_mode', 'realtime')
-            
-            # [通用约束计算] 计算当前帧是否处于"有效纠错区间"
-            # 默认为 True (全程有效)，除非配置了 correction_constraint
-            in_fix_range = True
-            constraint = cond.get('correction_constraint')
-            if constraint:
-                metric_val = self._get_metric_value(constraint, raw_pts)
-                if 'max' in constraint and metric_val > constraint['max']: in_fix_range = False
-                if 'min' in constraint and metric_val < constraint['min']: in_fix_range = False
-                if 'threshold' in constraint:
-                    th = constraint['threshold']
-                    op = constraint.get('operator', '>')
-                    if op == '>' and not (metric_val > th): in_fix_range = False
-                    elif op == '<' and not (metric_val < th): in_fix_range = False
+            if mode == 'realtime':
+                results[cid] = c.check(raw_pts, v, dyn)
+                continue
             
             # 初始化 Latch 状态
-            if cid not in self.latch_states:
-                if mode == 'latch_fail': self.latch_states[cid] = True  # 默认好，坏一次就死
-                elif mode == 'latch_pass': self.latch_states[cid] = False # 默认坏，好一次就行
-                elif mode == 'strict_pass': self.latch_states[cid] = False # 默认坏，需在修正区修好
-            
-            if mode == 'realtime':
-                results[cid] = is_good
-                
-            elif mode == 'latch_fail': # 推举: 耸肩/小臂 (一票否决)
-                # [增强] 支持区间禁忌：只有在区间内(in_fix_range)犯错，才会被锁定为失败
-                if in_fix_range and not is_good: 
-                    self.latch_states[cid] = False
-                results[cid] = self.latch_states[cid]
-                
+            if cid not in latch:
+                latch[cid] = (mode == 'latch_fail') # latch_fail 默认好，坏一次就死；其余默认坏
+            
+            # 本帧不可能改变 latch 状态 (含当前阶段不检测) 时跳过约束与判定
+            if (not active or predicted or (filled and not filled.isdisjoint(c.landmarks))
+                    or (mode == 'latch_fail' and not latch[cid]) or (mode == 'latch_pass' and latch[cid])):
+                results[cid] = latch[cid]
+                continue
+            
+            # [通用约束计算] 当前帧是否处于"有效纠错区间" (未配置约束则全程有效)
+            if c.in_range and not c.in_range(raw_pts, v, dyn):
+                results[cid] = latch[cid]
+                continue
+            
+            is_good = c.check(raw_pts, v, dyn)
+            if mode == 'latch_fail': # 推举: 耸肩/小臂 (一票否决)
+                # 只有在区间内犯错，才会被锁定为失败
+                if not is_good: latch[cid] = False
             elif mode == 'latch_pass': # 深蹲: 深度 (一次达标即可)
-                # [增强] 支持区间达标：只有在区间内(in_fix_range)达标，才会被锁定为成功
-                if in_fix_range and is_good: 
-                    self.latch_states[cid] = True
-                results[cid] = self.latch_states[cid]
-                
-            elif mode == 'strict_pass': # 过程修正 (Process Fix)
-                # 逻辑：区间内已修正 AND 修正后保持至离开区间
-                if in_fix_range:
-                    # 在区间内：实时跟随，但记录状态
-                    # 如果当前帧是好的，标记为True；如果坏了，标记为False (破功重置)
-                    if is_good: self.latch_states[cid] = True
-                    else: self.latch_states[cid] = False 
-                    results[cid] = self.latch_states[cid]
-                else:
-                    # 在区间外：保持离开区间那一刻的状态 (锁定结果)
-                    results[cid] = self.latch_states[cid]
-
-        # --- 4. 优先级压制 (Priority Suppression) ---
+                # 只有在区间内达标，才会被锁定为成功
+                if is_good: latch[cid] = True
+            else: # strict_pass 过程修正：区间内实时跟随，离开区间后保持离开那一刻的状态
+                latch[cid] = is_good
+            results[cid] = latch[cid]
+
+        # --- 优先级压制 (Priority Suppression) ---
         # 复刻深蹲逻辑：如果膝内扣(P1)报错，强制认为深度(P2)是好的，避免双重报错
-        if logic_ctrl.get('suppress_lower_priority', False):
-            # 找出所有失败的条件
-            failed_conds = [c for c in eval_cfg['conditions'] if not results.get(c['id'], True)]
-            if failed_conds:
-                # 按优先级排序 (数值小优先级高)
-                failed_conds.sort(key=lambda x: x.get('priority', 99))
-                top_fail = failed_conds[0]
-                
-                # 将所有比 top_fail 优先级低的失败条件强制置为 True
-                for c in failed_conds[1:]:
-                    # [Fix] 必须同时更新 results 和 cycle_flags，确保计数和渲染都认为它是好的
-                    cid_suppressed = c['id']
-                    results[cid_suppressed] = True
-                    if self.stage == "down":
-                        self.cycle_flags[cid_suppressed] = True
-            
-            if self.stage == "down":
-                self.cycle_flags[cid] = results[cid]
-        
+        if plan.suppress_lower_priority:
+            failed = [c.cid for c in plan.by_priority if not results.get(c.cid, True)]
+            for cid in failed[1:]:
+                results[cid] = True
+
+        self.cycle_flags.update(results)
         return results
 
     def _resolve_color(self, key):
@@ -439,124 +301,54 @@ class GenericExercise(BaseExercise):
 
     def _render_elements(self, raw_pts, results):
         """渲染引擎"""
+        plan = self.plan
+        v = self.v_pts
         vis = []
-        elements = self.config.get('elements', [])
-        logic_ctrl = self.config['evaluation'].get('logic_control', {})
-        exclusive = logic_ctrl.get('display_mode') == 'exclusive'
         active_fb = self.active_feedback
+        res_map = results if self.stage == "down" else self.last_rep_results
 
         # [Fix] 渲染仲裁核心逻辑 (Rendering Arbitration)
         # 目标：严格复刻 squat.py 的 if-elif 逻辑
         # 规则：
-        # 1. 仅考虑在 active_feedback 中的条件 (除非 active_feedback 为空且我们需要默认显示)
+        # 1. 仅考虑在 active_feedback 中的条件
         # 2. 优先显示“报错”的条件 (Bad > Good)
         # 3. 同等状态下，优先显示“高优先级”的条件 (Priority High > Low)
-        
         display_cid = None
-        if exclusive:
-            # 1. 获取所有相关条件并按优先级排序
-            sorted_conds = sorted(self.config['evaluation']['conditions'], key=lambda x: x.get('priority', 99))
-            
-            # 2. 寻找最高优先级的“报错”条件
-            current_results = results if self.stage == "down" else self.last_rep_results
-            
-            for c in sorted_conds:
-                cid = c['id']
-                if cid in active_fb and not current_results.get(cid, True):
-                    display_cid = cid
-                    break
-            
-            # 3. 如果没有报错，寻找最高优先级的“通过”条件
-            if display_cid is None:
-                for c in sorted_conds:
-                    cid = c['id']
-                    if cid in active_fb:
-                        display_cid = cid
-                        break
-
-        for elem in elements:
-            ref = elem.get('condition_ref')
-            draw_cfg = None
-            
+        if plan.exclusive:
+            active = [c.cid for c in plan.by_priority if c.cid in active_fb]
+            display_cid = next((cid for cid in active if not res_map.get(cid, True)), None)
+            if display_cid is None and active: display_cid = active[0]
+
+        for elem in plan.elements:
+            ref = elem.ref
             if ref:
                 # 互斥过滤：如果确定了 display_cid，且当前元素不属于它，则跳过
-                if exclusive and display_cid and ref != display_cid: continue
-                
-                # [Fix] 核心修复：仅渲染在 active_feedback 中的条件
-                # 防止在动作正确(未激活错误)时，显示了纠错特效(如绿勾或红箭头)
+                if display_cid and ref != display_cid: continue
+                # 仅渲染在 active_feedback 中的条件
                 if ref not in active_fb: continue
-                
-                # 状态获取
-                res_map = results if self.stage == "down" else self.last_rep_results
-                is_good = res_map.get(ref, True)
-                
-                if is_good and 'on_good' in elem: draw_cfg = elem['on_good']
-                elif not is_good and 'on_bad' in elem: draw_cfg = elem['on_bad']
+                draw = elem.on_good if res_map.get(ref, True) else elem.on_bad
             else:
-                draw_cfg = elem
-            
-            if not draw_cfg: continue
-            
-            etype = draw_cfg.get('type', elem.get('type'))
-            color = self._resolve_color(draw_cfg.get('style_key', 'default'))
-            
-            if etype == 'line':
-                p1 = self._get_pt(draw_cfg.get('from'), raw_pts)
-                p2 = self._get_pt(draw_cfg.get('to'), raw_pts)
-                if p1 and p2:
-                    style = 'dash' if draw_cfg.get('is_dashed') else 'solid'
-                    vis.append({'cmd': 'line', 'start': p1, 'end': p2, 'color': color, 'thick': draw_cfg.get('width', 2), 'style': style})
-            
-            elif etype == 'arrow':
-                p1 = self._get_pt(draw_cfg.get('start') or draw_cfg.get('from'), raw_pts)
-                # [Fix] 透传通用可选参数 (gap, len, anim)
-                common_opts = {k: draw_cfg[k] for k in ['gap', 'len', 'anim'] if k in draw_cfg}
-                
-                # [New] 支持 "终点 + 方向" 模式 (反推起点)
-                # 场景：侧平举引导箭头，锚定在目标点，垂直向上指
-                if p1 is None and 'to' in draw_cfg and 'direction' in draw_cfg:
-                    p2 = self._get_pt(draw_cfg['to'], raw_pts)
-                    if p2:
-                        d = draw_cfg['direction'] # [dx, dy]
-                        length = draw_cfg.get('len', 50)
-                        # start = end - direction * length
-                        p1 = (int(p2[0] - d[0] * length), int(p2[1] - d[1] * length))
-                        
-                        cmd = {'cmd': 'arrow', 'start': p1, 'target': p2, 'color': color, 'mode': 'point', 'gap': 0}
-                        cmd.update(common_opts)
-                        vis.append(cmd)
-
-                elif 'to' in draw_cfg:
-                    p2 = self._get_pt(draw_cfg['to'], raw_pts)
-                    if p1 and p2:
-                        cmd = {'cmd': 'arrow', 'start': p1, 'target': p2, 'color': color, 'mode': 'point', 'gap': 25}
-                        cmd.update(common_opts)
-                        vis.append(cmd)
-                elif 'direction' in draw_cfg:
-                    if p1:
-                        d = draw_cfg['direction'] # [Fix] 使用配置的方向，而非硬编码 (1,0)
-                        cmd = {'cmd': 'arrow', 'start': p1, 'target': d, 'color': color, 'mode': 'vec'}
-                        cmd.update(common_opts)
-                        vis.append(cmd)
-
-            elif etype == 'circle':
-                c = self._get_pt(draw_cfg.get('center'), raw_pts)
-                if c:
-                    vis.append({'cmd': 'circle', 'center': c, 'radius': draw_cfg.get('radius', 10), 'color': color, 'thick': -1})
+                draw = elem.draw
             
-            elif etype == 'icon':
-                c = self._get_pt(draw_cfg.get('center'), raw_pts)
-                if c and draw_cfg.get('icon_name') == 'check':
-                    vis.append({'cmd': 'check', 'center': c, 'color': color, 'scale': 1.2})
+            if draw is None: continue
+            cmd = draw(raw_pts, v)
+            if cmd: vis.append(cmd)
 
         return vis
 
     def process(self, pts, shared):
         vis = []
-        if not self.config: return vis
+        if not self.plan: return vis
         self._calc_virtual_points(pts)
         self._update_dynamic_vars(pts)
+        self._update_windows(pts)
+        self._update_trackers(pts)
         self._update_state_machine(pts)
+        if self.plan.peak_poses: self._update_peak_poses(pts)
+        if self.stage == "down":
+            self.cycle_frames += 1
+            # 预测帧 / 补出了本动作读取的关键点的帧
+            if pts.get('predicted', False) or not self.plan.landmarks.isdisjoint(pts.get('filled', ())): self.cycle_predicted += 1
         results = self._evaluate_conditions(pts)
         vis.extend(self._render_elements(pts, results))
         return vis
\ No newline at end of file
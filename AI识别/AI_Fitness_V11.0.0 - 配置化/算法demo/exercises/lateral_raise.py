@@ -6,8 +6,8 @@ project_root = os.path.dirname(current_dir)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+import collections
 import math
-import time
 from exercises.base import BaseExercise
 from core.config import TextConfig, ColorConfig, AlgoConfig
 from logic.detectors.shrug import ShrugDetector
@@ -24,8 +24,8 @@ class LateralRaiseExercise(BaseExercise):
     2. 耸肩检测 (Shrug):
        - 复用通用的耸肩检测器，防止斜方肌过度代偿。
     """
-    def __init__(self, sound_mgr):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, clock=None):
+        super().__init__(sound_mgr, clock)
         
         # 初始化耸肩检测器
         self.shrug_detector = ShrugDetector(
@@ -44,7 +44,7 @@ class LateralRaiseExercise(BaseExercise):
         self.last_rep_range_ok = True
         
         # [轨迹记录] 存储肘部历史坐标 (timestamp, left_elbow, right_elbow)
-        self.elbow_history = []
+        self.elbow_history = collections.deque()
         self._smooth_le = None
         self._smooth_re = None
         
@@ -59,7 +59,7 @@ class LateralRaiseExercise(BaseExercise):
 
         # --- 0. 轨迹逻辑 (Elbow Trajectory) --- 增加平滑处理与全局开关
         if AlgoConfig.ENABLE_TRAJECTORY:
-            now = time.time()
+            now = self.clock.now()
             le, re = pts['le'], pts['re']
             
             # EMA 平滑处理 (alpha=0.2 保证轨迹丝滑)
@@ -70,15 +70,19 @@ class LateralRaiseExercise(BaseExercise):
                 self._smooth_le = (int(self._smooth_le[0]*(1-alpha_s) + le[0]*alpha_s), int(self._smooth_le[1]*(1-alpha_s) + le[1]*alpha_s))
                 self._smooth_re = (int(self._smooth_re[0]*(1-alpha_s) + re[0]*alpha_s), int(self._smooth_re[1]*(1-alpha_s) + re[1]*alpha_s))
             
-            self.elbow_history.append((now, self._smooth_le, self._smooth_re))
-            self.elbow_history = [h for h in self.elbow_history if now - h[0] <= 1.0]
+            # [Mod] 按时间顺序入队，过期样本只会出现在队首 (出队 O(1)，不再每帧重建列表)
+            hist = self.elbow_history
+            hist.append((now, self._smooth_le, self._smooth_re))
+            while now - hist[0][0] > 1.0: hist.popleft()
             
-            if len(self.elbow_history) > 2:
-                for i in range(1, len(self.elbow_history)):
-                    age = now - self.elbow_history[i][0]
-                    alpha_v = max(0.1, 1.0 - age)
-                    for side_idx in [1, 2]:
-                        vis.append({'cmd': 'line', 'start': self.elbow_history[i-1][side_idx], 'end': self.elbow_history[i][side_idx], 'color': ColorConfig.PINK, 'thick': 3, 'alpha': alpha_v})
+            if len(hist) > 2:
+                prev = None
+                for h in hist:
+                    if prev is not None:
+                        alpha_v = max(0.1, 1.0 - (now - h[0]))
+                        for side_idx in [1, 2]:
+                            vis.append({'cmd': 'line', 'start': prev[side_idx], 'end': h[side_idx], 'color': ColorConfig.PINK, 'thick': 3, 'alpha': alpha_v})
+                    prev = h
 
         # --- 1. 核心指标计算 ---
         ls, rs = pts['ls'], pts['rs']
@@ -118,7 +122,7 @@ class LateralRaiseExercise(BaseExercise):
             # [Update] 触发条件：大臂垂直角 > 30° (任一侧)
             if l_ang > 30 or r_ang > 30:
                 self.stage = "up"
-                self.up_start_time = time.time()
+                self.up_start_time = self.clock.now()
                 # [重置标记] 新的一轮开始，重置达标状态
                 self.cycle_flags['range'] = False 
                 self.cycle_flags['shrug'] = True
@@ -148,7 +152,7 @@ class LateralRaiseExercise(BaseExercise):
                 self._end_cycle(['shrug', 'range'])
                 
             # [New] 僵尸熔断机制
-            elif (time.time() - self.up_start_time > 5.0) and (l_ang < 30 and r_ang < 30):
+            elif (self.clock.now() - self.up_start_time > 5.0) and (l_ang < 30 and r_ang < 30):
                 self.stage = "start"
                 self.up_start_time = 0
 
@@ -5,8 +5,8 @@ from logic.detectors.rounding import RoundingDetector
 from logic.detectors.valgus import ValgusDetector
 
 class LungeExercise(BaseExercise):
-    def __init__(self, sound_mgr):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, clock=None):
+        super().__init__(sound_mgr, clock)
         
         self.add_detector(RoundingDetector(msg=TextConfig.ERR_SQUAT_ROUNDING))
         
@@ -1,5 +1,5 @@
+import collections
 import math
-import time
 from exercises.base import BaseExercise
 from core.config import TextConfig, ColorConfig, AlgoConfig
 from utils.geometry import GeomUtils
@@ -24,8 +24,8 @@ class PressExercise(BaseExercise):
        - 小臂检测基于几何垂直度，支持每一帧的实时状态计算。
     """
 
-    def __init__(self, sound_mgr):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, clock=None):
+        super().__init__(sound_mgr, clock)
         
         # --- 1. 初始化检测器 ---
         # [耸肩检测器] 
@@ -56,7 +56,7 @@ class PressExercise(BaseExercise):
         self.shrug_success_ts = 0.0
         
         # [轨迹记录] 存储手腕历史坐标
-        self.wrist_history = []
+        self.wrist_history = collections.deque()
         self._smooth_lw = None
         self._smooth_rw = None
 
@@ -74,7 +74,7 @@ class PressExercise(BaseExercise):
 
         # --- 0. 轨迹逻辑 (Wrist Trajectory) --- 增加平滑处理与全局开关
         if AlgoConfig.ENABLE_TRAJECTORY:
-            now = time.time()
+            now = self.clock.now()
             lw, rw = pts['lw'], pts['rw']
             
             # EMA 平滑处理
@@ -85,15 +85,19 @@ class PressExercise(BaseExercise):
                 self._smooth_lw = (int(self._smooth_lw[0]*(1-alpha_s) + lw[0]*alpha_s), int(self._smooth_lw[1]*(1-alpha_s) + lw[1]*alpha_s))
                 self._smooth_rw = (int(self._smooth_rw[0]*(1-alpha_s) + rw[0]*alpha_s), int(self._smooth_rw[1]*(1-alpha_s) + rw[1]*alpha_s))
             
-            self.wrist_history.append((now, self._smooth_lw, self._smooth_rw))
-            self.wrist_history = [h for h in self.wrist_history if now - h[0] <= 1.0]
+            # [Mod] 按时间顺序入队，过期样本只会出现在队首 (出队 O(1)，不再每帧重建列表)
+            hist = self.wrist_history
+            hist.append((now, self._smooth_lw, self._smooth_rw))
+            while now - hist[0][0] > 1.0: hist.popleft()
             
-            if len(self.wrist_history) > 2:
-                for i in range(1, len(self.wrist_history)):
-                    age = now - self.wrist_history[i][0]
-                    alpha_v = max(0.1, 1.0 - age)
-                    for side_idx in [1, 2]:
-                        vis.append({'cmd': 'line', 'start': self.wrist_history[i-1][side_idx], 'end': self.wrist_history[i][side_idx], 'color': ColorConfig.PINK, 'thick': 3, 'alpha': alpha_v})
+            if len(hist) > 2:
+                prev = None
+                for h in hist:
+                    if prev is not None:
+                        alpha_v = max(0.1, 1.0 - (now - h[0]))
+                        for side_idx in [1, 2]:
+                            vis.append({'cmd': 'line', 'start': prev[side_idx], 'end': h[side_idx], 'color': ColorConfig.PINK, 'thick': 3, 'alpha': alpha_v})
+                    prev = h
 
         # ==========================================================
         # 1. 状态机流转 & 基准值校准
@@ -142,7 +146,7 @@ class PressExercise(BaseExercise):
             #       2. 本轮动作全程保持合格 (cycle_flags['shrug']为True)
             # 结果：记录当前时间，触发后续 1秒 的绿色奖励特效
             if 'shrug' in self.active_feedback and self.cycle_flags.get('shrug', True):
-                self.shrug_success_ts = time.time() 
+                self.shrug_success_ts = self.clock.now() 
             
             # [动作结算] 提交给 FeedbackSystem 进行计次和语音反馈
             # [Modification] 移除了 'rounding'
@@ -190,7 +194,7 @@ class PressExercise(BaseExercise):
         # 1. 'shrug' 被激活 (纠错中)
         # 2. 或者 处于成功后的奖励时间窗 (1秒内)
         is_shrug_active = 'shrug' in active_errs
-        is_success_window = (time.time() - self.shrug_success_ts) < 1.0
+        is_success_window = (self.clock.now() - self.shrug_success_ts) < 1.0
         
         if AlgoConfig.ENABLE_SHRUG and (is_shrug_active or is_success_window):
             
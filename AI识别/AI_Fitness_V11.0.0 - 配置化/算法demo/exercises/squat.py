@@ -1,5 +1,4 @@
 import math
-import time
 from exercises.base import BaseExercise
 from core.config import TextConfig, ColorConfig, AlgoConfig
 from logic.detectors.valgus import ValgusDetector
@@ -24,8 +23,8 @@ class SquatExercise(BaseExercise):
        只有在深蹲底部(纠错区)真正修正过姿态，才算合格。支持起身后保持上一轮的判定结果。
     """
 
-    def __init__(self, sound_mgr):
-        super().__init__(sound_mgr)
+    def __init__(self, sound_mgr, clock=None):
+        super().__init__(sound_mgr, clock)
         
         # --- 1. 初始化检测器 ---
         # 膝内扣检测器：仅使用其几何计算能力 (detect方法)，不使用其自带的绘图 (msg为空)
@@ -137,7 +136,7 @@ class SquatExercise(BaseExercise):
         # 4. 动作状态机 (State Machine with Breaker)
         # ----------------------------------------------------------
         
-        current_time = time.time()
+        current_time = self.clock.now()
         
         if self.stage != "down":
              # >>> 状态切换：从 站立(Start) -> 下蹲(Down)
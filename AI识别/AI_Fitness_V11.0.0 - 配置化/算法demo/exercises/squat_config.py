@@ -5,6 +5,6 @@ class SquatExerciseConfig(GenericExercise):
     深蹲 (配置版)
     逻辑已完全解耦至 GenericExercise，此处仅指定配置文件。
     """
-    def __init__(self, sound_mgr):
+    def __init__(self, sound_mgr, clock=None):
         # 核心：只需指定配置文件名，所有逻辑由父类 GenericExercise 接管
-        super().__init__(sound_mgr, config_file="深蹲.json")
\ No newline at end of file
+        super().__init__(sound_mgr, config_file="深蹲.json", clock=clock)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from logic.detectors.abstract import BaseDetector
 from core.config import ColorConfig
+from logic.metrics import FrameMetrics
 
 class ShrugDetector(BaseDetector):
     def __init__(self, compression_threshold, error_key='shrug', msg="", color=ColorConfig.NEON_RED):
@@ -21,22 +22,10 @@ class ShrugDetector(BaseDetector):
         self.ref_h = 0.0
 
     def _get_vertical_dist(self, pts):
-        if not pts.get('nose'): return 0.0
-        
-        # 寻找可见的肩膀
-        shoulders_y = []
-        if pts.get('ls'): shoulders_y.append(pts['ls'][1])
-        if pts.get('rs'): shoulders_y.append(pts['rs'][1])
-        
-        if not shoulders_y: return 0.0
-        
-        # 计算双肩中点Y (如果只有一个肩，就用一个)
-        avg_shoulder_y = sum(shoulders_y) / len(shoulders_y)
-        nose_y = pts['nose'][1]
-        
-        # 垂直距离 = 肩Y - 鼻Y (图像坐标系Y向下增大，肩在下，数值大)
-        dist = avg_shoulder_y - nose_y
-        return dist
+        # 垂直距离 = 肩Y - 鼻Y (图像坐标系Y向下增大，肩在下，数值大)；只有一侧肩可见时用该侧
+        # [Mod] 读取帧级共享度量 (logic/metrics.py)
+        dist = FrameMetrics.of(pts)['nose_shoulder_dist']
+        return 0.0 if dist is None else dist
 
     def detect(self, pts, shared, cycle_flags):
         vis = []
@@ -1,15 +1,35 @@
-import time
+import numpy as np
 from core.config import TextConfig, AlgoConfig, ColorConfig
+from core.clock import SystemClock
+from utils.pose_frame import LS, RS, LE, RE, LW, RW, LH, RH, LK, RK
 
 class Gatekeeper:
-    def __init__(self):
-        self.last_act_time = time.time()
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SystemClock()
+        self.last_act_time = self.clock.now()
     
     # [Fix] Accept 'exercise' object to read/write msg state directly
     def check(self, pts, mode, exercise):
         # Always pass if active (DOWN state)
         if exercise.stage == "down": return True
         
+        is_similar, tip = self.match(pts, mode)
+        if is_similar:
+            self.last_act_time = self.clock.now()
+            # [Restore Logic] Clear hint immediately if it matches current tip
+            if exercise.msg == tip:
+                exercise.msg = ""
+                exercise.msg_priority = 0
+            return True
+        else:
+            if self.clock.now() - self.last_act_time > AlgoConfig.GATEKEEPER_TIMEOUT:
+                # Show tip
+                exercise._set_msg(tip, ColorConfig.NEON_RED, perm=True, priority=1)
+            return False
+
+    @staticmethod
+    def match(pts, mode):
+        """[Mod] 单帧姿态是否像当前动作，返回 (is_similar, 提示语)"""
         is_similar = False
         tip = ""
         
@@ -38,16 +58,28 @@ class Gatekeeper:
             tip = TextConfig.TIP_LATERAL_DO
             # 简单检查：识别到双肘即可
             if pts.get('le') and pts.get('re'): is_similar = True
-                
-        if is_similar:
-            self.last_act_time = time.time()
-            # [Restore Logic] Clear hint immediately if it matches current tip
-            if exercise.msg == tip:
-                exercise.msg = ""
-                exercise.msg_priority = 0
-            return True
-        else:
-            if time.time() - self.last_act_time > AlgoConfig.GATEKEEPER_TIMEOUT:
-                # Show tip
-                exercise._set_msg(tip, ColorConfig.NEON_RED, perm=True, priority=1)
-            return False
\ No newline at end of file
+        return is_similar, tip
+
+    @staticmethod
+    def match_series(xy, mode):
+        """
+        [New] match() 的整段批量版本 (供 offline/replay.py 使用，判定规则须与 match 保持一致)
+        :param xy: (帧数, 33, 2) 像素坐标，无效点为 NaN
+        :return: (帧数,) bool
+        """
+        ok = ~np.isnan(xy[..., 0])
+        x, y = xy[..., 0], xy[..., 1]
+        with np.errstate(invalid='ignore'):
+            if mode == TextConfig.ACT_PRESS:
+                both = ok[:, LW] & ok[:, RW] & ok[:, LS] & ok[:, RS]
+                return both & ((y[:, LW] + y[:, RW]) / 2 < (y[:, LS] + y[:, RS]) / 2 + 200)
+            if mode == TextConfig.ACT_SQUAT:
+                return ok[:, LH] & ok[:, RH] & (np.abs(x[:, LH] - x[:, RH]) > 20)
+            if mode == TextConfig.ACT_RAISE:
+                return ok[:, LW].copy()
+            if mode == TextConfig.ACT_LUNGE:
+                both = ok[:, LH] & ok[:, RH] & (ok[:, LK] | ok[:, RK])
+                return both & (np.abs(x[:, LH] - x[:, RH]) > 20)
+            if mode == TextConfig.ACT_LATERAL_RAISE:
+                return ok[:, LE] & ok[:, RE]
+        return np.zeros(len(xy), dtype=bool)
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+帧级共享度量 (Frame Metrics)
+肩中点、髋中点、躯干长度等派生量原本由脊柱分析、耸肩检测、通用检查、骨骼绘制各自重算一遍。
+这里为每一帧提供一个度量上下文：按名惰性计算、同一帧内只算一次，所有消费方都从这里读取。
+
+    m = FrameMetrics.of(pts)
+    m['torso_len'], m['shoulder_mid'], m['angle_l_knee']
+    m.memo(key, fn, *args)   # 任意帧级缓存 (如编译后的配置度量)
+
+- 命名度量基于 PoseFrame 的浮点像素坐标 (pts.xy)，所需关键点缺失时为 None
+- 上下文挂在 PoseFrame.metrics 上，原始关键点坐标被改写 (补点 / 平滑 / 按名写入) 时自动作废
+- 新增度量：在本模块用 @metric('名称') 注册一个 f(m) 即可
+- AppConfig.METRICS_PROFILE 打开时统计各度量的计算次数、命中次数与耗时 (metric_stats())
+"""
+import math
+import time
+import numpy as np
+from core.config import AppConfig
+from utils.geometry import GeomUtils
+from utils.pose_frame import NOSE, LS, RS, LE, RE, LW, RW, LH, RH, LK, RK, LA, RA
+
+_REGISTRY = {}
+_MISSING = object()
+
+# 度量名 -> [计算次数, 命中次数, 累计耗时 (秒)]；仅在 AppConfig.METRICS_PROFILE 打开时记录
+_STATS = {}
+
+def metric(name):
+    """注册命名度量 f(m) -> 值 (所需关键点缺失时返回 None)"""
+    def deco(fn):
+        _REGISTRY[name] = fn
+        return fn
+    return deco
+
+def metric_names():
+    return sorted(_REGISTRY)
+
+def metric_stats():
+    """{度量名: {'calls', 'hits', 'ms'}}，按累计耗时降序"""
+    rows = {}
+    for k, (c, h, s) in _STATS.items():
+        r = rows.setdefault(_stat_name(k), {'calls': 0, 'hits': 0, 'ms': 0.0})
+        r['calls'] += c; r['hits'] += h; r['ms'] += s * 1000.0
+    return dict(sorted(rows.items(), key=lambda kv: -kv[1]['ms']))
+
+def reset_stats():
+    _STATS.clear()
+
+def _stat_name(key):
+    if isinstance(key, str): return key
+    if isinstance(key, tuple): return f"{key[0]}{list(key[1])}" # 编译后的配置度量 (类型, 点引用, 配置)
+    return repr(key)
+
+class FrameMetrics:
+    """
+    单帧度量上下文
+    :param pts: PoseFrame (或旧式点字典；字典没有 xy 数组，只能使用 memo())
+    """
+    __slots__ = ('pts', '_cache')
+
+    def __init__(self, pts):
+        self.pts = pts
+        self._cache = {}
+
+    @classmethod
+    def of(cls, pts):
+        """取帧上挂载的上下文 (不存在时创建并挂载)；旧式点字典每次返回新的上下文"""
+        m = getattr(pts, 'metrics', _MISSING)
+        if m is _MISSING: return cls(pts)
+        if m is None:
+            m = pts.metrics = cls(pts)
+        return m
+
+    def memo(self, key, fn, *args):
+        """同一帧内 key 相同的 fn(*args) 只计算一次"""
+        v = self._cache.get(key, _MISSING)
+        if v is not _MISSING:
+            if AppConfig.METRICS_PROFILE: _STATS.setdefault(key, [0, 0, 0.0])[1] += 1
+            return v
+        if AppConfig.METRICS_PROFILE:
+            t0 = time.perf_counter()
+            v = fn(*args)
+            s = _STATS.setdefault(key, [0, 0, 0.0])
+            s[0] += 1; s[2] += time.perf_counter() - t0
+        else:
+            v = fn(*args)
+        self._cache[key] = v
+        return v
+
+    def get(self, name):
+        fn = _REGISTRY.get(name)
+        if fn is None: raise KeyError(f"Unknown metric: {name}")
+        return self.memo(name, fn, self)
+
+    __getitem__ = get
+
+    # --- 供度量实现使用 ---
+    def has(self, *idx):
+        return self.pts.has(*idx)
+
+    def xy(self, i):
+        return self.pts.xy[i]
+
+# =========================================================================
+# 躯干
+# =========================================================================
+
+@metric('shoulder_mid')
+def _shoulder_mid(m):
+    """双肩中点 (即脊柱分析中的 neck)，(2,) 数组"""
+    if not m.has(LS, RS): return None
+    return (m.xy(LS) + m.xy(RS)) / 2
+
+@metric('hip_mid')
+def _hip_mid(m):
+    """双髋中点，(2,) 数组"""
+    if not m.has(LH, RH): return None
+    return (m.xy(LH) + m.xy(RH)) / 2
+
+@metric('torso_vec')
+def _torso_vec(m):
+    """肩中点 -> 髋中点 向量"""
+    neck, hip = m['shoulder_mid'], m['hip_mid']
+    if neck is None or hip is None: return None
+    return hip - neck
+
+@metric('torso_len')
+def _torso_len(m):
+    vec = m['torso_vec']
+    return None if vec is None else np.linalg.norm(vec)
+
+@metric('shoulder_width')
+def _shoulder_width(m):
+    if not m.has(LS, RS): return None
+    return np.linalg.norm(m.xy(LS) - m.xy(RS))
+
+@metric('hip_width')
+def _hip_width(m):
+    if not m.has(LH, RH): return None
+    return np.linalg.norm(m.xy(LH) - m.xy(RH))
+
+@metric('side_len_l')
+def _side_len_l(m):
+    """左肩 -> 左髋 长度"""
+    if not m.has(LS, LH): return None
+    return np.linalg.norm(m.xy(LH) - m.xy(LS))
+
+@metric('side_len_r')
+def _side_len_r(m):
+    if not m.has(RS, RH): return None
+    return np.linalg.norm(m.xy(RH) - m.xy(RS))
+
+# =========================================================================
+# 头肩 (耸肩类检测)
+# =========================================================================
+
+@metric('shoulder_y')
+def _shoulder_y(m):
+    """可见肩膀的平均高度 (只有一侧可见时取该侧)"""
+    ys = [m.xy(i)[1] for i in (LS, RS) if m.has(i)]
+    return sum(ys) / len(ys) if ys else None
+
+@metric('nose_shoulder_dist')
+def _nose_shoulder_dist(m):
+    """肩高 - 鼻高 (图像 y 向下，肩在下为正)"""
+    sy = m['shoulder_y']
+    if sy is None or not m.has(NOSE): return None
+    return sy - m.xy(NOSE)[1]
+
+# =========================================================================
+# 关节角 (度)
+# =========================================================================
+
+def _joint_angle(a, b, c):
+    def fn(m):
+        if not m.has(a, b, c): return None
+        return GeomUtils.angle(m.xy(a), m.xy(b), m.xy(c))
+    return fn
+
+for _name, _abc in {
+    'angle_l_elbow': (LS, LE, LW), 'angle_r_elbow': (RS, RE, RW),
+    'angle_l_shoulder': (LH, LS, LE), 'angle_r_shoulder': (RH, RS, RE),
+    'angle_l_hip': (LS, LH, LK), 'angle_r_hip': (RS, RH, RK),
+    'angle_l_knee': (LH, LK, LA), 'angle_r_knee': (RH, RK, RA),
+}.items():
+    metric(_name)(_joint_angle(*_abc))
+
+@metric('torso_incline')
+def _torso_incline(m):
+    """躯干相对竖直方向的夹角 (度，未区分朝向)"""
+    vec = m['torso_vec']
+    if vec is None: return None
+    return math.degrees(math.atan2(vec[0], vec[1]))
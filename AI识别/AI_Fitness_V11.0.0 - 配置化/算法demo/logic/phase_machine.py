@@ -0,0 +1,130 @@
+"""
+阶段状态机 (Phase Machine)
+配置规范的状态机为 准备 / 向心 / 顶峰 / 离心 / 复位 五个阶段，原实现只有 start / down 两态
+(trigger_down / trigger_up + 超时熔断)，分支直接写在 GenericExercise 中。这里把状态机编译为转移表：
+- 每个阶段一张出边表 [Transition(目标阶段, 预编译谓词, 驻留时长)]，按配置顺序检查，每帧至多转移一次
+- 驻留 (dwell)：谓词需连续成立 dwell 秒才转移 (如 "顶峰: 深度 < 10% 且停留 > 0.2s")；
+  不带谓词时即本阶段的停留时长 (如 "复位状态保持 > 0.5s 进入准备")
+- 超时熔断：一轮内某阶段停留超过 timeout 且复位谓词成立时，强制回到初始阶段 (本轮不计)
+- 纠错区间：阶段可带 (进入, 离开) 谓词，进入阶段时清零
+- 条件集：每个阶段 (区间内 / 外) 预先算好生效的条件，未生效的 latch 条件只读出锁定状态、不求值
+
+事件：由一轮外的阶段进入一轮内的阶段为 'begin'，反之为 'end' (计次)，熔断为 'cancel'。
+谓词的参数由调用方决定 (实时路径为 (raw, v, dyn)，整段回放为 (i, dyn))，转移表与转移逻辑两边共用。
+配置解析见 exercises/config_compiler.py 的 compile_state_machine。
+"""
+
+PHASES = ('prepare', 'concentric', 'peak', 'eccentric', 'reset')
+REP_PHASES = ('concentric', 'peak', 'eccentric') # 默认属于一轮之内的阶段
+ZONE = 'zone' # 条件检测时机：纠错区间 (状态机未定义任何区间时回退为全程)
+
+BEGIN, END, CANCEL = 'begin', 'end', 'cancel'
+
+class Transition:
+    __slots__ = ('target', 'test', 'dwell', 'event')
+    def __init__(self, target, test, dwell, event):
+        self.target = target # Phase
+        self.test = test     # f(*args) -> bool，None 表示恒成立
+        self.dwell = dwell   # 谓词需连续成立的时长 (秒)
+        self.event = event   # BEGIN / END / None
+
+class Phase:
+    __slots__ = ('name', 'in_rep', 'calibrate', 'stage', 'transitions', 'zone', 'sets')
+    def __init__(self, name, in_rep, calibrate):
+        self.name = name
+        self.in_rep = in_rep
+        self.calibrate = calibrate # 允许采集动态基准
+        # 对外的粗粒度状态 (Gatekeeper / SpineAnalyzer / 回放门控读取)：一轮之内为 "down"，
+        # [Fix] 一轮之外的阶段 (准备 / 复位等) 一律为旧写法的 "start"，消费方仍按旧状态名判断
+        self.stage = 'down' if in_rep else 'start'
+        self.transitions = []
+        self.zone = None           # (进入谓词, 离开谓词)
+        self.sets = ([], [])       # (区间外, 区间内) 条件集 [(条件, 是否求值)]，见 assign_conditions
+
+class PhaseMachine:
+    """
+    :param phases: [Phase]，第一个为初始阶段 (熔断后回到这里)
+    :param timeout: 超时熔断时长 (秒)，None 表示不熔断
+    :param timeout_test: 熔断的复位谓词
+    """
+    def __init__(self, phases, timeout=None, timeout_test=None):
+        self.phases = phases
+        self.by_name = {p.name: p for p in phases}
+        self.initial = phases[0]
+        self.timeout, self.timeout_test = timeout, timeout_test
+        self.has_zone = any(p.zone for p in phases)
+        self.reset()
+
+    def reset(self, t=None):
+        """回到初始阶段；t 为 None 时进入时间记在下一次 step (实时路径为挂钟时间，不能假定从 0 开始)"""
+        self._enter(self.initial, t)
+
+    def _enter(self, phase, t):
+        self.phase = phase
+        self.stage = phase.stage # 对外的粗粒度状态 (见 Phase.stage)
+        self.entered = t
+        self.held = [None] * len(phase.transitions) # 各出边谓词开始连续成立的时间
+        self.in_zone = False
+
+    def step(self, t, *args):
+        """每个处理帧调用一次：检查出边 (无转移时检查熔断)，再更新纠错区间；返回本帧事件或 None"""
+        phase = self.phase
+        if self.entered is None: self.entered = t # [Fix] 见 reset
+        event = None
+        k = -1
+        for tr in phase.transitions:
+            k += 1
+            test = tr.test
+            if test is not None and not test(*args):
+                self.held[k] = None
+                continue
+            if tr.dwell > 0:
+                since = self.held[k]
+                if since is None:
+                    since = self.held[k] = self.entered if test is None else t
+                if t - since < tr.dwell: continue
+            self._enter(tr.target, t)
+            event = tr.event
+            break
+        else:
+            if phase.in_rep and self.timeout is not None and t - self.entered > self.timeout and self.timeout_test(*args):
+                self._enter(self.initial, t)
+                event = CANCEL
+
+        zone = self.phase.zone
+        if zone is not None:
+            if not self.in_zone:
+                if zone[0](*args): self.in_zone = True
+            elif zone[1](*args): self.in_zone = False
+        return event
+
+    def conditions(self):
+        """当前阶段生效的条件集 [(条件, 是否求值)] (配置顺序)"""
+        return self.phase.sets[self.in_zone]
+
+    def assign_conditions(self, items):
+        """
+        预先计算各阶段的条件集
+        :param items: [(条件, 检测时机, 是否为 latch 条件)]；检测时机为 None (全程) 或阶段名 / ZONE 的集合
+        一轮外的阶段不评估条件 (渲染读取上一轮结果)；一轮内未生效的 latch 条件保留锁定状态的读出
+        """
+        rep = {p.name for p in self.phases if p.in_rep}
+        for _, when, _ in items:
+            unknown = set(when or ()) - rep - {ZONE}
+            if unknown: raise ValueError(f"unknown phases {sorted(unknown)} (in-rep phases: {sorted(rep)})")
+        for p in self.phases:
+            if not p.in_rep: continue
+            sets = ([], [])
+            for in_zone, out in enumerate(sets):
+                for c, when, latched in items:
+                    active = (when is None or p.name in when
+                              or (ZONE in when and (in_zone or not self.has_zone)))
+                    if active or latched: out.append((c, active))
+            p.sets = sets
+
+    def phases_for(self, state):
+        """动态基准的采集状态 (active_state) -> 阶段名集合"""
+        if state in self.by_name: return frozenset((state,))
+        if state == 'down': return frozenset(p.name for p in self.phases if p.in_rep)
+        if state == 'start': return frozenset(p.name for p in self.phases if p.calibrate)
+        return frozenset()
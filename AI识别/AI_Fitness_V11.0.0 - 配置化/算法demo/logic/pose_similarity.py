@@ -0,0 +1,229 @@
+"""
+姿态相似 (Pose Similarity)
+配置规范中的 "姿态相似型" 错误项把关键时刻的身体姿态与教练标准姿态整体比对。这里把一帧姿态抽象为定长向量：
+- 关节角：肘 / 肩 / 髋 / 膝 (与 logic/metrics.py 的 angle_* 同名)，除以 180°
+- 肢体方向：大臂 / 小臂 / 大腿 / 小腿 / 躯干的单位方向向量，除以 π (小角度下分量差的模长≈夹角弧度 / π)
+两类分量的偏差都近似为 "角度 / 180°"，不受身高与到镜头距离影响。缺失关键点对应的分量为 NaN，比对时跳过。
+
+模板库 (PoseLibrary) 由参考片段中的帧构建 (最远点采样去重，见 main_pose_templates.py)，存为紧凑的 (K, D) 数组。
+查询为整库暴力比对：模板数为几十、维度 26 时单帧一次广播运算即可完成 (约十微秒量级)，
+且批量 (整段回放) 与单帧 (实时) 逐行运算相同，结果逐位一致。相似度取最近模板：
+    相似度 = 1 - 加权均方根偏差 / tolerance (截断到 [0, 1])
+
+用法：
+- 逐帧：度量 {"metric": "pose_similarity", "library": "plank_std"}，或条件类型 pose_similarity
+- 顶峰：度量加 "at": "peak"，逐帧比对本轮处于状态机顶峰阶段的姿态，一轮结束时取均值
+  ("at" 可为任一一轮内的阶段名，如旧写法的 down 即整轮)
+"""
+import os
+import numpy as np
+from core.config import AppConfig, AlgoConfig
+from logic.metrics import metric
+from utils.pose_frame import NUM_LANDMARKS, LS, RS, LE, RE, LW, RW, LH, RH, LK, RK, LA, RA
+
+_SHOULDER_MID, _HIP_MID = NUM_LANDMARKS, NUM_LANDMARKS + 1 # 扩展列
+
+ANGLES = {
+    'angle_l_elbow': (LS, LE, LW), 'angle_r_elbow': (RS, RE, RW),
+    'angle_l_shoulder': (LH, LS, LE), 'angle_r_shoulder': (RH, RS, RE),
+    'angle_l_hip': (LS, LH, LK), 'angle_r_hip': (RS, RH, RK),
+    'angle_l_knee': (LH, LK, LA), 'angle_r_knee': (RH, RK, RA),
+}
+DIRECTIONS = {
+    'dir_l_upper_arm': (LS, LE), 'dir_r_upper_arm': (RS, RE),
+    'dir_l_forearm': (LE, LW), 'dir_r_forearm': (RE, RW),
+    'dir_l_thigh': (LH, LK), 'dir_r_thigh': (RH, RK),
+    'dir_l_shin': (LK, LA), 'dir_r_shin': (RK, RA),
+    'dir_torso': (_SHOULDER_MID, _HIP_MID),
+}
+FEATURES = tuple(ANGLES) + tuple(DIRECTIONS)
+DIMS = len(ANGLES) + 2 * len(DIRECTIONS)
+
+_A, _B, _C = (np.array([v[k] for v in ANGLES.values()]) for k in range(3))
+_D0, _D1 = (np.array([v[k] for v in DIRECTIONS.values()]) for k in range(2))
+
+def embed(xy):
+    """
+    :param xy: (N, 33, 2) 像素坐标，缺失点为 NaN
+    :return: (N, DIMS) 姿态向量，缺失分量为 NaN
+    """
+    n = len(xy)
+    p = np.empty((n, NUM_LANDMARKS + 2, 2))
+    p[:, :NUM_LANDMARKS] = xy
+    p[:, _SHOULDER_MID] = (xy[:, LS] + xy[:, RS]) / 2
+    p[:, _HIP_MID] = (xy[:, LH] + xy[:, RH]) / 2
+    out = np.empty((n, DIMS))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ba, bc = p[:, _A] - p[:, _B], p[:, _C] - p[:, _B]
+        cos = (ba * bc).sum(axis=2) / (np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1]))
+        out[:, :len(ANGLES)] = np.arccos(np.clip(cos, -1.0, 1.0)) / np.pi
+        v = p[:, _D1] - p[:, _D0]
+        u = v / (np.hypot(v[..., 0], v[..., 1])[..., None] * np.pi)
+    u[~np.isfinite(u)] = np.nan # 零长度肢体
+    out[:, len(ANGLES):] = u.reshape(n, -1)
+    return out
+
+def frame_xy(pts):
+    """PoseFrame -> (33, 2) 取整像素坐标 (与按名取点的 int 语义一致)，无效点为 NaN"""
+    xy = np.trunc(pts.xy[:NUM_LANDMARKS])
+    xy[~pts.valid[:NUM_LANDMARKS]] = np.nan
+    return xy
+
+@metric('pose_embedding')
+def _pose_embedding(m):
+    """帧级共享：(1, DIMS) 姿态向量 (多个姿态相似度量 / 条件同一帧只算一次)"""
+    return embed(frame_xy(m.pts)[None])
+
+def feature_weights(features=None):
+    """
+    比对指标集 -> (逐维权重, 逐维归一化权重)
+    :param features: {特征名: 权重} / [特征名] / None (全部特征，权重 1.0)
+    方向特征占两维，归一化时按一个特征计 (每维一半)
+    """
+    if features is None: features = dict.fromkeys(FEATURES, 1.0)
+    elif isinstance(features, (list, tuple)): features = dict.fromkeys(features, 1.0)
+    unknown = [k for k in features if k not in FEATURES]
+    if unknown: raise ValueError(f"Unknown pose features: {unknown}")
+    w, wn = np.zeros(DIMS), np.zeros(DIMS)
+    for i, name in enumerate(ANGLES):
+        w[i] = wn[i] = features.get(name, 0.0)
+    for i, name in enumerate(DIRECTIONS):
+        j = len(ANGLES) + 2 * i
+        w[j:j + 2] = features.get(name, 0.0)
+        wn[j:j + 2] = features.get(name, 0.0) / 2
+    if wn.sum() <= 0: raise ValueError("Pose features need a positive weight")
+    return w, wn
+
+def similarity(rms, tolerance=None):
+    if tolerance is None: tolerance = AlgoConfig.POSE_TOLERANCE
+    return np.clip(1.0 - rms / tolerance, 0.0, 1.0)
+
+class PoseLibrary:
+    """
+    姿态模板库
+    :param templates: (K, DIMS) 姿态向量 (缺失分量为 NaN)
+    :param labels: K 个模板的来源标注 (片段 / 帧号)
+    """
+    def __init__(self, templates, labels=None):
+        t = np.asarray(templates, dtype=float)
+        if t.ndim != 2 or t.shape[1] != DIMS or not len(t):
+            raise ValueError(f"Pose templates must be a non-empty (K, {DIMS}) array, got {t.shape}")
+        self.valid = ~np.isnan(t)
+        self.templates = np.where(self.valid, t, 0.0)
+        self.labels = list(labels) if labels is not None else [str(i) for i in range(len(t))]
+
+    def __len__(self):
+        return len(self.templates)
+
+    def query(self, emb, weights):
+        """
+        :param emb: (N, DIMS) 查询姿态向量
+        :param weights: feature_weights() 的返回值
+        :return: (rms (N,), idx (N,)) 最近模板的加权均方根偏差与下标；没有可比分量时偏差为 0
+        """
+        w, wn = weights
+        q_ok = ~np.isnan(emb)
+        q = np.where(q_ok, emb, 0.0)
+        ok = q_ok[:, None, :] & self.valid[None]                     # (N, K, D)
+        diff = q[:, None, :] - self.templates[None]
+        num = (diff * diff * ok * w).sum(axis=2)
+        den = (ok * wn).sum(axis=2)
+        d2 = np.where(den > 0, num / np.where(den > 0, den, 1.0), 0.0)
+        idx = d2.argmin(axis=1)
+        return np.sqrt(d2[np.arange(len(d2)), idx]), idx
+
+    def query_batch(self, emb, weights, chunk=1024):
+        """整段查询 (分块控制 (N, K, D) 中间数组大小)，逐行结果与 query() 相同"""
+        rms, idx = np.zeros(len(emb)), np.zeros(len(emb), dtype=np.intp)
+        for s in range(0, len(emb), chunk):
+            rms[s:s + chunk], idx[s:s + chunk] = self.query(emb[s:s + chunk], weights)
+        return rms, idx
+
+    # --- 建库 / 存取 ---
+    @classmethod
+    def from_frames(cls, emb, labels=None, max_templates=None, min_dist=None, min_valid=0.8):
+        """
+        由参考帧构建：丢弃有效分量不足 min_valid 的帧，最远点采样选出至多 max_templates 个互不重复的姿态
+        (与已选模板的最小偏差低于 min_dist 时停止)
+        """
+        if max_templates is None: max_templates = AlgoConfig.POSE_MAX_TEMPLATES
+        if min_dist is None: min_dist = AlgoConfig.POSE_TEMPLATE_MIN_DIST
+        emb = np.asarray(emb, dtype=float)
+        labels = list(labels) if labels is not None else [str(i) for i in range(len(emb))]
+        keep = np.flatnonzero((~np.isnan(emb)).mean(axis=1) >= min_valid)
+        if not len(keep): raise ValueError("No reference frame has enough visible joints")
+        emb, labels = emb[keep], [labels[i] for i in keep]
+        weights = feature_weights()
+        chosen = [0]
+        dist = PoseLibrary(emb[:1]).query_batch(emb, weights)[0]
+        while len(chosen) < max_templates:
+            i = int(dist.argmax())
+            if dist[i] < min_dist: break
+            chosen.append(i)
+            dist = np.minimum(dist, PoseLibrary(emb[i:i + 1]).query_batch(emb, weights)[0])
+        return cls(emb[chosen], [labels[i] for i in chosen])
+
+    def save(self, path):
+        t = np.where(self.valid, self.templates, np.nan).astype(np.float32)
+        np.savez(path, templates=t, labels=np.array(self.labels), features=np.array(FEATURES))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            if tuple(f['features'].tolist()) != FEATURES:
+                raise ValueError(f"{path}: pose template features do not match this version")
+            return cls(f['templates'].astype(float), f['labels'].tolist())
+
+_LIBRARIES = {} # 绝对路径 -> PoseLibrary (只读，各动作共享)
+
+def library_path(name):
+    """模板库名 -> 文件路径 (相对名在 AppConfig.POSE_TEMPLATE_DIR 下查找，可省略 .npz)"""
+    path = name if os.path.isabs(name) else os.path.join(AppConfig.POSE_TEMPLATE_DIR, name)
+    return path if path.endswith('.npz') else path + '.npz'
+
+def load_library(name):
+    path = os.path.abspath(library_path(name))
+    lib = _LIBRARIES.get(path)
+    if lib is None:
+        if not os.path.isfile(path): raise ValueError(f"Pose template library not found: {path}")
+        lib = _LIBRARIES[path] = PoseLibrary.load(path)
+    return lib
+
+class PeakPoseTracker:
+    """
+    顶峰姿态：本轮处于指定阶段 (默认 peak) 的各帧逐帧与模板库比对，一轮结束时取相似度均值
+    begin / end / cancel 与 TempoTracker 调用约定相同；push 在状态机步进之后调用 (进入一轮的那一帧已在本轮内)
+    """
+    def __init__(self, library, weights, tolerance=None, phase='peak'):
+        self.library, self.weights = library, weights
+        self.tolerance = AlgoConfig.POSE_TOLERANCE if tolerance is None else tolerance
+        self.phase = phase
+        self.active = False
+        self.total, self.frames = 0.0, 0
+        self.best = (-1.0, -1) # 本轮最相似的一帧 (相似度, 最近模板下标)
+        self.last = None       # (相似度均值, 最相似帧的最近模板下标)
+
+    def push(self, phase, xy_fn):
+        """:param xy_fn: 取本帧 (33, 2) 坐标的函数，只在处于指定阶段时调用"""
+        if not self.active or phase != self.phase: return
+        rms, idx = self.library.query(embed(xy_fn()[None]), self.weights)
+        sim = float(similarity(rms[0], self.tolerance))
+        self.total += sim
+        self.frames += 1
+        if sim > self.best[0]: self.best = (sim, int(idx[0]))
+
+    def begin(self, t):
+        self.active = True
+        self.total, self.frames, self.best = 0.0, 0, (-1.0, -1)
+
+    def cancel(self, t):
+        self.active = False
+
+    def end(self, t):
+        self.last = (self.total / self.frames, self.best[1]) if self.active and self.frames else None
+        self.active = False
+        return self.last
+
+    def value(self):
+        """最近一轮顶峰姿态的相似度 (尚无结果、或本轮未进入该阶段时为 1.0，同 "点缺失判为合格")"""
+        return self.last[0] if self.last else 1.0
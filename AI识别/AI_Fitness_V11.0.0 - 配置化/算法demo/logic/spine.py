@@ -8,6 +8,8 @@ V24.1.0: 基准值漂移修复版 (Baseline Drift Fix)
 2. 架构调整：将角度计算和朝向判定提前，以便在校准阶段使用。
 """
 from core.config import AlgoConfig
+from logic.metrics import FrameMetrics
+from utils.pose_frame import NOSE, LS, RS, LH, RH, D_NECK, D_HIP, D_THORAX, D_WAIST
 import numpy as np
 import math
 
@@ -21,25 +23,28 @@ class SpineAnalyzer:
         return self.max_torso_len
 
     def analyze(self, pts, stage="start"):
+        """
+        :param pts: PoseFrame (直接读取关键点数组，结果写入派生点槽位与 attrs)
+        """
         # 1. 完整性检查
-        if not (pts.get('ls') and pts.get('rs') and pts.get('lh') and pts.get('rh')): 
+        if not pts.has(LS, RS, LH, RH): 
             return
         
-        # 2. 基础几何计算
-        ls, rs = np.array(pts['ls']), np.array(pts['rs'])
-        lh, rh = np.array(pts['lh']), np.array(pts['rh'])
-        neck = (ls + rs) / 2
-        hip = (lh + rh) / 2
-        vec = hip - neck 
-        curr_len = np.linalg.norm(vec)
+        # 2. 基础几何计算 ([Mod] 读取帧级共享度量，其他检测器 / 绘制复用同一结果)
+        xy = pts.xy
+        m = FrameMetrics.of(pts)
+        neck = m['shoulder_mid']
+        hip = m['hip_mid']
+        vec = m['torso_vec']
+        curr_len = m['torso_len']
         
         # 3. [架构调整] 提前计算矢量基底 & 朝向 (为了计算角度)
         u = vec / curr_len
         n = np.array([-u[1], u[0]])
         
         score = 0
-        if pts.get('nose'): 
-            score += np.sign(pts['nose'][0] - neck[0]) * 2.5
+        if pts.valid[NOSE]: 
+            score += np.sign(xy[NOSE, 0] - neck[0]) * 2.5
         self.facing_smooth = self.facing_smooth * 0.95 + score * 0.05
         face_dir = 1.0 if self.facing_smooth > 0 else -1.0
         back = n * face_dir * AlgoConfig.GLOBAL_DIR_FLIP
@@ -67,8 +72,8 @@ class SpineAnalyzer:
         if self.max_torso_len <= 0 or curr_len < 1e-6: return
 
         # 6. 视图门控
-        shoulder_w = np.linalg.norm(ls - rs)
-        hip_w = np.linalg.norm(lh - rh)
+        shoulder_w = m['shoulder_width']
+        hip_w = m['hip_width']
         s_ratio = shoulder_w / self.max_torso_len
         h_ratio = hip_w / self.max_torso_len
         
@@ -88,8 +93,8 @@ class SpineAnalyzer:
         lateral_val = 0.0
         real_rounding = 0.0
         
-        len_left = np.linalg.norm(lh - ls)
-        len_right = np.linalg.norm(rh - rs)
+        len_left = m['side_len_l']
+        len_right = m['side_len_r']
         diff = len_right - len_left
         base_lateral = 0.0
         if abs(diff) > self.max_torso_len * 0.03:
@@ -151,14 +156,13 @@ class SpineAnalyzer:
         sagittal_offset = back * (curve_val * curr_len * visual_dir)
         lateral_offset = n * lateral_val
         
-        pts['neck'] = (int(neck[0]), int(neck[1]))
-        pts['hip'] = (int(hip[0]), int(hip[1]))
-        
         t_pt = neck + vec * AlgoConfig.LOC_THORAX + lateral_offset + sagittal_offset * 0.9
         l_pt = neck + vec * AlgoConfig.LOC_LUMBAR + lateral_offset + sagittal_offset * 1.1
         
-        pts['thorax'] = (int(t_pt[0]), int(t_pt[1]))
-        pts['waist'] = (int(l_pt[0]), int(l_pt[1]))
+        pts.set_derived(D_NECK, (int(neck[0]), int(neck[1])))
+        pts.set_derived(D_HIP, (int(hip[0]), int(hip[1])))
+        pts.set_derived(D_THORAX, (int(t_pt[0]), int(t_pt[1])))
+        pts.set_derived(D_WAIST, (int(l_pt[0]), int(l_pt[1])))
         
         pts['rounding_bad'] = (self.view_mode == 'side' and real_rounding > AlgoConfig.ROUNDING_COMPRESS_TH)
 
@@ -0,0 +1,146 @@
+"""
+节奏分析 (Tempo Tracker)
+配置规范中的 "节奏速率型" 错误项关注每次动作的时间与速度特征 (离心控制时长、向心爆发速度、顶峰停顿、多次节奏稳定性)。
+这里流式记录每个处理帧的关节速度：跟踪点相隔 TEMPO_SPEED_LAG 个处理帧的位移差分 / 时间差，按躯干长度归一 (躯干长/秒)，
+写入定长环形缓冲，每帧 O(1)。分相直接取状态机 (logic/phase_machine.py) 的阶段：
+- 进入一轮 (begin) 与一轮内每次切换阶段 (enter) 时记下时间与帧序号，一轮结束 (end) 时按阶段汇总：
+  时长为该阶段的停留时间之和，速度取该阶段各帧 (含两端切换帧)
+- 阶段名即状态机一轮内的阶段 (如 concentric / peak / eccentric，旧写法只有 down)
+- full 为整轮，rest 为本轮开始前在一轮外停留的时长
+汇总每轮只做一次 (长度为本轮帧数)，均摊到每帧仍为 O(1)。
+
+度量：value(phase, measure) 读取最近一轮的结果 (尚无完整一轮、或本轮未经过该阶段时为 0.0)
+- measure: duration (秒) / mean_speed / peak_speed (躯干长/秒)
+- reps=N 时返回最近 N 轮该值的变异系数 CV (标准差 / 均值，一致性评价)
+"""
+import math
+import numpy as np
+from core.config import AlgoConfig
+from utils.window_stats import SlidingWindow
+
+PHASES = ('full', 'rest') # 与状态机阶段无关的分相 (其余为状态机一轮内的阶段名)
+MEASURES = ('duration', 'mean_speed', 'peak_speed')
+
+def torso_scale(ls, rs, lh, rh):
+    """肩中点到髋中点的长度 (像素)，点缺失时为 None"""
+    if not (ls and rs and lh and rh): return None
+    return math.hypot((ls[0] + rs[0]) / 2 - (lh[0] + rh[0]) / 2, (ls[1] + rs[1]) / 2 - (lh[1] + rh[1]) / 2)
+
+class RepTempo:
+    """一轮动作的节奏结果"""
+    __slots__ = ('t_start', 't_end', 'values')
+    def __init__(self, t_start, t_end, values):
+        self.t_start, self.t_end = t_start, t_end
+        self.values = values # {(phase, measure): float}
+
+    def get(self, phase, measure):
+        return self.values.get((phase, measure), 0.0)
+
+class TempoTracker:
+    """
+    :param n_points: 参与速度估计的跟踪点数
+    """
+    def __init__(self, n_points=0, capacity=None, lag=None):
+        self.n_points = n_points
+        self.capacity = AlgoConfig.TEMPO_BUFFER if capacity is None else capacity
+        self.lag = AlgoConfig.TEMPO_SPEED_LAG if lag is None else lag
+        self.history = {} # (phase, measure, N) -> SlidingWindow，最近 N 轮的取值
+        self.reset()
+
+    def reset(self):
+        cap = self.capacity
+        self.t = np.zeros(cap)
+        self.speed = np.full(cap, np.nan)
+        self.pts = [None] * cap # 每帧跟踪点坐标 (list，点缺失为 None)
+        self.count = 0          # 累计写入帧数 (环形下标为 count % capacity)
+        self.scale = None       # 最近一次有效的躯干长度
+        self.rep_start = None   # 本轮起始帧的累计序号
+        self.t_begin = None     # 本轮开始的时间 (本轮长于缓冲时起始帧已被覆盖)
+        self.marks = []         # 本轮的阶段切换 [(阶段名, 帧累计序号, 时间)]
+        self.t_rest = None      # 上一轮结束 (或熔断) 的时间
+        self._rest = 0.0        # 本轮开始前在一轮外的停留时长
+        self.last = None        # 最近一轮 RepTempo
+        for w in self.history.values(): w.reset()
+
+    def track(self, phase, measure, reps):
+        """登记一致性评价 (最近 reps 轮)，之后每轮结束时记录"""
+        key = (phase, measure, reps)
+        if key not in self.history: self.history[key] = SlidingWindow(reps)
+
+    # --- 每帧 ---
+    def push(self, t, pts=(), scale=None):
+        """
+        :param pts: 跟踪点坐标序列 (与 n_points 对应，缺失为 None)
+        :param scale: 本帧躯干长度 (像素)，None 时沿用上一次
+        """
+        cap, n = self.capacity, self.count
+        i = n % cap
+        self.t[i] = t
+        pts = self.pts[i] = list(pts)
+        if scale: self.scale = scale
+
+        speed = math.nan
+        if n >= self.lag and self.scale:
+            j = (n - self.lag) % cap
+            dt = t - self.t[j]
+            if dt > 0:
+                total, k = 0.0, 0
+                for p, q in zip(pts, self.pts[j]):
+                    if p and q:
+                        total += math.hypot(p[0] - q[0], p[1] - q[1]); k += 1
+                if k: speed = total / k / dt / self.scale
+        self.speed[i] = speed
+        self.count = n + 1
+
+    # --- 状态机切换 (当前帧已 push) ---
+    def begin(self, t):
+        """进入一轮 (随后 enter 进入的阶段)"""
+        self.rep_start, self.t_begin, self.marks = self.count - 1, t, []
+        self._rest = t - self.t_rest if self.t_rest is not None else 0.0
+
+    def enter(self, phase, t):
+        """进入阶段 phase (一轮之外调用时忽略)"""
+        if self.rep_start is not None: self.marks.append((phase, self.count - 1, t))
+
+    def cancel(self, t):
+        """熔断复位：本轮不计"""
+        self.rep_start = self.t_begin = None
+        self.marks = []
+        self.t_rest = t
+
+    def end(self, t):
+        """一轮结束：按阶段汇总并更新一致性记录，返回 RepTempo"""
+        if self.rep_start is None: return None
+        last, oldest = self.count - 1, self.count - self.capacity # 早于 oldest 的帧已被覆盖，只影响速度
+        bounds = self.marks + [(None, last, t)]
+        spans = [('full', self.rep_start, self.t_begin, last, t)]
+        spans += [(ph, lo, t0, hi, t1) for (ph, lo, t0), (_, hi, t1) in zip(bounds, bounds[1:])]
+
+        durations, speeds = {}, {}
+        for phase, lo, t0, hi, t1 in spans:
+            durations[phase] = durations.get(phase, 0.0) + (t1 - t0)
+            lo = max(lo, oldest)
+            if lo <= hi: speeds.setdefault(phase, []).append(self.speed[np.arange(lo, hi + 1) % self.capacity])
+        values = {('rest', 'duration'): self._rest}
+        for phase, d in durations.items():
+            values[(phase, 'duration')] = float(d)
+            seg = np.concatenate(speeds[phase]) if phase in speeds else np.empty(0)
+            seg = seg[~np.isnan(seg)]
+            values[(phase, 'mean_speed')] = float(seg.mean()) if len(seg) else 0.0
+            values[(phase, 'peak_speed')] = float(seg.max()) if len(seg) else 0.0
+
+        self.last = RepTempo(self.t_begin, t, values)
+        for (phase, measure, _), w in self.history.items():
+            w.push(self.last.get(phase, measure))
+        self.rep_start = self.t_begin = None
+        self.marks = []
+        self.t_rest = t
+        return self.last
+
+    # --- 度量 ---
+    def value(self, phase, measure, reps=None):
+        if reps:
+            w = self.history[(phase, measure, reps)]
+            m = w.mean()
+            return w.std() / m if len(w) >= 2 and m > 0 else 0.0
+        return self.last.get(phase, measure) if self.last else 0.0
@@ -0,0 +1,188 @@
+"""
+轨迹拟合 (Trajectory Matching)
+配置规范中的 "轨迹拟合型" 错误项比较一轮动作中某个关节的运动路线与参考模板 (如推举腕部直上直下、侧平举腕部画弧)。
+press.py / lateral_raise.py 的腕部 / 肘部轨迹只用于绘制拖尾，这里为配置化动作提供按轮比对：
+- 每个处理帧把跟踪点 (相对参考点，或原始坐标) 与躯干长度写入定长环形缓冲，每帧 O(1)
+- 一轮结束时取本轮切片：减去起点 (平移) 并除以本轮躯干长度中位数 (缩放)，可选按行程幅度适配模板 (fit)
+- 重采样到固定的 TRAJECTORY_SAMPLES 个点后与模板比对，单轮耗时与动作快慢、帧率无关：
+  - dtw : 按时间均匀重采样，带宽约束 (Sakoe-Chiba) 的动态时间规整，按反对角线整段向量化递推
+  - path: 按弧长均匀重采样，双向最近点平均距离 (只看空间重合度，不看快慢)
+
+模板为像素坐标系 (y 向下) 下以起点为原点的折线，单位为躯干长度；可用 TEMPLATES 中的名称或直接给出点列表。
+比对只在一轮结束时做一次；尚无完整一轮或本轮有效点不足时视为完全贴合 (与 "点缺失判为合格" 一致)。
+"""
+import math
+import numpy as np
+from core.config import AlgoConfig
+
+STRATEGIES = ('dtw', 'path')
+MEASURES = ('score', 'distance')
+
+def _arc(direction, n=9):
+    """手臂自然下垂绕肩外展到水平再放下 (半径 1)，direction=-1 向画面左侧，1 向右侧"""
+    up = [(direction * math.sin(a), math.cos(a) - 1.0) for a in np.linspace(0.0, math.pi / 2, n)]
+    return up + up[-2::-1]
+
+TEMPLATES = {
+    'vertical_up': [(0.0, 0.0), (0.0, -1.0), (0.0, 0.0)],  # 推举腕部：直上直下
+    'vertical_down': [(0.0, 0.0), (0.0, 1.0), (0.0, 0.0)], # 深蹲髋部：直下直上
+    'arc_left': _arc(-1.0),
+    'arc_right': _arc(1.0),
+}
+
+def resample_arc(path, n):
+    """折线按弧长均匀重采样为 n 个点"""
+    seg = np.hypot(*np.diff(path, axis=0).T)
+    s = np.concatenate(([0.0], np.cumsum(seg)))
+    if s[-1] <= 0: return np.repeat(path[:1], n, axis=0)
+    u = np.linspace(0.0, s[-1], n)
+    return np.stack([np.interp(u, s, path[:, 0]), np.interp(u, s, path[:, 1])], axis=1)
+
+def resample_time(path, ts, n):
+    """按时间均匀重采样为 n 个点 (ts 单调不减)"""
+    if ts[-1] <= ts[0]: return resample_arc(path, n)
+    u = np.linspace(ts[0], ts[-1], n)
+    return np.stack([np.interp(u, ts, path[:, 0]), np.interp(u, ts, path[:, 1])], axis=1)
+
+def dtw(cost, radius):
+    """
+    带宽约束的 DTW 累积代价 (symmetric2 步长：对角步代价计两次，总权重恒为 2n)
+    同一条反对角线 (i+j=k) 上的格子只依赖前两条反对角线。累积代价按反对角线斜置存放
+    (S[k, i] 即 D[i, k-i])，每条反对角线是一段连续切片，整段向量化递推，共 2n-1 次
+    :param cost: (n, n) 逐点代价矩阵 (行为轨迹，列为模板)
+    :param radius: |i-j| 上限 (带外为 inf)
+    :return: (2n+1, n+1) 斜置累积代价，S[2n, n] 为总代价
+    """
+    n = len(cost)
+    i, j = np.mgrid[1:n + 1, 1:n + 1]
+    band = np.abs(i - j) <= radius
+    C = np.full((2 * n + 1, n + 1), np.inf)
+    C[(i + j)[band], i[band]] = cost[band]
+    S = np.full((2 * n + 1, n + 1), np.inf)
+    S[0, 0] = 0.0
+    for k in range(2, 2 * n + 1):
+        lo, hi = max(1, k - n, (k - radius + 1) // 2), min(n, k - 1, (k + radius) // 2) + 1
+        c, prev = C[k, lo:hi], S[k - 1]
+        # D[i-1, j], D[i, j-1] 在上一条反对角线，D[i-1, j-1] 在上上条
+        S[k, lo:hi] = np.minimum(np.minimum(prev[lo - 1:hi - 1], prev[lo:hi]) + c, S[k - 2, lo - 1:hi - 1] + 2.0 * c)
+    return S
+
+def dtw_index_cost(S, cost):
+    """沿最优规整路径回溯，返回模板各点 (列) 上对齐代价的均值"""
+    n = len(cost)
+    total, cnt = np.zeros(n), np.zeros(n)
+    i = j = n
+    while i > 0 and j > 0:
+        total[j - 1] += cost[i - 1, j - 1]; cnt[j - 1] += 1
+        k = i + j
+        diag, up, left = S[k - 2, i - 1], S[k - 1, i - 1], S[k - 1, i]
+        if diag <= up and diag <= left: i -= 1; j -= 1
+        elif up <= left: i -= 1
+        else: j -= 1
+    return total / np.maximum(cnt, 1)
+
+class TrajectoryMatch:
+    """一轮轨迹的比对结果"""
+    __slots__ = ('distance', 'index_cost')
+    def __init__(self, distance, index_cost):
+        self.distance = distance     # 平均偏差 (模板尺度)
+        self.index_cost = index_cost # (n,) 模板各点的对齐偏差 (未登记分段诊断时为 None)
+
+class TrajectoryTracker:
+    """
+    :param template: TEMPLATES 中的名称或 [(x, y), ...] 折线 (躯干长度单位，以起点为原点)
+    :param strategy: 'dtw' (动态规整) | 'path' (路径距离)
+    :param band: DTW 带宽，占重采样点数的比例
+    :param fit: 缩放适配，按本轮行程幅度缩放到模板幅度 (消除肢体长度 / 动作幅度差异)
+    """
+    def __init__(self, template, strategy='dtw', band=None, fit=True, samples=None, capacity=None):
+        if isinstance(template, str):
+            if template not in TEMPLATES: raise ValueError(f"Unknown trajectory template: {template}")
+            template = TEMPLATES[template]
+        tpl = np.asarray(template, dtype=float)
+        if tpl.ndim != 2 or tpl.shape[1] != 2 or len(tpl) < 2:
+            raise ValueError(f"Trajectory template needs at least 2 (x, y) points, got {template!r}")
+        if strategy not in STRATEGIES: raise ValueError(f"Unknown trajectory strategy: {strategy}")
+        if band is None: band = AlgoConfig.TRAJECTORY_BAND
+        if samples is None: samples = AlgoConfig.TRAJECTORY_SAMPLES
+        if capacity is None: capacity = AlgoConfig.TRAJECTORY_BUFFER
+        self.strategy, self.fit, self.samples, self.capacity = strategy, fit, samples, capacity
+        self.radius = max(1, int(math.ceil(band * samples)))
+        self.template = resample_arc(tpl - tpl[0], samples)
+        self.extent = float(np.hypot(*np.ptp(self.template, axis=0)))
+        self.segments = False # 有分段诊断读取方时结束时回溯对齐路径
+        self.reset()
+
+    def reset(self):
+        cap = self.capacity
+        self.t = np.zeros(cap)
+        self.xy = np.full((cap, 2), np.nan)
+        self.scale = np.full(cap, np.nan)
+        self.count = 0
+        self.rep_start = None
+        self.last = None
+
+    # --- 每帧 ---
+    def push(self, t, p, scale=None):
+        """
+        :param p: 跟踪点坐标 (已换算为相对参考点)，缺失为 None
+        :param scale: 本帧躯干长度 (像素)，缺失为 None
+        """
+        i = self.count % self.capacity
+        self.t[i] = t
+        self.xy[i] = p if p else (np.nan, np.nan)
+        self.scale[i] = scale if scale else np.nan
+        self.count += 1
+
+    # --- 状态机切换 (与 TempoTracker 相同的调用约定) ---
+    def begin(self, t):
+        self.rep_start = self.count - 1
+
+    def cancel(self, t):
+        self.rep_start = None
+
+    def end(self, t):
+        """一轮结束 (当前帧已 push)：归一化、重采样并与模板比对"""
+        if self.rep_start is None: return None
+        n = min(self.count - self.rep_start, self.capacity)
+        idx = np.arange(self.count - n, self.count) % self.capacity
+        self.rep_start = None
+        xy, ts, sc = self.xy[idx], self.t[idx], self.scale[idx]
+        ok = ~np.isnan(xy[:, 0])
+        sc = sc[~np.isnan(sc)]
+        if ok.sum() < 2 or not len(sc):
+            self.last = None
+            return None
+
+        path = (xy[ok] - xy[ok][0]) / np.median(sc)
+        if self.fit:
+            ext = np.hypot(*np.ptp(path, axis=0))
+            if ext > 1e-6: path *= self.extent / ext
+        tpl, m = self.template, self.samples
+        if self.strategy == 'dtw':
+            path = resample_time(path, ts[ok], m)
+            cost = np.hypot(*(path[:, None, :] - tpl[None, :, :]).transpose(2, 0, 1))
+            S = dtw(cost, self.radius)
+            self.last = TrajectoryMatch(float(S[2 * m, m]) / (2 * m), dtw_index_cost(S, cost) if self.segments else None)
+        else:
+            path = resample_arc(path, m)
+            cost = np.hypot(*(path[:, None, :] - tpl[None, :, :]).transpose(2, 0, 1))
+            near = cost.min(axis=0) # 模板各点到轨迹的最近距离
+            self.last = TrajectoryMatch(float(cost.min(axis=1).mean() + near.mean()) / 2, near)
+        return self.last
+
+    # --- 度量 ---
+    def value(self, measure='score', segment=None, tolerance=None):
+        """
+        :param measure: 'score' 拟合度 (1 - 平均偏差 / tolerance，截断到 [0, 1]) | 'distance' 平均偏差
+        :param segment: (a, b) 只统计模板行程进度 [a, b] 区间 (分段诊断)
+        """
+        r = self.last
+        if r is None: d = 0.0
+        elif segment is None: d = r.distance
+        else:
+            lo, hi = (int(round(x * (self.samples - 1))) for x in segment)
+            d = float(r.index_cost[lo:hi + 1].mean()) if hi >= lo else 0.0
+        if measure == 'distance': return d
+        if tolerance is None: tolerance = AlgoConfig.TRAJECTORY_TOLERANCE
+        return min(max(1.0 - d / tolerance, 0.0), 1.0)
@@ -23,19 +23,16 @@ if platform.system() == 'Windows':
         except: pass
 
 import cv2
-import mediapipe as mp
 import numpy as np
 
 # 核心模块导入
 from core.config import AppConfig, TextConfig, ColorConfig, AlgoConfig, TUNING_TREE
 from core.camera import CameraLoader
-from core.sound import SoundManager
+from core.engine import Engine
+from core.pipeline import FramePipeline
+from core.pose_backend import create_pose_backend
 from ui.renderer import UIRenderer
-from utils.geometry import GeomUtils
-from utils.smoother import PointSmoother
-from logic.spine import SpineAnalyzer
-from logic.gatekeeper import Gatekeeper
-from exercises import PressExercise, SquatExercise, LungeExercise, FrontRaiseExercise, LateralRaiseExercise
+from ui.canvas import FrameCanvas
 
 # 尝试导入编辑器工具 (如果存在)
 try:
@@ -64,77 +61,6 @@ def get_client_rect_size(window_name):
     except: pass
     return AppConfig.W, AppConfig.H
 
-class Engine:
-    """健身动作核心引擎"""
-    def __init__(self):
-        self.sound = SoundManager()
-        self.exercises = {
-            TextConfig.ACT_PRESS: PressExercise(self.sound),
-            TextConfig.ACT_SQUAT: SquatExercise(self.sound),
-            TextConfig.ACT_RAISE: FrontRaiseExercise(self.sound),
-            TextConfig.ACT_LUNGE: LungeExercise(self.sound),
-            TextConfig.ACT_LATERAL_RAISE: LateralRaiseExercise(self.sound)
-        }
-        self.current_mode = TextConfig.ACT_PRESS
-        self.spine = SpineAnalyzer()
-        self.gatekeeper = Gatekeeper()
-        self.smoother = PointSmoother(alpha=AlgoConfig.SHRUG_SMOOTH_FACTOR)
-
-    def set_mode(self, mode_name):
-        if mode_name in self.exercises and mode_name != self.current_mode:
-            self.current_mode = mode_name
-            ex = self.exercises[self.current_mode]
-            ex.stage = "start"
-            ex.counter = 0
-            ex.bad_reps = 0
-            ex.feedback.error_counts.clear() 
-            ex.history = {}
-            ex.feedback.active_feedback.clear()
-            self.gatekeeper.last_act_time = time.time()
-
-    def update(self, pts, world_pts, h_val):
-        if not pts: return [], {}
-        
-        # 1. 平滑处理
-        pts = self.smoother.filter(pts)
-        
-        # 2. 脊柱物理分析
-        current_ex = self.exercises[self.current_mode]
-        self.spine.analyze(pts, stage=current_ex.stage)
-        
-        # 3. 动作门控检查 (是否在做当前动作)
-        if not self.gatekeeper.check(pts, self.current_mode, current_ex): 
-            return [], pts
-        
-        # 4. 动作计数与纠错
-        shared = {
-            'max_torso_len': self.spine.get_max_len(),
-            'rounding_bad': pts.get('rounding_bad', False),
-            'base_shrug_dist': 0 
-        }
-        vis = current_ex.process(pts, shared)
-        
-        # 5. 追加通用可视化 (如脊柱红线)
-        if pts.get('rounding_bad') and 'rounding' in current_ex.active_feedback:
-            vis.append({
-                'type': 'rounding_guide', 
-                'neck': pts['neck'], 'thorax': pts['thorax'], 
-                'waist': pts['waist'], 'hip': pts['hip']
-            })
-        return vis, pts
-
-    def get_ui_data(self):
-        ex = self.exercises[self.current_mode]
-        msg, col = ex.get_msg()
-        return {
-            'mode': self.current_mode, 
-            'count': ex.counter, 
-            'msg': msg, 
-            'msg_col': col, 
-            'errs': ex.feedback.error_counts, 
-            'bad': ex.bad_reps
-        }
-
 def flatten_tuning_tree(mode, params_dict):
     """将树状配置展平为列表，用于 UI 点击检测"""
     flat = []
@@ -157,14 +83,20 @@ def flatten_tuning_tree(mode, params_dict):
 
 def main():
     # 1. 初始化摄像头
-    loader = CameraLoader(0, AppConfig.W, AppConfig.H)
+    loader = CameraLoader(0, AppConfig.W, AppConfig.H, panel_size=(AppConfig.HALF_W, AppConfig.H)) # 采集线程直接输出左侧面板
     time.sleep(0.1)
     if not loader.ret and not loader.is_video:
         print("Camera not ready."); time.sleep(1.0)
     
     # 2. 初始化 AI 模型与引擎
-    pose = mp.solutions.pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6, model_complexity=1)
+    pose_complexity = 1
+    pose_backend = create_pose_backend(AppConfig.POSE_BACKEND, pose_complexity) # [Mod] 后端由配置选择 (同步 / LIVE_STREAM)
     engine = Engine()
+    # [New] 采集 / 推理 / 引擎更新各自独立线程，主线程只做绘制与显示
+    # (推理阶段内置关键点缓存：播放已离线分析过的视频时直接读取缓存，跳过推理)
+    pipeline = FramePipeline(loader, pose_backend, engine, model_complexity=pose_complexity).start()
+    last_pkt = None
+    canvas = FrameCanvas() # 复用的合成 / 显示缓冲
     ui = UIRenderer()
     
     # UI 状态变量
@@ -290,7 +222,9 @@ def main():
                 elif menu_open and hit and hit.startswith('menu_item_'):
                     idx = int(hit.split('_')[2])
                     modes = [TextConfig.ACT_PRESS, TextConfig.ACT_SQUAT, TextConfig.ACT_RAISE, TextConfig.ACT_LUNGE, TextConfig.ACT_LATERAL_RAISE] # [New]
-                    if 0 <= idx < len(modes): engine.set_mode(modes[idx]); menu_open = False
+                    if 0 <= idx < len(modes):
+                        with pipeline.engine_lock: engine.set_mode(modes[idx])
+                        menu_open = False
                 
                 elif hit == 'btn_cam': loader.switch_source(0)
                 
@@ -328,50 +262,27 @@ def main():
     # 主循环
     # =====================================================================
     while loader.running:
-        ret, frame = loader.read()
-        if not ret or frame is None: 
+        # 取最新处理完的帧；暂无新帧时沿用上一帧 (暂停/等待期间界面仍需刷新)
+        pkt = pipeline.get_result(timeout=1/30)
+        if pkt is not None:
+            pipeline.release(last_pkt) # 上一帧面板归还缓冲池
+            # 计算 FPS (按新帧到达间隔)
+            curr_time = time.time()
+            fps = int(1/(curr_time-prev_time)) if curr_time>prev_time else 0
+            prev_time = curr_time
+            last_pkt = pkt
+
+        if last_pkt is None: 
             blank = np.zeros((AppConfig.H, AppConfig.W, 3), dtype=np.uint8)
             cv2.putText(blank, "No Signal / Loading...", (50, AppConfig.H//2), cv2.FONT_HERSHEY_SIMPLEX, 1, (255,255,255), 2)
             cv2.imshow(TextConfig.WINDOW_NAME, blank)
             if cv2.waitKey(1) & 0xFF == 27: break
-            time.sleep(0.01); continue
-            
-        # 尺寸适配
-        h, w = frame.shape[:2]
-        if h != AppConfig.H: 
-            scale = AppConfig.H / h; w = int(w * scale); h = AppConfig.H
-            frame = cv2.resize(frame, (w, h))
-        
-        # 左右分屏准备
-        f_l = np.zeros((AppConfig.H, AppConfig.HALF_W, 3), dtype=np.uint8)
-        if w >= AppConfig.HALF_W: 
-            sx = (w - AppConfig.HALF_W) // 2
-            f_l = frame[:, sx : sx + AppConfig.HALF_W].copy()
-        else: 
-            sx = (AppConfig.HALF_W - w) // 2
-            f_l[:, sx : sx + w] = frame
-        
-        f_l = cv2.flip(f_l, 1) # 镜像
-        f_r = np.zeros((AppConfig.H, AppConfig.HALF_W, 3), dtype=np.uint8) + 20 # 右侧背景
-        
-        # 计算 FPS
-        curr_time = time.time()
-        fps = int(1/(curr_time-prev_time)) if curr_time>prev_time else 0
-        prev_time = curr_time
-        
-        # MediaPipe 推理
-        res = pose.process(cv2.cvtColor(f_l, cv2.COLOR_BGR2RGB))
-        pts = {}
-        if res.pose_landmarks:
-             # 映射关键点
-             for i, n in {11:'ls',12:'rs',13:'le',14:'re',15:'lw',16:'rw',23:'lh',24:'rh',25:'lk',26:'rk',27:'la',28:'ra',31:'lf',32:'rf',0:'nose'}.items():
-                 lm = res.pose_landmarks.landmark[i]
-                 if lm.visibility > 0.5: 
-                     pts[n] = (int(lm.x*AppConfig.HALF_W), int(lm.y*AppConfig.H))
-        
-        # 引擎更新
-        vis, pts = engine.update(pts, None, float(h_str) if h_str else 180.0)
-        data = engine.get_ui_data()
+            continue
+
+        # 骨骼与特效叠加在推理所用的同一帧上 (FramePacket 携带面板图像)
+        pts, vis, data = last_pkt.pts, last_pkt.vis, last_pkt.data
+        f_l, f_r = canvas.begin(last_pkt.panel) # 左右两半为合成画面的视图，绘制直接写入 final
+        pipeline.h_val = float(h_str) if h_str else 180.0
         
         # 绘制层
         # 左侧：原始骨骼 (Debug用)
@@ -386,8 +297,8 @@ def main():
         if loader.is_video: 
             ui.draw_video_bar(f_l, loader.get_progress(), loader.paused)
         
-        # 合成最终画面
-        final = np.hstack((f_l, f_r))
+        # 合成最终画面 (无需拼接)
+        final = canvas.final
         
         # 绘制 HUD
         # [Fix] 传入当前引擎支持的动作列表
@@ -413,16 +324,7 @@ def main():
         
         # 显示到窗口
         win_w, win_h = get_client_rect_size(TextConfig.WINDOW_NAME)
-        scale_w = win_w / AppConfig.W
-        scale_h = win_h / AppConfig.H
-        scale = min(scale_w, scale_h)
-        rw, rh = int(AppConfig.W * scale), int(AppConfig.H * scale)
-        off_x, off_y = (win_w - rw) // 2, (win_h - rh) // 2
-        
-        final_disp = np.zeros((win_h, win_w, 3), dtype=np.uint8)
-        if rw > 0 and rh > 0:
-            final_disp[off_y:off_y+rh, off_x:off_x+rw] = cv2.resize(final, (rw, rh))
-        cv2.imshow(TextConfig.WINDOW_NAME, final_disp)
+        cv2.imshow(TextConfig.WINDOW_NAME, canvas.display(win_w, win_h))
         
         # 按键处理
         key = cv2.waitKey(1)
@@ -457,6 +359,6 @@ def main():
                         except: pass
                         tuning_open = False
 
-    loader.release(); cv2.destroyAllWindows()
+    pipeline.stop(); pose_backend.close(); loader.release(); cv2.destroyAllWindows()
 
 if __name__ == "__main__": main()
\ No newline at end of file
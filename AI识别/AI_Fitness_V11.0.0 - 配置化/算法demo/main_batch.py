@@ -0,0 +1,64 @@
+"""
+离线批量评测入口 (Headless Batch Mode)
+用法示例:
+    python main_batch.py videos/ --mode squat --json report.json --csv report.csv
+    python main_batch.py long.mp4 --mode press --workers 16 --chunk-sec 60 --warmup-sec 5
+    python main_batch.py videos/ --mode squat --replay
+    首次运行会写入关键点缓存，之后调整 AlgoConfig 重新回放同一批视频将跳过推理。
+    --config 评测 JSON 配置版动作 (深蹲 / 推举)；--replay 同时在缓存命中时整段向量化回放 (offline/replay.py)。
+"""
+import sys
+import os
+import argparse
+
+# =========================================================================
+# 路径与环境配置
+# =========================================================================
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from offline.pipeline import MODE_ALIASES, collect_videos, resolve_mode, write_json, write_csv
+from offline.scheduler import run_batch
+from offline.landmark_cache import DEFAULT_CACHE_DIR
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="AEKE Fitness 离线批量视频分析")
+    ap.add_argument('inputs', nargs='+', help="视频文件或目录")
+    ap.add_argument('--mode', required=True, help=f"动作类型: {', '.join(MODE_ALIASES)} 或中文动作名")
+    ap.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    ap.add_argument('--workers', type=int, default=0, help="并行进程数 (默认 CPU 核数, 1 为单进程)")
+    ap.add_argument('--chunk-sec', type=float, default=0.0, help="长视频切片时长(秒), 0 表示不切片")
+    ap.add_argument('--warmup-sec', type=float, default=5.0, help="切片预热时长(秒), 应大于单次动作耗时")
+    ap.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="关键点缓存目录")
+    ap.add_argument('--no-cache', action='store_true', help="禁用关键点缓存 (强制重新推理)")
+    ap.add_argument('--config', action='store_true', help="评测 JSON 配置版动作 (深蹲 / 推举)")
+    ap.add_argument('--replay', action='store_true', help="评测配置版动作，缓存命中时整段向量化回放")
+    ap.add_argument('--json', dest='json_path', help="JSON 报告输出路径")
+    ap.add_argument('--csv', dest='csv_path', help="CSV 逐轮明细输出路径")
+    return ap
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    videos = collect_videos(args.inputs)
+    if not videos:
+        print("No video found."); return 1
+
+    mode = resolve_mode(args.mode)
+
+    def on_result(r):
+        print(f"[Batch] {os.path.basename(r['video'])} [{r['start_frame']}, {r['end_frame']}): "
+              f"count={r['count']} bad={r['bad_reps']} frames={r['frames']} fps={r['timing']['fps']} cache={r['cache']}")
+
+    report = run_batch(videos, mode, workers=args.workers or None, chunk_sec=args.chunk_sec,
+                       warmup_sec=args.warmup_sec, model_complexity=args.model_complexity,
+                       cache_dir=None if args.no_cache else args.cache_dir, on_result=on_result, config=args.config, replay=args.replay)
+    s = report['summary']
+    print(f"[Batch] {s['videos']} videos / {s['jobs']} jobs on {s['workers']} workers: "
+          f"count={s['count']} bad={s['bad_reps']} wall={s['wall_time']}s fps={s['fps']}")
+
+    if args.json_path: write_json(report, args.json_path)
+    if args.csv_path: write_csv(report['clips'], args.csv_path)
+    return 0
+
+if __name__ == "__main__": sys.exit(main())
@@ -23,17 +23,21 @@ if platform.system() == 'Windows':
         except: pass
 
 import cv2
-import mediapipe as mp
-import numpy as np
 
 # 核心模块导入
 from core.config import AppConfig, TextConfig, ColorConfig, AlgoConfig
 from core.camera import CameraLoader
+from core.clock import SystemClock
 from core.sound import SoundManager
 from ui.renderer import UIRenderer
+from ui.canvas import FrameCanvas
 from utils.smoother import PointSmoother
+from utils.gap_filler import GapFiller
+from core.engine import extract_keypoints_array
+from core.pose_backend import create_pose_backend
 from logic.spine import SpineAnalyzer
 from logic.gatekeeper import Gatekeeper
+from exercises.config_compiler import TIERS, tier_index
 
 # [核心修改] 仅导入配置驱动版动作类
 try:
@@ -70,17 +74,20 @@ class Engine:
     """健身动作核心引擎 (纯配置版)"""
     def __init__(self):
         self.sound = SoundManager()
+        self.clock = SystemClock() # 单线程实时循环，直接使用墙上时钟
         
         # [核心修改] 仅注册配置版动作
         self.exercises = {
-            TextConfig.ACT_PRESS: PressExerciseConfig(self.sound),
-            TextConfig.ACT_SQUAT: SquatExerciseConfig(self.sound),
+            TextConfig.ACT_PRESS: PressExerciseConfig(self.sound, self.clock),
+            TextConfig.ACT_SQUAT: SquatExerciseConfig(self.sound, self.clock),
         }
         # 默认启动第一个
         self.current_mode = list(self.exercises.keys())[0]
         self.spine = SpineAnalyzer()
-        self.gatekeeper = Gatekeeper()
-        self.smoother = PointSmoother(alpha=AlgoConfig.SHRUG_SMOOTH_FACTOR)
+        self.gatekeeper = Gatekeeper(self.clock)
+        self.smoother = PointSmoother()
+        self.gap_filler = GapFiller() # [New] 短时遮挡补点
+        self.tier = AlgoConfig.TOLERANCE_TIER
 
     def set_mode(self, mode_name):
         if mode_name in self.exercises and mode_name != self.current_mode:
@@ -100,12 +107,20 @@ class Engine:
             if hasattr(ex, 'fix_memory'): ex.fix_memory = {}
             if hasattr(ex, 'last_rep_results'): ex.last_rep_results = {}
             
-            self.gatekeeper.last_act_time = time.time()
+            self.gatekeeper.last_act_time = self.clock.now()
+
+    def set_tier(self, tier):
+        """[New] 切换容忍度档位 (严格 / 标准 / 宽松)：所有配置版动作立即生效，不重新加载配置"""
+        for ex in self.exercises.values():
+            if hasattr(ex, 'set_tier'): ex.set_tier(tier)
+        self.tier = tier
 
     def update(self, pts):
-        if not pts: return [], {}
+        if not pts: return [], pts
         
-        pts = self.smoother.filter(pts)
+        now = self.clock.now()
+        if AlgoConfig.GAP_FILL_ENABLE: pts = self.gap_filler.fill(pts, now)
+        pts = self.smoother.filter(pts, now)
         current_ex = self.exercises[self.current_mode]
         self.spine.analyze(pts, stage=current_ex.stage)
         
@@ -142,13 +157,14 @@ class Engine:
 # =========================================================================
 
 def main():
-    loader = CameraLoader(0, AppConfig.W, AppConfig.H)
+    loader = CameraLoader(0, AppConfig.W, AppConfig.H, panel_size=(AppConfig.HALF_W, AppConfig.H)) # 采集线程直接输出左侧面板
     time.sleep(0.1)
     if not loader.ret and not loader.is_video:
         print("Camera not ready."); time.sleep(1.0)
     
-    pose = mp.solutions.pose.Pose(min_detection_confidence=0.6, min_tracking_confidence=0.6, model_complexity=1)
+    pose_backend = create_pose_backend(AppConfig.POSE_BACKEND, 1)
     engine = Engine()
+    vis, pts = [], extract_keypoints_array(None) # [New] 异步后端：最近一次取回结果的引擎输出
     ui = UIRenderer()
     
     menu_open = False
@@ -203,38 +219,27 @@ def main():
 
     cv2.setMouseCallback(WINDOW_TITLE, mouse_cb)
     
+    canvas = FrameCanvas() # 复用的合成 / 显示缓冲
     while loader.running:
-        ret, frame = loader.read()
+        ret, frame, _, _ = loader.read_view() # 采集环形缓冲中已裁剪镜像的面板 (只读视图)，立即拷入画布
         if not ret or frame is None: 
             time.sleep(0.01); continue
             
-        h, w = frame.shape[:2]
-        if h != AppConfig.H: 
-            scale = AppConfig.H / h; w = int(w * scale); h = AppConfig.H
-            frame = cv2.resize(frame, (w, h))
-        
-        f_l = np.zeros((AppConfig.H, AppConfig.HALF_W, 3), dtype=np.uint8)
-        if w >= AppConfig.HALF_W: 
-            sx = (w - AppConfig.HALF_W) // 2
-            f_l = frame[:, sx : sx + AppConfig.HALF_W].copy()
-        else: 
-            sx = (AppConfig.HALF_W - w) // 2
-            f_l[:, sx : sx + w] = frame
-        f_l = cv2.flip(f_l, 1)
-        f_r = np.zeros((AppConfig.H, AppConfig.HALF_W, 3), dtype=np.uint8) + 20
+        f_l, f_r = canvas.begin(frame)
         
         curr_time = time.time()
         fps = int(1/(curr_time-prev_time)) if curr_time>prev_time else 0
         prev_time = curr_time
         
-        res = pose.process(cv2.cvtColor(f_l, cv2.COLOR_BGR2RGB))
-        pts = {}
-        if res.pose_landmarks:
-             for i, n in {11:'ls',12:'rs',13:'le',14:'re',15:'lw',16:'rw',23:'lh',24:'rh',25:'lk',26:'rk',27:'la',28:'ra',0:'nose'}.items():
-                 lm = res.pose_landmarks.landmark[i]
-                 if lm.visibility > 0.5: pts[n] = (int(lm.x*AppConfig.HALF_W), int(lm.y*AppConfig.H))
-        
-        vis, pts = engine.update(pts)
+        rgb = cv2.cvtColor(f_l, cv2.COLOR_BGR2RGB)
+        if pose_backend.asynchronous:
+            # [New] LIVE_STREAM：提交后不等待，本帧绘制最近一次取回结果的引擎输出；结果到达即按到达顺序更新引擎
+            pose_backend.submit(rgb, curr_time)
+            for res in pose_backend.poll():
+                vis, pts = engine.update(extract_keypoints_array(res.lm))
+        else:
+            res = pose_backend.process(rgb, curr_time)
+            vis, pts = engine.update(extract_keypoints_array(res.lm))
         data = engine.get_ui_data()
         
         ui.draw_skeleton(f_l, pts, False); ui.draw_visuals(f_l, vis)
@@ -242,7 +247,7 @@ def main():
         
         if loader.is_video: ui.draw_video_bar(f_l, loader.get_progress(), loader.paused)
         
-        final = np.hstack((f_l, f_r))
+        final = canvas.final
         
         # [核心修改] 简化UI调用，移除typing和tuning相关
         # [Fix] 传入当前引擎支持的动作列表
@@ -250,16 +255,15 @@ def main():
         ui.draw_all_text_layers(final, data['mode'], data['count'], fps, menu_open, "180", False, data['msg'], data['msg_col'], data['errs'], data['bad'], loader.is_video, loader.paused, menu_items=available_modes)
         
         win_w, win_h = get_client_rect_size(WINDOW_TITLE)
-        scale = min(win_w / AppConfig.W, win_h / AppConfig.H)
-        rw, rh = int(AppConfig.W * scale), int(AppConfig.H * scale)
-        off_x, off_y = (win_w - rw) // 2, (win_h - rh) // 2
-        
-        final_disp = np.zeros((win_h, win_w, 3), dtype=np.uint8)
-        if rw > 0 and rh > 0: final_disp[off_y:off_y+rh, off_x:off_x+rw] = cv2.resize(final, (rw, rh))
-        cv2.imshow(WINDOW_TITLE, final_disp)
+        cv2.imshow(WINDOW_TITLE, canvas.display(win_w, win_h))
         
-        if cv2.waitKey(1) & 0xFF == 27: break
+        key = cv2.waitKey(1) & 0xFF
+        if key == 27: break
+        # [New] 快捷键 'T': 循环切换容忍度档位 (严格 -> 标准 -> 宽松)
+        if key in (ord('t'), ord('T')):
+            engine.set_tier(TIERS[(tier_index(engine.tier) + 1) % len(TIERS)])
+            print(f"[Config] Tolerance tier -> {engine.tier}")
 
-    loader.release(); cv2.destroyAllWindows()
+    pose_backend.close(); loader.release(); cv2.destroyAllWindows()
 
 if __name__ == "__main__": main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+姿态模板库构建入口 (Pose Template Library)
+由教练示范片段 (已写入关键点缓存，见 main_batch.py) 构建姿态相似型错误项使用的模板库。
+用法示例:
+    python main_pose_templates.py coach_plank.mp4 --out plank_std
+    python main_pose_templates.py squat_a.mp4 squat_b.mp4 --start 3.0 --end 4.5 --out squat_bottom --max-templates 32
+输出 <POSE_TEMPLATE_DIR>/<out>.npz，动作配置中以 "library": "<out>" 引用 (见 logic/pose_similarity.py)。
+"""
+import sys
+import os
+import argparse
+
+# =========================================================================
+# 路径与环境配置
+# =========================================================================
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import numpy as np
+from core.config import AlgoConfig
+from offline.landmark_cache import LandmarkCache, DEFAULT_CACHE_DIR
+from offline.replay import PoseSeries
+from logic.pose_similarity import PoseLibrary, embed, library_path
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="AEKE Fitness 姿态模板库构建")
+    ap.add_argument('videos', nargs='+', help="示范视频 (需已有关键点缓存)")
+    ap.add_argument('--out', required=True, help="模板库名或 .npz 路径")
+    ap.add_argument('--start', type=float, default=0.0, help="每个视频截取的起始时间 (秒)")
+    ap.add_argument('--end', type=float, default=None, help="每个视频截取的结束时间 (秒)，默认到结尾")
+    ap.add_argument('--step', type=int, default=1, help="每隔 N 帧取一帧")
+    ap.add_argument('--max-templates', type=int, default=AlgoConfig.POSE_MAX_TEMPLATES)
+    ap.add_argument('--min-dist', type=float, default=AlgoConfig.POSE_TEMPLATE_MIN_DIST, help="模板间最小偏差 (单位 180°)")
+    ap.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    ap.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="关键点缓存目录")
+    return ap
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    embs, labels = [], []
+    for video in args.videos:
+        if not os.path.isfile(video):
+            print(f"[Templates] Video not found: {video}"); return 1
+        cache = LandmarkCache.load(video, args.model_complexity, args.cache_dir)
+        if cache is None:
+            print(f"[Templates] No landmark cache for {video}, run main_batch.py on it first."); return 1
+        start = int(args.start * cache.fps)
+        end = None if args.end is None else int(args.end * cache.fps)
+        series = PoseSeries.from_cache(cache, start, end)
+        idx = np.flatnonzero(series.present)[::max(args.step, 1)]
+        embs.append(embed(series.xy[idx]))
+        labels += [f"{os.path.basename(video)}@{f}" for f in series.frames[idx].tolist()]
+        print(f"[Templates] {os.path.basename(video)}: {len(idx)} frames")
+    if not labels:
+        print("[Templates] No frame with a detected pose."); return 1
+
+    lib = PoseLibrary.from_frames(np.concatenate(embs), labels, args.max_templates, args.min_dist)
+    path = library_path(args.out) if not args.out.endswith('.npz') else args.out
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    lib.save(path)
+    print(f"[Templates] {len(lib)} templates from {len(labels)} frames -> {path}")
+    return 0
+
+if __name__ == "__main__": sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+批量自动调参入口 (Auto-Tuning)
+用法示例:
+    python main_tune.py labels/squat.json --search random --trials 200 --out tune_squat.json
+    python main_tune.py labels/squat.json --search refine --trials 32 --rounds 5 --param VALGUS_RATIO=1.0:1.5
+标注文件格式见 offline/tuner.py。
+"""
+import sys
+import os
+import json
+import argparse
+
+# =========================================================================
+# 路径与环境配置
+# =========================================================================
+project_root = os.path.dirname(os.path.abspath(__file__))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from offline.landmark_cache import DEFAULT_CACHE_DIR
+from offline.tuner import load_labels, default_space, parse_param_spec, tune
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="AEKE Fitness 批量自动调参")
+    ap.add_argument('labels', help="标注文件 (JSON)")
+    ap.add_argument('--search', default='random', choices=['grid', 'random', 'refine'])
+    ap.add_argument('--trials', type=int, default=64, help="试验数上限 (refine 为每轮试验数)")
+    ap.add_argument('--levels', type=int, default=5, help="grid 模式每个参数的取值个数")
+    ap.add_argument('--rounds', type=int, default=4, help="refine 模式的收缩轮数")
+    ap.add_argument('--param', action='append', default=[], help="自定义参数区间 NAME=lo:hi 或 NAME=bool，可多次指定")
+    ap.add_argument('--only-params', action='store_true', help="只搜索 --param 指定的参数 (默认与 TUNING_TREE 合并)")
+    ap.add_argument('--count-weight', type=float, default=0.5, help="得分中计次准确率的权重 (其余为纠错 F1)")
+    ap.add_argument('--workers', type=int, default=0, help="并行进程数 (默认 CPU 核数)")
+    ap.add_argument('--model-complexity', type=int, default=1, choices=[0, 1, 2])
+    ap.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="关键点缓存目录")
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--top', type=int, default=10, help="打印前 N 组结果")
+    ap.add_argument('--out', help="JSON 报告输出路径")
+    return ap
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    mode, clips = load_labels(args.labels)
+    custom = dict(parse_param_spec(p) for p in args.param)
+    space = custom if args.only_params else {**default_space(mode), **custom}
+
+    def on_trial(i, r):
+        print(f"[Tune] #{i:<4} score={r['score']:.4f} count={r['count_acc']:.3f} f1={r['f1']:.3f} {r['params']}")
+
+    report = tune(mode, clips, space=space, search=args.search, trials=args.trials, levels=args.levels,
+                  rounds=args.rounds, workers=args.workers or None, model_complexity=args.model_complexity,
+                  cache_dir=args.cache_dir, count_weight=args.count_weight, seed=args.seed, on_trial=on_trial)
+
+    base, best = report['baseline'], report['best']
+    print(f"\n[Tune] {len(report['trials'])} trials on {len(clips)} clips in {report['wall_time']}s")
+    print(f"[Tune] baseline score={base['score']:.4f} (count={base['count_acc']:.3f} f1={base['f1']:.3f})")
+    print(f"[Tune] best     score={best['score']:.4f} (count={best['count_acc']:.3f} f1={best['f1']:.3f})")
+    for r in report['trials'][:args.top]:
+        print(f"    {r['score']:.4f}  P={r['precision']:.3f} R={r['recall']:.3f}  {r['params']}")
+    print("\n# AlgoConfig 建议值")
+    for k, v in best['params'].items():
+        print(f"{k} = {v!r}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
+
+if __name__ == "__main__": sys.exit(main())
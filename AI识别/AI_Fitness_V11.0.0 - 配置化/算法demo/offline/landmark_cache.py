@@ -0,0 +1,132 @@
+"""
+姿态关键点缓存 (Pose Landmark Cache)
+调参回放时只有下游逻辑在变，MediaPipe 推理结果完全相同。
+首次分析视频时将每帧 33 个关键点落盘，之后同一视频 + 同一 model_complexity 的回放
+直接从内存映射数组读取，跳过解码与推理，Engine 可以数千帧/秒的速度运行。
+
+缓存目录结构 (每个视频一个子目录，键 = 内容哈希 + 模型复杂度 + 面板尺寸)：
+    <cache_dir>/<key>/
+        landmarks.npy   (N, 33, 4) float32  归一化 [x, y, z, visibility] (面板坐标系)
+        world.npy       (N, 33, 4) float32  世界坐标 [x, y, z, visibility] (米)
+        valid.npy       (N,) bool           该帧是否检测到人体
+        meta.json       版本 / 帧率 / 帧数 / 源视频信息
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+from core.config import AppConfig
+
+CACHE_VERSION = 1
+NUM_LANDMARKS = 33
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'landmarks')
+
+# 进程内摘要缓存 (path, size, mtime) -> sha1，避免同一会话重复哈希大文件
+_DIGEST_MEMO = {}
+
+def file_digest(path, block=1 << 20):
+    """视频文件内容 SHA1 (改名/移动文件后缓存仍可命中)"""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime)
+    if memo_key in _DIGEST_MEMO: return _DIGEST_MEMO[memo_key]
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    digest = h.hexdigest()
+    _DIGEST_MEMO[memo_key] = digest
+    return digest
+
+def cache_key(video_path, model_complexity=1):
+    """
+    缓存键。关键点是在裁剪后的左侧面板上推理得到的，
+    面板尺寸变化 (AppConfig.HALF_W / H) 会改变推理输入，因此一并纳入键中。
+    """
+    return f"{file_digest(video_path)}_mc{model_complexity}_{AppConfig.HALF_W}x{AppConfig.H}"
+
+class LandmarkCache:
+    """只读缓存 (数组以 mmap 方式打开，按需分页加载)"""
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self.fps = meta['fps']
+        self.landmarks = np.load(os.path.join(path, 'landmarks.npy'), mmap_mode='r')
+        self.world = np.load(os.path.join(path, 'world.npy'), mmap_mode='r')
+        self.valid = np.load(os.path.join(path, 'valid.npy'), mmap_mode='r')
+
+    @classmethod
+    def load(cls, video_path, model_complexity=1, cache_dir=DEFAULT_CACHE_DIR):
+        """命中返回 LandmarkCache，未命中 (或版本不符) 返回 None"""
+        path = os.path.join(cache_dir, cache_key(video_path, model_complexity))
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.isfile(meta_path): return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f: meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('version') != CACHE_VERSION: return None
+        return cls(path, meta)
+
+    def __len__(self):
+        return len(self.valid)
+
+    def frame(self, idx):
+        """返回 (landmarks, world)；未检测到人体或越界时为 (None, None)"""
+        if idx < 0 or idx >= len(self.valid) or not self.valid[idx]: return None, None
+        return self.landmarks[idx], self.world[idx]
+
+    def iter_frames(self, start_frame=0, end_frame=None):
+        """与 VideoFrameReader 对齐的迭代接口：产出 (帧序号, 时间戳秒, landmarks, world)"""
+        end = len(self) if end_frame is None else min(int(end_frame), len(self))
+        for idx in range(max(0, int(start_frame)), end):
+            lm, world = self.frame(idx)
+            yield idx, idx / self.fps, lm, world
+
+class LandmarkRecorder:
+    """
+    逐帧收集推理结果，完整跑完一遍视频后一次性写入缓存。
+    写入先落到临时目录再原子重命名，多个进程同时写同一视频时互不损坏。
+    """
+    def __init__(self):
+        self.landmarks, self.world, self.valid = [], [], []
+
+    def add(self, lm_arr, world_arr=None):
+        ok = lm_arr is not None
+        self.valid.append(ok)
+        self.landmarks.append(lm_arr if ok else np.zeros((NUM_LANDMARKS, 4), np.float32))
+        self.world.append(world_arr if (ok and world_arr is not None) else np.zeros((NUM_LANDMARKS, 4), np.float32))
+
+    def save(self, video_path, model_complexity, fps, cache_dir=DEFAULT_CACHE_DIR):
+        key = cache_key(video_path, model_complexity)
+        final = os.path.join(cache_dir, key)
+        if os.path.isdir(final): return final
+        tmp = os.path.join(cache_dir, f".{key}.{os.getpid()}.tmp")
+        os.makedirs(tmp, exist_ok=True)
+        n = len(self.valid)
+        shape = (n, NUM_LANDMARKS, 4)
+        try:
+            for name, data in (('landmarks.npy', self.landmarks), ('world.npy', self.world)):
+                arr = np.lib.format.open_memmap(os.path.join(tmp, name), mode='w+', dtype=np.float32, shape=shape)
+                if n: arr[:] = np.stack(data)
+                arr.flush(); del arr
+            np.save(os.path.join(tmp, 'valid.npy'), np.asarray(self.valid, dtype=bool))
+            meta = {
+                'version': CACHE_VERSION,
+                'video': os.path.basename(video_path),
+                'digest': file_digest(video_path),
+                'model_complexity': model_complexity,
+                'panel': [AppConfig.HALF_W, AppConfig.H],
+                'fps': fps,
+                'frames': n,
+                'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, final)
+        except OSError:
+            # 目标已被其他进程写入 (或磁盘错误)：丢弃本次临时结果
+            shutil.rmtree(tmp, ignore_errors=True)
+        return final
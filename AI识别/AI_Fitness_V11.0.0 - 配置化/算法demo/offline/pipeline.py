@@ -0,0 +1,230 @@
+"""
+离线批量视频分析管线 (Headless Batch Pipeline)
+不创建任何窗口、不做实时节拍等待，按 CPU 最快速度将录制视频逐帧送入：
+MediaPipe Pose -> PointSmoother -> SpineAnalyzer -> Gatekeeper -> Exercise，
+输出每轮计次、错误标记与各阶段耗时，供夜间回归评测使用。
+若关键点缓存命中 (offline/landmark_cache.py)，则跳过解码与推理，直接回放缓存关键点。
+config 模式评测 JSON 配置版动作 (CONFIG_EXERCISES)；replay 模式在此基础上，缓存命中时走整段向量化回放
+(offline/replay.py)，未命中时仍逐帧驱动 Engine，两条路径的逐轮结果一致 (见 tests/test_replay.py)。
+"""
+import csv
+import json
+import os
+import time
+import cv2
+from core.config import TextConfig
+from core.camera import VideoFrameReader, crop_mirror_panel
+from core.engine import Engine, extract_keypoints_array
+from core.pose_backend import SolutionsPoseBackend
+from core.clock import FrameClock
+from core.sound import SilentSoundManager
+from exercises.press_config import PressExerciseConfig
+from exercises.squat_config import SquatExerciseConfig
+from offline.landmark_cache import LandmarkCache, LandmarkRecorder, DEFAULT_CACHE_DIR
+
+# 命令行友好的动作别名 -> 引擎内部动作名
+MODE_ALIASES = {
+    'press': TextConfig.ACT_PRESS,
+    'squat': TextConfig.ACT_SQUAT,
+    'front_raise': TextConfig.ACT_RAISE,
+    'lunge': TextConfig.ACT_LUNGE,
+    'lateral_raise': TextConfig.ACT_LATERAL_RAISE,
+}
+
+# 有 JSON 配置版实现的动作 (config / replay 模式)
+CONFIG_EXERCISES = {
+    TextConfig.ACT_PRESS: PressExerciseConfig,
+    TextConfig.ACT_SQUAT: SquatExerciseConfig,
+}
+
+VIDEO_EXTS = ('.mp4', '.avi', '.mov', '.mkv')
+
+def resolve_mode(name):
+    """支持英文别名或中文动作名"""
+    mode = MODE_ALIASES.get(name, name)
+    if mode not in MODE_ALIASES.values():
+        raise ValueError(f"Unknown exercise mode: {name}")
+    return mode
+
+def collect_videos(paths):
+    """展开目录，返回排序后的视频文件列表"""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, names in os.walk(p):
+                files.extend(os.path.join(root, n) for n in names if n.lower().endswith(VIDEO_EXTS))
+        else:
+            files.append(p)
+    return sorted(files)
+
+def create_pose(model_complexity=1):
+    """创建同步姿态估计后端 (延迟导入 mediapipe，回放缓存时无需加载模型)"""
+    return SolutionsPoseBackend(model_complexity)
+
+class OfflineAnalyzer:
+    """
+    单路离线分析器：持有一个姿态估计后端 (PoseBackend) 与一个 Engine。
+    同一实例可顺序分析多个视频 (每个视频开始前重建 Engine，保证状态互不污染)。
+    :param cache_dir: 关键点缓存目录，None 表示禁用缓存
+    :param config: 评测配置版动作 (CONFIG_EXERCISES) 而非经典实现
+    :param replay: 缓存命中时整段向量化回放 (隐含 config)
+    """
+    def __init__(self, mode, model_complexity=1, pose=None, cache_dir=DEFAULT_CACHE_DIR, config=False, replay=False):
+        self.mode = resolve_mode(mode)
+        self.config = config or replay
+        if self.config and self.mode not in CONFIG_EXERCISES:
+            raise ValueError(f"No config-driven exercise for mode: {mode}")
+        self.model_complexity = model_complexity
+        self.cache_dir = cache_dir
+        self.replay = replay
+        self._pose = pose
+
+    @property
+    def pose(self):
+        # 延迟创建：全部命中缓存时无需加载模型
+        if self._pose is None: self._pose = create_pose(self.model_complexity)
+        return self._pose
+
+    def _new_engine(self, t0=0.0):
+        # 帧时钟从首帧时间戳开始，随视频时间戳推进 (按解码速度回放时计时仍按视频时间)
+        # [Fix] 切片任务的首帧时间戳不为 0，时钟若从 0 起步，门控超时会在切片第一帧误触发
+        engine = Engine(sound_mgr=SilentSoundManager(), clock=FrameClock(t0))
+        if self.config: engine.exercises[self.mode] = CONFIG_EXERCISES[self.mode](engine.sound, engine.clock)
+        engine.set_mode(self.mode)
+        return engine
+
+    def analyze(self, video_path, start_frame=0, end_frame=None, record_from=None):
+        """
+        分析单个视频 (或其中 [start_frame, end_frame) 区间)
+        :param record_from: 预热截止帧。此帧之前只驱动状态机 (基准校准/跟踪预热)，不记录计次
+        :return: dict 结果 (可直接 json 序列化)
+        """
+        record_from = start_frame if record_from is None else record_from
+
+        timing = {'decode': 0.0, 'prep': 0.0, 'infer': 0.0, 'logic': 0.0}
+        cache = LandmarkCache.load(video_path, self.model_complexity, self.cache_dir) if self.cache_dir else None
+        if cache is not None and self.replay:
+            return self._replay(video_path, cache, start_frame, end_frame, record_from)
+        if cache is not None:
+            cache_state = 'hit'
+            video_fps = cache.fps
+            end_frame = len(cache) if end_frame is None else min(int(end_frame), len(cache))
+            source, closer = cache.iter_frames(start_frame, end_frame), None
+        else:
+            # 仅完整遍历时写缓存 (切片任务只覆盖部分帧)
+            full_pass = self.cache_dir is not None and start_frame == 0 and end_frame is None
+            reader = VideoFrameReader(video_path, start_frame, end_frame)
+            video_fps, end_frame = reader.fps, reader.end_frame
+            recorder = LandmarkRecorder() if full_pass else None
+            cache_state = 'miss' if self.cache_dir else 'off'
+            source, closer = self._infer_frames(reader, timing, recorder), reader
+
+        engine = self._new_engine(start_frame / video_fps) # 与帧时间戳 (帧序号 / fps) 同一时间轴
+        ex = engine.exercises[engine.current_mode]
+        reps = []
+        frames, decoded = 0, 0
+        t_start = time.perf_counter()
+        try:
+            for idx, ts, lm, _world in source:
+                t0 = time.perf_counter()
+                prev_count, prev_bad = ex.counter, ex.bad_reps
+                pts = extract_keypoints_array(lm)
+                engine.update(pts, None, 180.0, ts=ts)
+                if ex.counter > prev_count and idx >= record_from:
+                    reps.append(self._rep_record(ex, len(reps) + 1, idx, ts, ex.bad_reps > prev_bad))
+                timing['logic'] += time.perf_counter() - t0
+                decoded += 1
+                if idx >= record_from: frames += 1
+        finally:
+            if closer is not None: closer.release()
+
+        if cache is None and recorder is not None and decoded and len(recorder.valid) == decoded:
+            recorder.save(video_path, self.model_complexity, video_fps, self.cache_dir)
+
+        total = time.perf_counter() - t_start
+        timing = {k: round(v, 4) for k, v in timing.items()}
+        timing['total'] = round(total, 4)
+        timing['fps'] = round(decoded / total, 2) if total > 0 else 0.0
+        return {
+            'video': video_path,
+            'mode': self.mode,
+            'start_frame': record_from,
+            'end_frame': end_frame,
+            'frames': frames,
+            'decoded': decoded,
+            'video_fps': video_fps,
+            'cache': cache_state,
+            'count': len(reps),
+            'bad_reps': sum(1 for r in reps if r['bad']),
+            'errors': count_errors(reps),
+            'reps': reps,
+            'timing': timing,
+        }
+
+    def _replay(self, video_path, cache, start_frame, end_frame, record_from):
+        """缓存命中：配置版动作整段向量化回放，结果字段与逐帧路径一致"""
+        from offline.replay import replay_clip # 延迟导入 (replay 依赖本模块)
+        ex = CONFIG_EXERCISES[self.mode](SilentSoundManager())
+        r = replay_clip(ex, cache, self.mode, start_frame, end_frame, record_from)
+        timing = r['timing']
+        timing['fps'] = round(r['decoded'] / timing['total'], 2) if timing['total'] > 0 else 0.0
+        r.update(video=video_path, mode=self.mode, video_fps=cache.fps, cache='replay')
+        return r
+
+    def _infer_frames(self, reader, timing, recorder=None):
+        """解码 + 推理，产出 (帧序号, 时间戳秒, landmarks, world)；可选同步写入缓存"""
+        t0 = time.perf_counter()
+        for idx, ts, frame in reader:
+            t1 = time.perf_counter(); timing['decode'] += t1 - t0
+
+            panel = crop_mirror_panel(frame)
+            rgb = cv2.cvtColor(panel, cv2.COLOR_BGR2RGB)
+            t2 = time.perf_counter(); timing['prep'] += t2 - t1
+
+            res = self.pose.process(rgb, ts, idx)
+            lm, world = res.lm, res.world
+            if recorder is not None: recorder.add(lm, world)
+            t3 = time.perf_counter(); timing['infer'] += t3 - t2
+
+            yield idx, ts, lm, world
+            t0 = time.perf_counter()
+
+    @staticmethod
+    def _rep_record(ex, rep_idx, frame_idx, ts, is_bad):
+        return {
+            'rep': rep_idx,
+            'frame': frame_idx,
+            'time': round(ts, 3),
+            'bad': is_bad,
+            'flags': dict(ex.last_cycle_flags),
+        }
+
+def count_errors(reps):
+    """按错误项统计不合格轮次 (仅统计已记录的轮次，预热区间不计入)"""
+    errors = {}
+    for rep in reps:
+        for k, ok in rep['flags'].items():
+            if not ok: errors[k] = errors.get(k, 0) + 1
+    return errors
+
+# =========================================================================
+# 结果导出
+# =========================================================================
+
+def write_json(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+def write_csv(results, path):
+    """每轮动作一行；无计次的视频输出一行汇总 (rep 为空)"""
+    err_keys = sorted({k for r in results for rep in r['reps'] for k in rep['flags']})
+    header = ['video', 'mode', 'rep', 'frame', 'time', 'bad'] + err_keys
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        for r in results:
+            if not r['reps']:
+                w.writerow([r['video'], r['mode'], '', '', '', ''] + [''] * len(err_keys))
+            for rep in r['reps']:
+                flags = ['' if k not in rep['flags'] else int(rep['flags'][k]) for k in err_keys]
+                w.writerow([r['video'], r['mode'], rep['rep'], rep['frame'], rep['time'], int(rep['bad'])] + flags)
@@ -0,0 +1,607 @@
+"""
+整段向量化回放 (Vectorized Clip Replay)
+关键点缓存命中后，GenericExercise 条件里的几何度量只是关键点时间序列的纯函数。
+这里把一段视频的全部帧一次性算成 NumPy 列，逐帧循环只剩下天然有先后依赖的部分：
+动态基准、状态机、latch 纠错锁定与计次结算 (纯 Python 标量的轻量扫描)。
+
+流程：
+1. PoseSeries   : 缓存关键点 -> 像素坐标 / 可见性掩码 -> 遮挡补点 -> 平滑 (与实时路径共用 GapFiller / PointSmoother)
+                  同一片段只需构建一次，调参时各组试验共享
+2. GenericReplay: 按动作配置把虚拟点 / 度量 / 条件编译为整列数组，
+                  依赖动态基准的度量保留为 "列 / 基准值" 形式，在扫描时结合当帧基准值求出
+3. 扫描         : 复刻 Gatekeeper + GenericExercise.process 的状态流转，输出与 offline/pipeline.py 相同格式的逐轮结果
+
+虚拟点在实时路径中有"粘滞"语义 (源点缺失时保留上一次有效值，且只在通过门控的帧上更新)，
+而门控又取决于状态机。回放先假设所有有效帧都通过门控计算列，扫描得到实际处理帧后若与假设不符，
+则按新的处理帧重算列并重新扫描，直至收敛 (仅在虚拟点确实出现缺失时才会发生，通常一次即可)。
+滑窗度量的窗口同样只包含处理帧，按同样方式迭代。
+
+与实时路径的差异：
+- 时间相关逻辑 (zombie_breaker 超时、阶段驻留、计次冷却) 按视频时间戳计时，与 offline/pipeline.py 注入帧时钟 (core/clock.py) 的结果一致
+- 不产生绘制指令与语音反馈
+用法 (批量评测经 OfflineAnalyzer(mode, replay=True) / main_batch.py --replay 调用 replay_clip)：
+    series = PoseSeries.from_cache(LandmarkCache.load(video))
+    result = GenericReplay.from_exercise(SquatExerciseConfig(SilentSoundManager()), TextConfig.ACT_SQUAT).run(series)
+"""
+import time
+import numpy as np
+from core.config import AppConfig, AlgoConfig
+from exercises.config_compiler import compile_config, compile_state_machine, condition_phases, tier_view, ConfigError, DynamicVar, VIRTUAL_ID_MIN
+from exercises.generic import GenericExercise
+from logic.gatekeeper import Gatekeeper
+from offline.pipeline import count_errors
+from utils.geometry import GeomUtils
+from utils.pose_frame import NUM_LANDMARKS, NAME_TO_INDEX, EXPOSED_MASK
+from utils.smoother import PointSmoother
+from utils.gap_filler import GapFiller
+from utils.window_stats import SlidingWindow, STATS as WINDOW_STATS
+from logic.tempo import TempoTracker, torso_scale
+from logic.trajectory import TrajectoryTracker
+from logic.pose_similarity import PeakPoseTracker, embed, load_library, feature_weights, similarity
+from logic.phase_machine import BEGIN, END, CANCEL
+
+# =========================================================================
+# 关键点序列
+# =========================================================================
+
+class PoseSeries:
+    """
+    一段视频的平滑后关键点序列
+    - xy        : (帧数, 33, 2) float64 像素坐标，无效点为 NaN
+    - present   : (帧数,) bool 该帧是否有任一有效关键点 (实时路径中空帧直接跳过)
+    - timestamps: (帧数,) 视频时间戳 (秒)
+    - frames    : (帧数,) 原视频帧序号
+    - filled    : (帧数, 33) bool 遮挡补出的点 (同实时路径 pts['filled']，读取了补出点的条件该帧不参与 latch 锁定)
+    """
+    def __init__(self, xy, present, timestamps, frames, filled=None):
+        self.xy = xy
+        self.present = present
+        self.timestamps = timestamps
+        self.frames = frames
+        self.filled = np.zeros((len(present), NUM_LANDMARKS), dtype=bool) if filled is None else filled
+
+    @classmethod
+    def from_landmarks(cls, landmarks, valid, fps, start_frame=0, w=AppConfig.HALF_W, h=AppConfig.H, vis_th=0.5):
+        """
+        :param landmarks: (帧数, 33, 4) 归一化关键点 (LandmarkCache.landmarks 切片)
+        :param valid: (帧数,) 是否检测到人体
+        换算、可见性阈值、遮挡补点与平滑均与 extract_keypoints_array + GapFiller + PointSmoother 逐位一致
+        """
+        lm = np.asarray(landmarks)
+        n = len(lm)
+        data = lm.astype(np.float64)
+        xy = data[:, :, :2]
+        xy *= (w, h)
+        np.trunc(xy, out=xy)
+        vis = (data[:, :, 3] > vis_th) & EXPOSED_MASK & np.asarray(valid, dtype=bool)[:, None]
+        present = vis.any(axis=1)
+
+        # 补点与平滑都是逐帧递推 (依赖之前帧的状态)，只能顺序执行；同一片段只需做一次
+        frames = np.arange(start_frame, start_frame + n)
+        timestamps = frames / fps
+        filler = GapFiller() if AlgoConfig.GAP_FILL_ENABLE else None
+        smoother = PointSmoother()
+        filled = np.zeros((n, NUM_LANDMARKS), dtype=bool)
+        for i in np.flatnonzero(present):
+            if filler is not None: filled[i] = filler.fill_xy(data[i], vis[i], timestamps[i])
+            smoother.filter_xy(xy[i], vis[i], timestamps[i])
+        # 滤波结果为浮点；GenericExercise 经点名视图取点 (int 语义向零取整)，这里同样取整
+        np.trunc(xy, out=xy)
+        xy[~vis] = np.nan
+        return cls(xy, present, timestamps, frames, filled)
+
+    @classmethod
+    def from_cache(cls, cache, start_frame=0, end_frame=None):
+        end = len(cache) if end_frame is None else min(int(end_frame), len(cache))
+        start = max(0, int(start_frame))
+        return cls.from_landmarks(cache.landmarks[start:end], cache.valid[start:end], cache.fps, start)
+
+    def __len__(self):
+        return len(self.present)
+
+# =========================================================================
+# 列编译 (与 exercises/config_compiler.py 的逐帧闭包一一对应)
+# =========================================================================
+
+class _Metric:
+    """
+    度量列：第 i 帧取值为 col[i] / max(dyn[base], 1.0)；base 为 None 时与动态基准无关
+    fn 不为 None 时为扫描期取值 f(i, dyn) (节奏度量，取决于扫描到当前帧为止的状态)，不能按列计算
+    """
+    __slots__ = ('col', 'base', 'fn')
+    def __init__(self, col, base=None, fn=None):
+        self.col, self.base, self.fn = col, base, fn
+
+    @property
+    def static(self):
+        return self.base is None and self.fn is None
+
+    def at(self):
+        """-> f(i, dyn) 第 i 帧取值"""
+        if self.fn is not None: return self.fn
+        col, base = self.col.tolist(), self.base
+        if base is None: return lambda i, dyn: col[i]
+        return lambda i, dyn: col[i] / max(dyn.get(base, 1.0), 1.0)
+
+def _pt(col, i):
+    """列 (tolist 后) 第 i 帧的点，缺失 (NaN) 为 None"""
+    p = col[i]
+    return None if p[0] != p[0] else p
+
+def _static(mask):
+    vals = np.asarray(mask, dtype=bool).tolist()
+    return lambda i, dyn: vals[i]
+
+def _compare(metric, th, op_lt):
+    """metric < th (op_lt) 或 metric > th -> f(i, dyn) -> bool"""
+    if metric.static:
+        return _static(metric.col < th if op_lt else metric.col > th)
+    if metric.fn is not None:
+        val = metric.fn
+        if op_lt: return lambda i, dyn: val(i, dyn) < th
+        return lambda i, dyn: val(i, dyn) > th
+    col, base = metric.col.tolist(), metric.base
+    if op_lt: return lambda i, dyn: col[i] / max(dyn.get(base, 1.0), 1.0) < th
+    return lambda i, dyn: col[i] / max(dyn.get(base, 1.0), 1.0) > th
+
+def _trigger_lt(cfg, default_op):
+    """触发器比较方向 (同 config_compiler._compile_trigger：trigger_down 类默认 '>'，trigger_up 默认 '<')"""
+    op = cfg.get('operator', default_op)
+    return op == '<' if default_op == '>' else op != '>'
+
+class _Columns:
+    """
+    一次编译的整列结果
+    :param processed: 假定的处理帧掩码 (虚拟点只在这些帧上更新)
+    """
+    def __init__(self, replay, series, processed):
+        self.mp_map = replay.mp_map
+        self.xy = series.xy
+        self.processed = processed
+        self.timestamps = series.timestamps
+        self.n = len(series)
+        self.v = {}
+        self.uses_fill = False # 列是否依赖处理帧 (虚拟点粘滞值 / 滑窗度量)
+        self.uses_tempo = False # 是否有节奏度量 (扫描时需逐帧送入 tempo)
+        self.paths = []         # [(TrajectoryTracker, 跟踪点列, 参考点列或 None)] 轨迹度量 (扫描时逐帧送入)
+        self.peaks = []         # [PeakPoseTracker] 顶峰姿态度量 (扫描时逐帧送入)
+        self._pose_emb = None   # 整段姿态向量 (pose_similarity 度量共用)
+        self.tempo = TempoTracker(len(replay.config['evaluation'].get('tempo', {}).get('points', [])))
+        for vp in replay.config.get('virtual_points', []):
+            self._virtual_point(vp)
+
+    # --- 取点 ---
+    def point(self, pid):
+        """点引用 -> (帧数, 2) 列，缺失为 NaN (规则同 _point_getter)"""
+        if isinstance(pid, int) and pid < VIRTUAL_ID_MIN:
+            idx = NAME_TO_INDEX.get(self.mp_map.get(pid))
+            if idx is not None and idx < NUM_LANDMARKS: return self.xy[:, idx]
+        elif pid in self.v:
+            return self.v[pid]
+        return np.full((self.n, 2), np.nan)
+
+    def points(self, pids, where, n):
+        if not isinstance(pids, list) or len(pids) < n:
+            raise ConfigError(f"{where}: expected a list of {n} point ids, got {pids!r}")
+        return [self.point(p) for p in pids]
+
+    # --- 虚拟点 ---
+    def _virtual_point(self, vp):
+        pid, calc = vp['id'], vp['calc']
+        where = f"virtual_points[{pid}]"
+        with np.errstate(invalid='ignore'):
+            if calc == 'midpoint':
+                srcs = self.points(vp['sources'], where, 1)
+                fresh = np.trunc(np.sum(srcs, axis=0) / len(srcs))
+            elif calc in ('projection_vertical', 'offset'):
+                fresh = self.point(vp['source']) + (vp.get('offset_x', 0) if calc == 'offset' else 0, vp.get('offset_y', 0))
+            elif calc == 'compose':
+                px, py = self.point(vp['source_x']), self.point(vp['source_y'])
+                fresh = np.stack([px[:, 0], py[:, 1]], axis=1)
+                fresh[np.isnan(px[:, 0]) | np.isnan(py[:, 1])] = np.nan
+            elif calc == 'extend_horizontal':
+                p, a, b = self.point(vp['source']), self.point(vp['ref_start']), self.point(vp['ref_end'])
+                fresh = np.stack([np.trunc(p[:, 0] + GeomUtils.dist_batch(a, b) * vp.get('direction', 1.0)), p[:, 1]], axis=1)
+                fresh[np.isnan(a[:, 0]) | np.isnan(b[:, 0])] = np.nan
+            else:
+                raise ConfigError(f"{where}: unknown calc '{calc}'")
+
+        # 粘滞：源点缺失的帧沿用最近一次处理帧上的有效值
+        ok = ~np.isnan(fresh[:, 0])
+        miss = self.processed & ~ok
+        if miss.any():
+            self.uses_fill = True
+            src = np.where(ok & self.processed, np.arange(self.n), -1)
+            np.maximum.accumulate(src, out=src)
+            filled = fresh[np.maximum(src, 0)]
+            filled[src < 0] = np.nan
+            fresh = np.where(ok[:, None], fresh, filled)
+        self.v[pid] = fresh
+
+    # --- 度量 ---
+    def metric(self, cfg, var_points, where):
+        if isinstance(cfg, str): cfg = {'metric': cfg}
+        name = cfg['metric']
+        with np.errstate(invalid='ignore'):
+            if name == 'compression_ratio':
+                base = cfg.get('baseline', 'standing_baseline')
+                p1, p2 = self.points(cfg.get('points') or var_points.get(base) or [101, 102], where, 2)[:2]
+                return _Metric(np.nan_to_num(np.abs(p1[:, 1] - p2[:, 1]), nan=0.0), base)
+            if name == 'vertical_diff':
+                points = cfg.get('points', [])
+                if len(points) < 2: return _Metric(np.zeros(self.n))
+                p1, p2 = self.points(points, where, 2)[:2]
+                return _Metric(np.nan_to_num(p1[:, 1] - p2[:, 1], nan=0.0))
+            if name == 'angle':
+                points = cfg.get('points', [])
+                if len(points) != 3: return _Metric(np.zeros(self.n))
+                a, b, c = self.points(points, where, 3)
+                return _Metric(np.nan_to_num(GeomUtils.angle_batch(a, b, c), nan=0.0))
+        if name in WINDOW_STATS:
+            return self._windowed(cfg, name, var_points, where)
+        if name == 'tempo':
+            phase, measure, reps = cfg.get('phase', 'full'), cfg.get('measure', 'duration'), cfg.get('reps')
+            tempo = self.tempo
+            if reps: tempo.track(phase, measure, reps)
+            self.uses_tempo = True
+            return _Metric(None, fn=lambda i, dyn: tempo.value(phase, measure, reps))
+        if name == 'trajectory':
+            return self._trajectory(cfg)
+        if name == 'pose_similarity':
+            return self._pose_similarity(cfg)
+        raise ConfigError(f"{where}: unknown metric '{name}'")
+
+    def _windowed(self, cfg, stat, var_points, where):
+        """
+        滑窗度量列：按处理帧顺序送入与实时路径相同的 SlidingWindow (窗口只包含处理帧，结果逐位一致)
+        窗口内容随处理帧变化，与虚拟点粘滞值一样参与处理帧的迭代收敛
+        """
+        src = self.metric(cfg['value'], var_points, where + '.value')
+        if not src.static:
+            raise ConfigError(f"{where}: replay does not support windowed metrics over baseline-relative values")
+        self.uses_fill = True
+        w = SlidingWindow(cfg.get('window'), cfg.get('window_sec'))
+        col, ts = src.col.tolist(), self.timestamps.tolist()
+        out = np.zeros(self.n)
+        for i in np.flatnonzero(self.processed).tolist():
+            w.push(col[i], ts[i])
+            out[i] = w.stat(stat)
+        ref = cfg.get('reference')
+        if ref is None: return _Metric(out)
+        if isinstance(ref, str): return _Metric(out, ref)
+        return _Metric(out / ref)
+
+    def _trajectory(self, cfg):
+        """轨迹度量：每个度量各用一个与实时路径参数相同的跟踪器，扫描时逐帧送入，结果逐位一致"""
+        tracker = TrajectoryTracker(cfg['template'], cfg.get('strategy', 'dtw'),
+                                    cfg.get('band', AlgoConfig.TRAJECTORY_BAND), bool(cfg.get('fit', True)))
+        segment = cfg.get('segment')
+        if segment is not None: tracker.segments = True
+        origin = cfg.get('origin')
+        self.paths.append((tracker, self.point(cfg['point']).tolist(), self.point(origin).tolist() if origin is not None else None))
+        measure, tol = cfg.get('measure', 'score'), cfg.get('tolerance', AlgoConfig.TRAJECTORY_TOLERANCE)
+        return _Metric(None, fn=lambda i, dyn: tracker.value(measure, segment, tol))
+
+    def _pose_similarity(self, cfg):
+        """逐帧姿态相似度为静态列 (整段一次批量比对，逐行与实时单帧查询相同)；顶峰姿态在扫描时逐帧送入"""
+        lib, weights = load_library(cfg['library']), feature_weights(cfg.get('features'))
+        tol = cfg.get('tolerance', AlgoConfig.POSE_TOLERANCE)
+        at = cfg.get('at', 'frame')
+        if at != 'frame':
+            tracker = PeakPoseTracker(lib, weights, tol, at)
+            self.peaks.append(tracker)
+            return _Metric(None, fn=lambda i, dyn: tracker.value())
+        if self._pose_emb is None: self._pose_emb = embed(self.xy)
+        return _Metric(similarity(lib.query_batch(self._pose_emb, weights)[0], tol))
+
+    # --- 条件 ---
+    def check(self, cond, var_points, where):
+        """条件判定 -> f(i, dyn) -> is_good (点缺失视为合格，同实时路径)"""
+        ctype = cond['type']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if ctype == 'ratio_width':
+                a, b = self.points(cond['numerator_points'], where, 2)[:2]
+                c, d = self.points(cond['denominator_points'], where, 2)[:2]
+                ratio = np.abs(a[:, 0] - b[:, 0]) / np.maximum(np.abs(c[:, 0] - d[:, 0]), 1.0)
+                return _static(np.isnan(ratio) | (ratio >= cond.get('min', 0.0)))
+
+            if ctype == 'ratio_vertical_dynamic':
+                p1, p2 = self.points(cond['points'], where, 2)[:2]
+                dy = np.abs(p1[:, 1] - p2[:, 1])
+                miss = np.isnan(dy).tolist()
+                col = dy.tolist()
+                base, hi, lo = cond['baseline_var'], cond.get('max', 999.0), cond.get('min', -999.0)
+                def fn(i, dyn):
+                    if miss[i]: return True
+                    return lo <= col[i] / max(dyn.get(base, 1.0), 1.0) <= hi
+                return fn
+
+            if ctype == 'angle_vertical':
+                groups = cond['points']
+                if len(groups) > 0 and not isinstance(groups[0], list): groups = [groups]
+                th = cond.get('max', 20.0)
+                fail = np.zeros(self.n, dtype=np.int64)
+                for g in groups:
+                    p1, p2 = self.points(g, where, 2)[:2]
+                    fail += GeomUtils.angle_vertical_batch(p1, p2) > th # NaN 比较为 False，即缺失不计失败
+                if cond.get('side_mode', 'any') == 'any': return _static(fail == 0)
+                return _static(fail != len(groups))
+
+            if ctype == 'deviation':
+                points = cond['points']
+                if len(points) != 3: return _static(np.ones(self.n, dtype=bool))
+                ps, pe, pt = self.points(points, where, 3)
+                dev = GeomUtils.line_deviation_batch(pt, ps, pe, cond.get('normalize', True))
+                return _static(np.isnan(dev) | (dev <= cond.get('max', 0.1)))
+
+            if ctype == 'chain_sync':
+                m1 = self.metric(cond['metric_1'], var_points, where + '.metric_1')
+                m2 = self.metric(cond['metric_2'], var_points, where + '.metric_2')
+                scale, offset, tol = cond.get('scale', 1.0), cond.get('offset', 0.0), cond.get('tolerance', 15.0)
+                if m1.static and m2.static:
+                    return _static(np.abs(m1.col - (m2.col * scale + offset)) <= tol)
+                f1, f2 = m1.at(), m2.at()
+                def fn(i, dyn):
+                    return abs(f1(i, dyn) - (f2(i, dyn) * scale + offset)) <= tol
+                return fn
+
+            if ctype == 'threshold':
+                return self._bounds(self.metric(cond['metric'], var_points, where + '.metric'), cond)
+
+            if ctype == 'pose_similarity':
+                m = self.metric(dict(cond, metric='pose_similarity'), var_points, where)
+                lo = cond.get('min', AlgoConfig.POSE_MIN_SIMILARITY)
+                if m.static: return _static(m.col >= lo)
+                return lambda i, dyn: m.fn(i, dyn) >= lo
+        raise ConfigError(f"{where}: unknown condition type '{ctype}'")
+
+    def constraint(self, cfg, var_points, where):
+        """纠错区间约束 -> f(i, dyn) -> in_fix_range"""
+        return self._bounds(self.metric(cfg, var_points, where), cfg)
+
+    def _bounds(self, m, cfg):
+        """度量列 + max / min / threshold -> f(i, dyn) -> bool"""
+        hi, lo = cfg.get('max'), cfg.get('min')
+        th, op = cfg.get('threshold'), cfg.get('operator', '>')
+        if m.static:
+            val = m.col
+            ok = np.ones(self.n, dtype=bool)
+            if hi is not None: ok &= ~(val > hi)
+            if lo is not None: ok &= ~(val < lo)
+            if th is not None:
+                if op == '>': ok &= val > th
+                if op == '<': ok &= val < th
+            return _static(ok)
+        at = m.at()
+        def fn(i, dyn):
+            val = at(i, dyn)
+            if hi is not None and val > hi: return False
+            if lo is not None and val < lo: return False
+            if th is not None:
+                if op == '>' and not (val > th): return False
+                if op == '<' and not (val < th): return False
+            return True
+        return fn
+
+# =========================================================================
+# 回放
+# =========================================================================
+
+class GenericReplay:
+    """
+    GenericExercise 配置的整段回放器
+    :param gate_mode: 门控所用的动作名 (TextConfig.ACT_*，与实时 Engine 中的注册名一致)；None 表示不做门控
+    :param tier: 容忍度档位 (默认 AlgoConfig.TOLERANCE_TIER)
+    """
+    def __init__(self, config, mp_map=None, gate_mode=None, tier=None):
+        self.mp_map = mp_map or GenericExercise.MP_MAP
+        self.plan = compile_config(config, self.mp_map, lambda key: None) # 先走一遍完整校验
+        self.config = config
+        self.gate_mode = gate_mode
+        self.tier = AlgoConfig.TOLERANCE_TIER if tier is None else tier
+        self.plan.set_tier(self.tier) # 非法档位在此报错
+        self._check_virtual_order(config)
+
+    @classmethod
+    def from_exercise(cls, ex, gate_mode=None):
+        if not ex.plan: raise ConfigError(f"{ex.config_file}: exercise config not loaded")
+        return cls(ex.config, ex.MP_MAP, gate_mode, ex.plan.tier)
+
+    @staticmethod
+    def _check_virtual_order(config):
+        """整列计算要求虚拟点只引用先定义的点 (实时路径对前向引用会读到上一帧的值，无法按列计算)"""
+        defined = set()
+        for vp in config.get('virtual_points', []):
+            pid = vp['id']
+            refs = vp.get('sources', []) + [vp.get(k) for k in ('source', 'source_x', 'source_y', 'ref_start', 'ref_end')]
+            for r in refs:
+                if r is not None and not (isinstance(r, int) and r < VIRTUAL_ID_MIN) and r not in defined:
+                    raise ConfigError(f"virtual_points[{pid}]: replay requires '{r}' to be defined earlier")
+            if pid in defined: raise ConfigError(f"virtual_points[{pid}]: duplicate id")
+            defined.add(pid)
+
+    def _compile(self, series, processed):
+        cols = _Columns(self, series, processed)
+        cfg = self.config
+        dvars = [DynamicVar(v, self.mp_map) for v in cfg.get('dynamic_vars', [])]
+        var_points = {dv.name: dv.points for dv in dvars}
+        sm = cfg['evaluation']['state_machine']
+
+        k = {'cols': cols}
+        # 阶段转移表与实时路径同一套编译 (谓词换成列上的 f(i, dyn))，每次扫描各自一份运行状态
+        machine = compile_state_machine(
+            sm, lambda c, where, op: _compare(cols.metric(c, var_points, where), c['threshold'], _trigger_lt(c, op)))
+        k['machine'] = machine
+        k['dyn'] = []
+        for dv in dvars:
+            p1, p2 = cols.points(dv.points, f"dynamic_vars[{dv.name}]", 2)[:2]
+            curr = np.nan_to_num(np.abs(p1[:, 1] - p2[:, 1]), nan=0.0).tolist()
+            k['dyn'].append((dv.name, curr, dv.decay, dv.damping, machine.phases_for(dv.active_state)))
+
+        conds, k['rep_end'] = [], []
+        landmarks = {c.cid: c.landmarks for c in self.plan.conditions}
+        for c in cfg['evaluation']['conditions']:
+            where = f"conditions[{c['id']}]"
+            constraint = c.get('correction_constraint')
+            in_range = cols.constraint(constraint, var_points, where) if constraint else None
+            mode = c.get('correction_mode', 'realtime')
+            check = cols.check(tier_view(c, self.tier, where), var_points, where)
+            if mode == 'rep_end': k['rep_end'].append((c['id'], check, in_range))
+            else:
+                # 各帧是否补出了该条件读取的点 (该帧不参与 latch 锁定)
+                idx = [NAME_TO_INDEX[n] for n in landmarks[c['id']] if n in NAME_TO_INDEX]
+                filled = series.filled[:, idx].any(axis=1).tolist()
+                conds.append(((c['id'], mode, check, in_range, filled), condition_phases(c, where), mode != 'realtime'))
+        machine.assign_conditions(conds)
+
+        # 节奏 / 轨迹 / 顶峰姿态跟踪 (只在用到对应度量时逐帧送入，否则结果没有读取方)
+        k['tempo'] = None
+        if cols.uses_tempo:
+            tempo_cfg = cfg['evaluation'].get('tempo', {})
+            k['tempo'] = (cols.tempo, [c.tolist() for c in cols.points(tempo_cfg.get('points', []), 'evaluation.tempo', 0)])
+        k['paths'], k['peaks'] = cols.paths, cols.peaks
+        k['trackers'] = ([cols.tempo] if cols.uses_tempo else []) + [p[0] for p in cols.paths] + cols.peaks
+        k['torso'] = [series.xy[:, NAME_TO_INDEX[n]].tolist() for n in ('ls', 'rs', 'lh', 'rh')] if (cols.uses_tempo or cols.paths) else None
+        return k
+
+    def run(self, series, record_from=None):
+        """
+        :param record_from: 预热截止帧号 (同 OfflineAnalyzer.analyze)，之前的计次不记录
+        :return: dict，字段与 OfflineAnalyzer.analyze 一致 (count / bad_reps / errors / reps / timing ...)
+        """
+        t0 = time.perf_counter()
+        present = series.present
+        gate = Gatekeeper.match_series(series.xy, self.gate_mode) if self.gate_mode else np.ones(len(series), dtype=bool)
+        processed = present.copy()
+        passes = 0
+        t_cols = 0.0
+        while True:
+            t1 = time.perf_counter()
+            kernel = self._compile(series, processed)
+            t_cols += time.perf_counter() - t1
+            reps, actual = self._scan(kernel, series, present, gate)
+            passes += 1
+            # 没有虚拟点粘滞值与滑窗度量时列与处理帧无关，一次扫描即为最终结果
+            if not kernel['cols'].uses_fill or np.array_equal(actual, processed): break
+            processed = actual
+
+        start = int(series.frames[0]) if len(series) else 0
+        record_from = start if record_from is None else record_from
+        reps = [r for r in reps if r['frame'] >= record_from]
+        for n, r in enumerate(reps, 1): r['rep'] = n
+        total = time.perf_counter() - t0
+        return {
+            'start_frame': record_from,
+            'end_frame': int(series.frames[-1]) + 1 if len(series) else start,
+            'frames': int(np.count_nonzero(series.frames >= record_from)),
+            'decoded': len(series),
+            'count': len(reps),
+            'bad_reps': sum(1 for r in reps if r['bad']),
+            'errors': count_errors(reps),
+            'reps': reps,
+            'timing': {'columns': round(t_cols, 4), 'scan': round(total - t_cols, 4), 'total': round(total, 4), 'passes': passes},
+        }
+
+    def _scan(self, k, series, present, gate):
+        """逐帧状态扫描 (复刻 Gatekeeper.check + GenericExercise.process + BaseExercise._end_cycle)"""
+        plan = self.plan
+        dvars, machine, rep_end = k['dyn'], k['machine'], k['rep_end']
+        tempo, paths, peaks, trackers, torso_cols = None, k['paths'], k['peaks'], k['trackers'], k['torso']
+        if k['tempo'] is not None:
+            tempo, tp_cols = k['tempo']
+        xy = series.xy
+        check_ids = plan.check_ids
+        priority_ids = [c.cid for c in plan.by_priority]
+        suppress = plan.suppress_lower_priority
+        # 结算时参与判坏的错误项 (与 _end_cycle 一致：AlgoConfig 中显式关闭的跳过)
+        enabled = [cid for cid in check_ids if getattr(AlgoConfig, f"ENABLE_{cid.upper()}", True)]
+        cooldown = AlgoConfig.COUNT_COOLDOWN
+
+        stage, phase, dyn = machine.stage, machine.phase.name, {dv[0]: 0.0 for dv in dvars}
+        latch, cycle = {}, {}
+        last_count = 0
+        reps = []
+        processed = np.zeros(len(series), dtype=bool)
+        ts_list, frame_list = series.timestamps.tolist(), series.frames.tolist()
+        gate_list = gate.tolist()
+
+        for i in np.flatnonzero(present).tolist():
+            if stage != "down" and not gate_list[i]: continue
+            processed[i] = True
+            ts = ts_list[i]
+
+            # 1. 动态基准
+            for name, curr, decay, damping, active in dvars:
+                c = curr[i]
+                if c <= 0: continue
+                d = dyn[name] * decay
+                if phase in active and c > d:
+                    d = d * (1.0 - damping) + c * damping
+                if d < 1.0 and c > 10.0: d = c
+                dyn[name] = d
+
+            if torso_cols:
+                scale = torso_scale(*[_pt(c, i) for c in torso_cols])
+                if tempo is not None:
+                    tempo.push(ts, [_pt(c, i) for c in tp_cols], scale)
+                for tracker, pc, oc in paths:
+                    p = _pt(pc, i)
+                    if p and oc is not None:
+                        o = _pt(oc, i)
+                        p = (p[0] - o[0], p[1] - o[1]) if o else None
+                    tracker.push(ts, p, scale)
+
+            # 2. 状态机
+            prev = machine.phase
+            event = machine.step(ts, i, dyn)
+            stage, phase = machine.stage, machine.phase.name
+            if event == BEGIN:
+                latch, cycle = {}, {}
+                for tr in trackers: tr.begin(ts)
+            elif event == END:
+                for tr in trackers: tr.end(ts)
+                for cid, check, in_range in rep_end:
+                    if in_range is None or in_range(i, dyn): cycle[cid] = check(i, dyn)
+                flags, is_bad = {}, False
+                if not (ts - last_count < cooldown):
+                    flags = {cid: cycle.get(cid, True) for cid in enabled}
+                    is_bad = not all(flags.values())
+                    last_count = ts
+                    for cid in cycle: cycle[cid] = True
+                reps.append({'rep': len(reps) + 1, 'frame': frame_list[i], 'time': round(ts, 3), 'bad': is_bad, 'flags': flags})
+            elif event == CANCEL:
+                for tr in trackers: tr.cancel(ts)
+            if tempo is not None and machine.phase is not prev: tempo.enter(phase, ts) # 一轮之外时忽略
+            for peak in peaks:
+                peak.push(phase, lambda: xy[i])
+
+            # 3. 条件评估 (同实时路径：只在 down 阶段评估当前阶段的条件集，latch 已锁定、读取的点被补出、不在检测阶段或不在纠错区间时跳过判定)
+            if stage != "down": continue
+            results = {}
+            for (cid, mode, check, in_range, filled), active in machine.conditions():
+                if mode == 'realtime':
+                    results[cid] = check(i, dyn)
+                    continue
+                if cid not in latch: latch[cid] = (mode == 'latch_fail')
+                done = not active or filled[i] or (mode == 'latch_fail' and not latch[cid]) or (mode == 'latch_pass' and latch[cid])
+                if not done and (in_range is None or in_range(i, dyn)):
+                    is_good = check(i, dyn)
+                    if mode == 'latch_fail':
+                        if not is_good: latch[cid] = False
+                    elif mode == 'latch_pass':
+                        if is_good: latch[cid] = True
+                    else:
+                        latch[cid] = is_good
+                results[cid] = latch[cid]
+
+            if suppress:
+                failed = [cid for cid in priority_ids if not results.get(cid, True)]
+                for cid in failed[1:]: results[cid] = True
+            cycle.update(results)
+
+        return reps, processed
+
+def replay_clip(ex, cache, gate_mode=None, start_frame=0, end_frame=None, record_from=None):
+    """便捷入口：对缓存命中的视频整段回放一个 GenericExercise"""
+    series = PoseSeries.from_cache(cache, start_frame, end_frame)
+    return GenericReplay.from_exercise(ex, gate_mode).run(series, record_from)
@@ -0,0 +1,129 @@
+"""
+多进程离线评测调度器 (Process-Pool Fan-out)
+MediaPipe 单实例推理为单线程，批量评测时将多个视频 (或长视频的时间切片) 分发到进程池，
+每个工作进程独立持有一个 Pose 实例与 Engine，最后合并为一份报告。
+
+切片策略：
+- 每个切片 [start, end) 实际从 start - warmup 开始解码，预热区间只用于
+  动态基准校准与姿态跟踪收敛，不记录计次；
+- 计次归属于"完成帧"所在的切片，切片互不重叠，因此合并时无需去重。
+  预热时长应大于单次动作的最长耗时，跨切片的动作才能被完整识别。
+"""
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from core.camera import VideoFrameReader
+from offline.pipeline import OfflineAnalyzer
+from offline.landmark_cache import DEFAULT_CACHE_DIR
+
+# 工作进程内的分析器 (每进程一个 Pose + Engine)
+_WORKER = None
+
+def _init_worker(mode, model_complexity, cache_dir=DEFAULT_CACHE_DIR, config=False, replay=False):
+    global _WORKER
+    _WORKER = OfflineAnalyzer(mode, model_complexity=model_complexity, cache_dir=cache_dir, config=config, replay=replay)
+
+def _run_job(job):
+    video, start, end, warmup_start = job
+    return _WORKER.analyze(video, start_frame=warmup_start, end_frame=end, record_from=start)
+
+def plan_jobs(videos, chunk_sec=0.0, warmup_sec=5.0):
+    """
+    生成任务列表 [(video, start, end, warmup_start), ...]
+    chunk_sec <= 0 时整段视频为一个任务。
+    """
+    jobs = []
+    for video in videos:
+        if chunk_sec <= 0:
+            jobs.append((video, 0, None, 0)); continue
+        reader = VideoFrameReader(video)
+        fps, total = reader.fps, reader.video_len
+        reader.release()
+        chunk = max(1, int(chunk_sec * fps))
+        if total <= 0 or total <= chunk:
+            jobs.append((video, 0, None, 0)); continue
+        warmup = int(warmup_sec * fps)
+        for start in range(0, total, chunk):
+            end = min(start + chunk, total)
+            jobs.append((video, start, end, max(0, start - warmup)))
+    return jobs
+
+def merge_results(parts):
+    """将同一视频的多个切片结果按时间顺序合并"""
+    parts = sorted(parts, key=lambda r: r['start_frame'])
+    head = parts[0]
+    reps, errors = [], {}
+    timing = {}
+    for p in parts:
+        for rep in p['reps']:
+            rep = dict(rep); rep['rep'] = len(reps) + 1
+            reps.append(rep)
+        for k, v in p['errors'].items(): errors[k] = errors.get(k, 0) + v
+        for k, v in p['timing'].items():
+            if k != 'fps': timing[k] = round(timing.get(k, 0.0) + v, 4)
+    frames = sum(p['frames'] for p in parts)
+    decoded = sum(p['decoded'] for p in parts)
+    timing['fps'] = round(decoded / timing['total'], 2) if timing.get('total') else 0.0
+    return {
+        'video': head['video'],
+        'mode': head['mode'],
+        'start_frame': head['start_frame'],
+        'end_frame': parts[-1]['end_frame'],
+        'frames': frames,
+        'decoded': decoded,
+        'video_fps': head['video_fps'],
+        'count': len(reps),
+        'bad_reps': sum(1 for r in reps if r['bad']),
+        'errors': errors,
+        'reps': reps,
+        'timing': timing,
+        'chunks': len(parts),
+        'cache': head['cache'],
+    }
+
+def run_batch(videos, mode, workers=None, chunk_sec=0.0, warmup_sec=5.0, model_complexity=1,
+              cache_dir=DEFAULT_CACHE_DIR, on_result=None, config=False, replay=False):
+    """
+    并行分析视频列表
+    :param workers: 进程数，默认 CPU 核数；为 1 时在当前进程内顺序执行 (便于调试)
+    :param cache_dir: 关键点缓存目录 (None 禁用)；只有整段任务会写缓存，切片任务只读
+    :param on_result: 每个切片完成时的回调 (用于打印进度)
+    :param config / replay: 评测配置版动作 / 且缓存命中时整段向量化回放 (见 OfflineAnalyzer)
+    :return: {'clips': [...], 'summary': {...}}
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = plan_jobs(videos, chunk_sec, warmup_sec)
+    t0 = time.perf_counter()
+
+    parts = {}
+    if workers == 1:
+        _init_worker(mode, model_complexity, cache_dir, config, replay)
+        results = map(_run_job, jobs)
+        _collect(results, parts, on_result)
+    else:
+        # spawn: 避免 fork 继承父进程中已初始化的 MediaPipe/OpenCV 线程状态
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=ctx,
+                                 initializer=_init_worker, initargs=(mode, model_complexity, cache_dir, config, replay)) as pool:
+            _collect(pool.map(_run_job, jobs), parts, on_result)
+
+    clips = [merge_results(parts[v]) for v in videos if v in parts]
+    wall = time.perf_counter() - t0
+    total_frames = sum(c['frames'] for c in clips)
+    summary = {
+        'videos': len(clips),
+        'jobs': len(jobs),
+        'workers': workers,
+        'frames': total_frames,
+        'count': sum(c['count'] for c in clips),
+        'bad_reps': sum(c['bad_reps'] for c in clips),
+        'wall_time': round(wall, 3),
+        'fps': round(total_frames / wall, 2) if wall > 0 else 0.0,
+    }
+    return {'clips': clips, 'summary': summary}
+
+def _collect(results, parts, on_result):
+    for r in results:
+        parts.setdefault(r['video'], []).append(r)
+        if on_result: on_result(r)
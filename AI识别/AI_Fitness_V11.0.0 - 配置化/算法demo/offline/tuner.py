@@ -0,0 +1,233 @@
+"""
+批量自动调参 (Parameter Sweep / Auto-Tuning)
+在带标注的视频片段上回放缓存关键点，批量搜索 TUNING_TREE 中的 AlgoConfig 参数，
+按"计次准确率 + 纠错 F1"综合得分排序，输出最优配置。
+
+标注文件格式 (JSON，视频路径可相对于标注文件所在目录)：
+{
+    "mode": "squat",
+    "clips": [
+        {"video": "a.mp4", "count": 10, "errors": {"valgus": [2, 5], "depth": [7]}},
+        {"video": "b.mp4", "count": 8,  "errors": {}}
+    ]
+}
+errors 中列出的是出现该错误的轮次序号 (从 1 开始)；未列出的错误项视为该片段全程合格。
+
+搜索策略：
+- grid   : 每个参数取 levels 个等距值做笛卡尔积 (超过 trials 时随机抽样)
+- random : 在参数区间内均匀随机采样
+- refine : 以当前最优点为中心逐轮缩小半径的局部随机搜索 (无需额外依赖)
+"""
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+from core.config import AlgoConfig, TUNING_TREE
+from offline.pipeline import OfflineAnalyzer, resolve_mode
+from offline.landmark_cache import DEFAULT_CACHE_DIR
+from offline.scheduler import run_batch
+
+# =========================================================================
+# 标注与参数空间
+# =========================================================================
+
+def load_labels(path):
+    """读取标注文件，返回 (mode, clips)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    clips = []
+    for c in data['clips']:
+        video = c['video'] if os.path.isabs(c['video']) else os.path.join(base, c['video'])
+        clips.append({'video': video, 'count': int(c['count']), 'errors': {k: sorted(v) for k, v in c.get('errors', {}).items()}})
+    return resolve_mode(data['mode']), clips
+
+def default_space(mode, span=0.3):
+    """
+    由 TUNING_TREE 生成默认搜索空间：数值参数取当前值 ±span，布尔参数取 [True, False]。
+    检测开关 (switch) 与优先级 (prio) 不参与搜索——关闭检测项必然损失召回，没有调节意义。
+    """
+    space = {}
+    for grp in TUNING_TREE.get(mode, []):
+        for key, _ in grp['params']:
+            v = getattr(AlgoConfig, key)
+            if isinstance(v, bool):
+                space[key] = {'type': 'bool'}
+            elif isinstance(v, int):
+                d = max(1, int(round(abs(v) * span)))
+                space[key] = {'type': 'int', 'lo': v - d, 'hi': v + d}
+            else:
+                d = abs(v) * span or span
+                space[key] = {'type': 'float', 'lo': v - d, 'hi': v + d}
+    return space
+
+def parse_param_spec(text):
+    """命令行参数区间: NAME=lo:hi  (布尔参数写 NAME=bool)"""
+    key, rng = text.split('=', 1)
+    if not hasattr(AlgoConfig, key):
+        raise ValueError(f"Unknown AlgoConfig field: {key}")
+    if rng == 'bool': return key, {'type': 'bool'}
+    lo, hi = rng.split(':')
+    kind = 'int' if isinstance(getattr(AlgoConfig, key), int) and '.' not in rng else 'float'
+    cast = int if kind == 'int' else float
+    return key, {'type': kind, 'lo': cast(lo), 'hi': cast(hi)}
+
+def _sample(spec, rng, center=None, radius=1.0):
+    if spec['type'] == 'bool':
+        if center is not None and rng.random() > radius: return center
+        return rng.random() < 0.5
+    lo, hi = spec['lo'], spec['hi']
+    if center is not None:
+        half = (hi - lo) * radius / 2
+        lo, hi = max(lo, center - half), min(hi, center + half)
+    if spec['type'] == 'int': return rng.randint(int(round(lo)), int(round(hi)))
+    return round(rng.uniform(lo, hi), 4)
+
+def _levels(spec, n):
+    if spec['type'] == 'bool': return [True, False]
+    lo, hi = spec['lo'], spec['hi']
+    if n <= 1: return [lo]
+    vals = [lo + (hi - lo) * i / (n - 1) for i in range(n)]
+    if spec['type'] == 'int': return sorted({int(round(v)) for v in vals})
+    return [round(v, 4) for v in vals]
+
+def grid_trials(space, levels, limit, rng):
+    keys = list(space)
+    combos = list(itertools.product(*[_levels(space[k], levels) for k in keys]))
+    if len(combos) > limit: combos = rng.sample(combos, limit)
+    return [dict(zip(keys, c)) for c in combos]
+
+def random_trials(space, n, rng, center=None, radius=1.0):
+    return [{k: _sample(s, rng, center.get(k) if center else None, radius) for k, s in space.items()} for _ in range(n)]
+
+# =========================================================================
+# 评分
+# =========================================================================
+
+def score_clip(result, clip):
+    """
+    单片段评分
+    - 计次准确率: 1 - |预测 - 标注| / 标注 (下限 0)
+    - 纠错: 以 (轮次, 错误项) 为单位统计 TP/FP/FN
+    """
+    gt_n = clip['count']
+    count_acc = max(0.0, 1.0 - abs(result['count'] - gt_n) / max(gt_n, 1))
+    truth = {(i, k) for k, reps in clip['errors'].items() for i in reps}
+    pred = {(r['rep'], k) for r in result['reps'] for k, ok in r['flags'].items() if not ok}
+    return {
+        'count': result['count'], 'count_acc': count_acc,
+        'tp': len(truth & pred), 'fp': len(pred - truth), 'fn': len(truth - pred),
+    }
+
+def summarize(per_clip, count_weight=0.5):
+    tp = sum(c['tp'] for c in per_clip); fp = sum(c['fp'] for c in per_clip); fn = sum(c['fn'] for c in per_clip)
+    precision = tp / (tp + fp) if tp + fp else 1.0
+    recall = tp / (tp + fn) if tp + fn else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    count_acc = sum(c['count_acc'] for c in per_clip) / len(per_clip) if per_clip else 0.0
+    return {
+        'score': round(count_weight * count_acc + (1 - count_weight) * f1, 4),
+        'count_acc': round(count_acc, 4),
+        'count_exact': sum(1 for c in per_clip if c['count_acc'] == 1.0),
+        'precision': round(precision, 4), 'recall': round(recall, 4), 'f1': round(f1, 4),
+    }
+
+# =========================================================================
+# 工作进程
+# =========================================================================
+
+# 工作进程状态：(analyzer, clips, count_weight, 默认参数快照)
+_WORKER = None
+
+def _init_worker(mode, clips, model_complexity, cache_dir, count_weight):
+    global _WORKER
+    defaults = {f.name: getattr(AlgoConfig, f.name) for f in fields(AlgoConfig)}
+    _WORKER = (OfflineAnalyzer(mode, model_complexity=model_complexity, cache_dir=cache_dir), clips, count_weight, defaults)
+
+def _apply_params(params, defaults):
+    # 先还原默认值，保证每组试验互不影响 (检测器在 Engine 构造时读取阈值，故每个片段都重建 Engine)
+    for k, v in defaults.items(): setattr(AlgoConfig, k, v)
+    for k, v in params.items(): setattr(AlgoConfig, k, v)
+
+def _eval_trial(params):
+    analyzer, clips, count_weight, defaults = _WORKER
+    _apply_params(params, defaults)
+    try:
+        per_clip = [score_clip(analyzer.analyze(c['video']), c) for c in clips]
+    finally:
+        _apply_params({}, defaults)
+    res = summarize(per_clip, count_weight)
+    res['params'] = params
+    res['clips'] = [c['count'] for c in per_clip]
+    return res
+
+# =========================================================================
+# 调度入口
+# =========================================================================
+
+def tune(mode, clips, space=None, search='random', trials=64, levels=5, rounds=4,
+         workers=None, model_complexity=1, cache_dir=DEFAULT_CACHE_DIR, count_weight=0.5, seed=0, on_trial=None):
+    """
+    :param search: 'grid' | 'random' | 'refine'
+    :param trials: 试验总数上限 (refine 模式下为每轮试验数)
+    :return: {'best': {...}, 'baseline': {...}, 'trials': [...按得分降序], 'space': {...}, 'wall_time': s}
+    """
+    mode = resolve_mode(mode)
+    space = space or default_space(mode)
+    if not space: raise ValueError(f"No tunable parameters for mode: {mode}")
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+
+    # 1. 预热关键点缓存 (每个视频只推理一次，之后所有试验都走缓存回放)
+    videos = sorted({c['video'] for c in clips})
+    run_batch(videos, mode, workers=workers, model_complexity=model_complexity, cache_dir=cache_dir)
+
+    baseline = {k: getattr(AlgoConfig, k) for k in space}
+    results = []
+
+    def run(pool, batch):
+        out = pool.map(_eval_trial, batch) if pool else map(_eval_trial, batch)
+        for r in out:
+            results.append(r)
+            if on_trial: on_trial(len(results), r)
+
+    init_args = (mode, clips, model_complexity, cache_dir, count_weight)
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                   initializer=_init_worker, initargs=init_args)
+    else:
+        _init_worker(*init_args)
+    try:
+        # 第 0 组固定为当前配置，作为对照基线
+        if search == 'grid':
+            run(pool, [baseline] + grid_trials(space, levels, trials, rng))
+        elif search == 'random':
+            run(pool, [baseline] + random_trials(space, trials, rng))
+        elif search == 'refine':
+            run(pool, [baseline])
+            radius = 1.0
+            for _ in range(rounds):
+                best = max(results, key=lambda r: r['score'])['params']
+                run(pool, random_trials(space, trials, rng, center=best, radius=radius))
+                radius *= 0.5
+        else:
+            raise ValueError(f"Unknown search strategy: {search}")
+    finally:
+        if pool: pool.shutdown()
+
+    ranked = sorted(results, key=lambda r: r['score'], reverse=True)
+    return {
+        'mode': mode,
+        'search': search,
+        'space': space,
+        'baseline': results[0],
+        'best': ranked[0],
+        'trials': ranked,
+        'wall_time': round(time.perf_counter() - t0, 3),
+    }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 与 main*.py 入口一致：以 算法demo/ 为导入根目录
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
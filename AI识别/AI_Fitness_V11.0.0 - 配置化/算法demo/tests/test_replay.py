@@ -0,0 +1,125 @@
+"""整段向量化回放 (offline/replay.py) 与逐帧 Engine 路径的逐轮结果须一致"""
+import copy
+import numpy as np
+import pytest
+from core.config import TextConfig
+from core.engine import extract_keypoints_array
+from offline.landmark_cache import LandmarkRecorder
+from offline.pipeline import OfflineAnalyzer, CONFIG_EXERCISES
+from offline.replay import PoseSeries
+from utils.gap_filler import GapFiller
+from utils.pose_frame import NUM_LANDMARKS, NAME_TO_INDEX
+from utils.smoother import PointSmoother
+
+# 深蹲式配置：压缩率触发计次，膝内扣 (latch_fail) + 深度 (latch_pass)，低优先级错误被压制
+CONFIG = {
+    "dynamic_vars": [{"name": "standing_baseline", "source_type": "distance_y", "points": [11, 23], "active_state": "START"}],
+    "virtual_points": [{"id": 101, "calc": "midpoint", "sources": [11, 12]},
+                       {"id": 102, "calc": "midpoint", "sources": [23, 24]}],
+    "evaluation": {
+        "state_machine": {
+            "trigger_down": {"metric": "compression_ratio", "baseline": "standing_baseline", "points": [101, 102], "operator": "<", "threshold": 0.85},
+            "trigger_up": {"metric": "compression_ratio", "baseline": "standing_baseline", "points": [101, 102], "operator": ">", "threshold": 0.92},
+        },
+        "conditions": [
+            {"id": "valgus", "type": "ratio_width", "numerator_points": [25, 26], "denominator_points": [27, 28],
+             "min": 0.8, "correction_mode": "latch_fail", "priority": 1},
+            {"id": "depth", "type": "ratio_vertical_dynamic", "points": [101, 102], "baseline_var": "standing_baseline",
+             "max": 0.6, "correction_mode": "latch_pass", "priority": 2},
+        ],
+        "logic_control": {"suppress_lower_priority": True},
+    },
+}
+
+# 正面站姿 (面板归一化坐标)
+STANDING = {0: (.5, .15), 11: (.42, .3), 12: (.58, .3), 13: (.38, .42), 14: (.62, .42), 15: (.37, .52), 16: (.63, .52),
+            23: (.45, .55), 24: (.55, .55), 25: (.45, .72), 26: (.55, .72), 27: (.45, .9), 28: (.55, .9),
+            29: (.44, .92), 30: (.56, .92), 31: (.46, .94), 32: (.54, .94)}
+
+def synthetic_clip(seed, fps=30.0, reps=8):
+    """
+    合成深蹲片段：每轮随机 深 / 浅、有无膝内扣，叠加坐标噪声、短时遮挡 (补点)、整帧丢检与门控不通过的帧
+    :return: (landmarks (N, 33, 4), valid (N,), fps)
+    """
+    rng = np.random.default_rng(seed)
+    motion = [(0.0, 0.0)] * int(fps) # (下蹲幅度, 膝内扣位移)
+    for _ in range(reps):
+        amp, valgus = rng.choice([1.0, 0.55]), rng.choice([0.0, 0.035])
+        n = int(fps * rng.uniform(1.6, 2.4))
+        for k in range(n):
+            d = amp * np.sin(np.pi * k / n) ** 2
+            motion.append((d, valgus * d / amp))
+        motion += [(0.0, 0.0)] * int(fps * rng.uniform(0.2, 0.6))
+
+    n = len(motion)
+    lm = np.zeros((n, 33, 4), np.float32)
+    for i, (d, v) in enumerate(motion):
+        for j, (x, y) in STANDING.items():
+            dy = 0.25 * d if j <= 22 else 0.1 * d if j in (23, 24) else 0.0
+            dx = v if j == 25 else -v if j == 26 else 0.0
+            lm[i, j] = (x + dx, y + dy, 0.0, 0.95)
+    lm[:, :, :2] += rng.normal(0, 0.002, (n, 33, 2))
+    for i in rng.choice(n, n // 25, replace=False):
+        lm[i:i + 3, rng.choice([11, 23, 25, 26]), 3] = 0.2
+    for i in rng.choice(n, n // 40, replace=False):
+        lm[i:i + 4, 24, 0] = lm[i:i + 4, 23, 0] + 0.01 # 双髋重合 (深蹲门控不通过)
+        lm[i:i + 4, (15, 16), 1] = 0.9                 # 垂手 (推举门控不通过)
+    valid = np.ones(n, dtype=bool)
+    valid[rng.choice(n, n // 60, replace=False)] = False
+    return lm, valid, fps
+
+@pytest.fixture
+def config_exercises(monkeypatch):
+    for cls in CONFIG_EXERCISES.values():
+        monkeypatch.setattr(cls, '_load_config', lambda self: copy.deepcopy(CONFIG))
+
+def cached_clip(tmp_path, seed):
+    lm, valid, fps = synthetic_clip(seed)
+    video = tmp_path / f"clip{seed}.mp4"
+    video.write_bytes(np.random.default_rng(seed).bytes(64)) # 缓存键只取文件内容哈希
+    rec = LandmarkRecorder()
+    for frame, ok in zip(lm, valid): rec.add(frame if ok else None)
+    rec.save(str(video), 1, fps, str(tmp_path))
+    return str(video)
+
+def test_pose_series_matches_engine_prep():
+    # 先补点、后平滑，逐帧与 Engine.update 的前处理一致 (坐标按名访问时的 int 语义取整)
+    lm, valid, fps = synthetic_clip(3)
+    series = PoseSeries.from_landmarks(lm, valid, fps)
+    filler, smoother = GapFiller(), PointSmoother()
+    for i in range(len(lm)):
+        pts = extract_keypoints_array(lm[i] if valid[i] else None)
+        assert bool(pts) == series.present[i]
+        if not pts: continue
+        t = i / fps
+        pts = smoother.filter(filler.fill(pts, t), t)
+        xy = np.where(pts.valid[:NUM_LANDMARKS, None], np.trunc(pts.data[:NUM_LANDMARKS, :2]), np.nan)
+        np.testing.assert_array_equal(series.xy[i], xy)
+        filled = np.zeros(NUM_LANDMARKS, dtype=bool)
+        filled[[NAME_TO_INDEX[n] for n in pts.get('filled', ())]] = True
+        np.testing.assert_array_equal(series.filled[i], filled)
+    assert series.filled.any()
+
+def rep_summary(result):
+    return [(r['frame'], r['bad'], r['flags']) for r in result['reps']]
+
+@pytest.mark.parametrize('mode', [TextConfig.ACT_SQUAT, TextConfig.ACT_PRESS])
+@pytest.mark.parametrize('seed', range(4))
+def test_replay_matches_live(tmp_path, config_exercises, mode, seed):
+    video = cached_clip(tmp_path, seed)
+    live = OfflineAnalyzer(mode, cache_dir=str(tmp_path), config=True).analyze(video)
+    replay = OfflineAnalyzer(mode, cache_dir=str(tmp_path), replay=True).analyze(video)
+    assert live['cache'] == 'hit' and replay['cache'] == 'replay'
+    assert live['count'] > 0 and live['bad_reps'] > 0
+    assert rep_summary(replay) == rep_summary(live)
+    assert (replay['count'], replay['bad_reps'], replay['errors']) == (live['count'], live['bad_reps'], live['errors'])
+
+def test_replay_matches_live_chunk(tmp_path, config_exercises):
+    # 切片任务：预热区间只驱动状态机，不记录计次
+    video = cached_clip(tmp_path, 7)
+    kw = dict(start_frame=60, end_frame=420, record_from=150)
+    live = OfflineAnalyzer(TextConfig.ACT_SQUAT, cache_dir=str(tmp_path), config=True).analyze(video, **kw)
+    replay = OfflineAnalyzer(TextConfig.ACT_SQUAT, cache_dir=str(tmp_path), replay=True).analyze(video, **kw)
+    assert live['count'] > 0
+    assert rep_summary(replay) == rep_summary(live)
+    assert (replay['start_frame'], replay['end_frame'], replay['frames']) == (live['start_frame'], live['end_frame'], live['frames'])
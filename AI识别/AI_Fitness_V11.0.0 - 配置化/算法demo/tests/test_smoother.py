@@ -0,0 +1,91 @@
+"""关键点滤波器组 (utils/smoother.py)"""
+import math
+import numpy as np
+import pytest
+from core.config import AlgoConfig
+from utils.smoother import OneEuroFilter, KalmanFilter, AdaptiveEmaFilter
+from utils.pose_frame import NUM_LANDMARKS
+
+def frame_times(rng, n, fps=30.0):
+    """不等间隔时间戳 (模拟掉帧 / 跳帧推理)"""
+    return np.cumsum(rng.choice([1, 1, 1, 2, 3], n) / fps)
+
+@pytest.mark.parametrize('cls', [OneEuroFilter, KalmanFilter])
+def test_constant_input_passes_through(cls):
+    rng = np.random.default_rng(0)
+    still = rng.uniform(0, 640, (NUM_LANDMARKS, 2))
+    bank = cls()
+    valid = np.ones(NUM_LANDMARKS, dtype=bool)
+    for n, t in enumerate(frame_times(rng, 60)):
+        if n % 7 == 3: valid = rng.random(NUM_LANDMARKS) > 0.2 # 有效点集合变化 (逐点步长路径)
+        xy = still.copy()
+        bank.update(xy, valid, t)
+        np.testing.assert_array_equal(xy, still)
+    np.testing.assert_array_equal(bank.velocity, 0.0)
+    np.testing.assert_array_equal(bank.acceleration, 0.0)
+
+def one_euro_reference(track, times, min_cutoff, beta, d_cutoff, gap):
+    """单点标量 One-Euro (Casiez et al.)：track 为 [(x, y) 或 None]"""
+    out, pos, vel, t_last = [], None, (0.0, 0.0), -math.inf
+    alpha = lambda cutoff, dt: 1.0 / (1.0 + 1.0 / (2 * math.pi * cutoff * dt))
+    for p, t in zip(track, times):
+        if p is None:
+            out.append(None); continue
+        dt = t - t_last
+        if pos is None or not 0 < dt <= gap:
+            pos, vel = p, (0.0, 0.0)
+        else:
+            a_d = alpha(d_cutoff, dt)
+            vel = tuple(v + a_d * ((z - x) / dt - v) for z, x, v in zip(p, pos, vel))
+            a = alpha(min_cutoff + beta * math.hypot(*vel), dt)
+            pos = tuple(x + a * (z - x) for z, x in zip(p, pos))
+        t_last = t
+        out.append(pos)
+    return out
+
+def test_one_euro_matches_scalar_reference():
+    rng = np.random.default_rng(1)
+    n = 120
+    times = frame_times(rng, n)
+    paths = np.cumsum(rng.normal(0, 6, (n, NUM_LANDMARKS, 2)), axis=0) + 320
+    valid = rng.random((n, NUM_LANDMARKS)) > 0.1
+    valid[40:60, :5] = False # 缺失超过 SMOOTH_GAP 后重新起始
+    bank = OneEuroFilter()
+    got = []
+    for xy, v, t in zip(paths, valid, times):
+        xy = xy.copy()
+        bank.update(xy, v, t)
+        got.append(xy)
+    for j in range(NUM_LANDMARKS):
+        track = [tuple(paths[i, j]) if valid[i, j] else None for i in range(n)]
+        ref = one_euro_reference(track, times, AlgoConfig.SMOOTH_MIN_CUTOFF, AlgoConfig.SMOOTH_BETA,
+                                 AlgoConfig.SMOOTH_D_CUTOFF, AlgoConfig.SMOOTH_GAP)
+        for i, p in enumerate(ref):
+            if p is not None: np.testing.assert_allclose(got[i][j], p, rtol=1e-9, atol=1e-9)
+
+def legacy_ema(frames):
+    """旧版 PointSmoother.filter 的逐点字典实现 (frames 为 {点: (x, y)} 列表，缺失点不在字典中)"""
+    out, prev = [], {}
+    for cur in frames:
+        sm = {}
+        for k, v in cur.items():
+            p = prev.get(k)
+            if p is None: sm[k] = v; continue
+            a = 0.3 + (0.95 - 0.3) * min(math.hypot(v[0] - p[0], v[1] - p[1]) / 10.0, 1.0)
+            sm[k] = (int(a * v[0] + (1 - a) * p[0]), int(a * v[1] + (1 - a) * p[1]))
+        out.append(sm)
+        prev = sm
+    return out
+
+def test_ema_matches_legacy_smoother():
+    # ema 用于复现旧版报告：结果 (含向零取整) 须与旧实现逐点相同
+    rng = np.random.default_rng(2)
+    n = 80
+    paths = np.trunc(np.cumsum(rng.normal(0, 4, (n, NUM_LANDMARKS, 2)), axis=0) + 320)
+    valid = rng.random((n, NUM_LANDMARKS)) > 0.15
+    ref = legacy_ema([{j: tuple(paths[i, j]) for j in np.flatnonzero(valid[i])} for i in range(n)])
+    bank = AdaptiveEmaFilter()
+    for i, t in enumerate(frame_times(rng, n)):
+        xy = paths[i].copy()
+        bank.update(xy, valid[i], t)
+        for j, p in ref[i].items(): assert tuple(xy[j]) == p
@@ -0,0 +1,39 @@
+"""带宽约束 DTW (logic/trajectory.py)"""
+import numpy as np
+import pytest
+from logic.trajectory import dtw, dtw_index_cost
+
+def naive_dtw(cost, radius):
+    """逐格递推的 symmetric2 DTW (带外为 inf)"""
+    n = len(cost)
+    D = np.full((n + 1, n + 1), np.inf)
+    D[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, n + 1):
+            if abs(i - j) > radius: continue
+            c = cost[i - 1, j - 1]
+            D[i, j] = min(D[i - 1, j] + c, D[i, j - 1] + c, D[i - 1, j - 1] + 2 * c)
+    return D
+
+@pytest.mark.parametrize('n', [1, 2, 7, 24])
+def test_wide_band_equals_full_dtw(n):
+    cost = np.random.default_rng(n).random((n, n))
+    S = dtw(cost, n)
+    assert S[2 * n, n] == pytest.approx(naive_dtw(cost, n)[n, n])
+
+@pytest.mark.parametrize('radius', [1, 2, 5])
+def test_band_matches_constrained_dtw(radius):
+    n = 20
+    cost = np.random.default_rng(radius).random((n, n))
+    S, D = dtw(cost, radius), naive_dtw(cost, radius)
+    for i in range(1, n + 1):
+        for j in range(1, n + 1):
+            assert S[i + j, i] == pytest.approx(D[i, j]) if np.isfinite(D[i, j]) else not np.isfinite(S[i + j, i])
+
+def test_identical_paths_align_on_the_diagonal():
+    n = 16
+    a = np.random.default_rng(0).random((n, 2))
+    cost = np.hypot(*(a[:, None] - a[None]).transpose(2, 0, 1))
+    S = dtw(cost, 3)
+    assert S[2 * n, n] == 0.0
+    np.testing.assert_array_equal(dtw_index_cost(S, cost), 0.0)
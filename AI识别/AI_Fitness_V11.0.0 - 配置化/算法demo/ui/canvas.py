@@ -0,0 +1,42 @@
+"""
+复用式输出画布
+主循环每帧原本要：拷贝左侧面板、新建右侧背景、np.hstack 拼接、再新建窗口大小的黑底并缩放贴入。
+这里把合成画面与显示画面都固定为预分配缓冲区，左右两半是 final 的列视图，绘制直接写入最终画面。
+"""
+import cv2
+import numpy as np
+from core.config import AppConfig
+
+class FrameCanvas:
+    """
+    - final : (H, W, 3) 合成画面；left / right 为其左右两半的视图 (绘制函数可直接在视图上作画)
+    - display(win_w, win_h) : 按窗口大小等比缩放并居中 (黑边)，窗口尺寸不变时复用同一块显示缓冲
+    """
+    def __init__(self, w=AppConfig.W, h=AppConfig.H, half_w=AppConfig.HALF_W, bg=20):
+        self.w, self.h, self.bg = w, h, bg
+        self.final = np.zeros((h, w, 3), dtype=np.uint8)
+        self.left = self.final[:, :half_w]
+        self.right = self.final[:, half_w:]
+        self._disp = None
+        self._disp_key = None
+
+    def begin(self, panel):
+        """开始新的一帧：左侧写入面板图像，右侧填充背景色，返回 (left, right)"""
+        self.left[:] = panel
+        self.right.fill(self.bg)
+        return self.left, self.right
+
+    def display(self, win_w, win_h):
+        """返回 (win_h, win_w) 的显示画面；尺寸与合成画面一致时直接返回 final"""
+        if (win_w, win_h) == (self.w, self.h): return self.final
+        scale = min(win_w / self.w, win_h / self.h)
+        rw, rh = int(self.w * scale), int(self.h * scale)
+        off_x, off_y = (win_w - rw) // 2, (win_h - rh) // 2
+
+        if self._disp_key != (win_w, win_h):
+            # 窗口尺寸变化时重新分配 (黑边区域此后不再改写)
+            self._disp = np.zeros((win_h, win_w, 3), dtype=np.uint8)
+            self._disp_key = (win_w, win_h)
+        if rw > 0 and rh > 0:
+            cv2.resize(self.final, (rw, rh), dst=self._disp[off_y:off_y+rh, off_x:off_x+rw])
+        return self._disp
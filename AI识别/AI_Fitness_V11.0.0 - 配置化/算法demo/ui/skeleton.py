@@ -22,6 +22,8 @@ except ImportError:
         NEON_YELLOW = (0, 255, 255)
         NEON_ORANGE = (0, 165, 255)
 
+from logic.metrics import FrameMetrics
+
 # =========================================================================
 # 配置读取
 # =========================================================================
@@ -181,30 +183,22 @@ class SkeletonRenderer:
         self.draw_skeleton_overlay(img, pts, is_avatar)
 
     def draw_realistic_body(self, img, pts):
+        """:param pts: PoseFrame (取到的点一定是坐标元组，无需类型检查)"""
         if not pts: return
         
-        # 计算 mid_hip
-        # 确保参与计算的点都是坐标元组
-        if 'lh' in pts and 'rh' in pts:
-            lh = pts['lh']
-            rh = pts['rh']
-            if isinstance(lh, (list, tuple)) and isinstance(rh, (list, tuple)):
-                pts['mid_hip'] = (int((lh[0] + rh[0]) / 2), int((lh[1] + rh[1]) / 2))
-            else:
-                return
-        else: return
+        # mid_hip / 躯干长度取帧级共享度量 (与脊柱分析同一结果)，mid_hip 写入派生点槽位
+        m = FrameMetrics.of(pts)
+        hip = m['hip_mid']
+        if hip is None: return
+        pts['mid_hip'] = (int(hip[0]), int(hip[1]))
 
         # 全局缩放计算：使用“躯干长度”作为参考
         scale_factor = 1.0
-        if 'neck' in pts and 'mid_hip' in pts:
-            neck_pt = pts['neck']
-            hip_pt = pts['mid_hip']
-            
-            if isinstance(neck_pt, (list, tuple)) and isinstance(hip_pt, (list, tuple)):
-                torso_len = np.linalg.norm(np.array(neck_pt) - np.array(hip_pt))
-                BASE_TORSO_LEN = 300.0 
-                scale_factor = torso_len / BASE_TORSO_LEN
-                scale_factor = np.clip(scale_factor, 0.2, 5.0)
+        torso_len = m['torso_len']
+        if torso_len is not None:
+            BASE_TORSO_LEN = 300.0 
+            scale_factor = torso_len / BASE_TORSO_LEN
+            scale_factor = np.clip(scale_factor, 0.2, 5.0)
 
         # 转换 OpenCV -> PIL
         pil_img = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGBA))
@@ -216,53 +210,35 @@ class SkeletonRenderer:
             
             r_s, r_e, l_s, l_e = SYMMETRY_MAP[name]
             sprite = self.sprites[name]
-            
-            # Helper to check point validity
-            def is_valid_pt(p): return isinstance(p, (list, tuple)) and len(p) >= 2
 
             # 右侧
-            if r_s in pts and r_e in pts and is_valid_pt(pts[r_s]) and is_valid_pt(pts[r_e]):
-                rotated, pos = sprite.get_render_data(pts[r_s], pts[r_e], scale_factor, False)
+            p_s, p_e = pts.get(r_s), pts.get(r_e)
+            if p_s and p_e:
+                rotated, pos = sprite.get_render_data(p_s, p_e, scale_factor, False)
                 if rotated: pil_img.alpha_composite(rotated, pos)
             
             # 左侧
-            if l_s != r_s and l_s in pts and l_e in pts and is_valid_pt(pts[l_s]) and is_valid_pt(pts[l_e]):
-                rotated, pos = sprite.get_render_data(pts[l_s], pts[l_e], scale_factor, True)
-                if rotated: pil_img.alpha_composite(rotated, pos)
+            if l_s != r_s:
+                p_s, p_e = pts.get(l_s), pts.get(l_e)
+                if p_s and p_e:
+                    rotated, pos = sprite.get_render_data(p_s, p_e, scale_factor, True)
+                    if rotated: pil_img.alpha_composite(rotated, pos)
 
         # 转换回 OpenCV
         img[:] = cv2.cvtColor(np.array(pil_img), cv2.COLOR_RGBA2BGR)
 
     def draw_skeleton_overlay(self, img, pts, is_avatar=False):
-        if is_avatar: return 
+        if is_avatar or not pts: return 
         
         line_color = ColorConfig.NEON_BLUE
         
         # 绘制骨骼线
         for (k1, k2) in self.bones:
-            if k1 in pts and k2 in pts:
-                p1 = pts[k1]
-                p2 = pts[k2]
-                # 严格类型检查：必须是元组或列表，且长度>=2
-                if isinstance(p1, (tuple, list)) and len(p1) >= 2 and \
-                   isinstance(p2, (tuple, list)) and len(p2) >= 2:
-                    start_pt = (int(p1[0]), int(p1[1]))
-                    end_pt = (int(p2[0]), int(p2[1]))
-                    cv2.line(img, start_pt, end_pt, line_color, 2)
-        
-        # 绘制关键点
-        point_color = ColorConfig.NEON_YELLOW
-        for k, p in pts.items():
-            if k in ['mid_hip']: continue
-            
-            # [关键修复] 过滤掉任何非坐标数据（如 float, bool, 或单值）
-            if not isinstance(p, (tuple, list)): 
-                continue
-            if len(p) < 2: 
-                continue
-                
-            try:
-                center = (int(p[0]), int(p[1]))
-                cv2.circle(img, center, 4, ColorConfig.NEON_YELLOW, -1)
-            except:
-                continue
\ No newline at end of file
+            p1, p2 = pts.get(k1), pts.get(k2)
+            if p1 and p2:
+                cv2.line(img, p1, p2, line_color, 2)
+        
+        # 绘制关键点 (PoseFrame.points 只产出坐标点，标量属性不会混入)
+        for k, p in pts.points():
+            if k == 'mid_hip': continue
+            cv2.circle(img, p, 4, ColorConfig.NEON_YELLOW, -1)
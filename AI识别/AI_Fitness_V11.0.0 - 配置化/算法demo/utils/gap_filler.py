@@ -0,0 +1,99 @@
+"""
+短时遮挡补点 (Occlusion Gap Filler)
+可见度低于阈值的关键点原本直接从 PoseFrame 中剔除：哑铃短暂挡住手腕，lw 就从点集中消失，
+门控 / 检测器 / GenericExercise 取点失败提前返回，这一次计次可能丢失。
+
+这里为每个关键点保留最近 GAP_FILL_HISTORY 次实测 (环形缓冲)，关键点消失后的 GAP_FILL_MAX 秒内：
+- 按缓冲内最小二乘速度从最后一次实测外推位置，外推速度随置信度衰减 (限制在画面内)
+- 置信度 (visibility 列) 从最后一次实测的可见度随时间线性衰减到 0
+- 点名记入 pts['filled']，标记为合成点 (GenericExercise 中读取了补出点的条件本帧不参与 latch 锁定，
+  补出了动作读取的点的帧计入低可信度帧)
+超过时限仍未重新出现的关键点不再补出，按原逻辑视为缺失。整帧无人体时不补点。
+环形缓冲只记录实测：补出的点与推理调度器的预测帧 (pts['predicted']，见 core/inference_scheduler.py) 不入缓冲。
+"""
+import numpy as np
+from core.config import AppConfig, AlgoConfig
+from utils.pose_frame import NUM_LANDMARKS, EXPOSED_MASK, LANDMARK_NAMES
+
+class GapFiller:
+    """
+    :param max_gap: 最长补点时长 (秒)
+    :param history: 每个关键点保留的实测次数
+    """
+    def __init__(self, max_gap=None, history=None, w=AppConfig.HALF_W, h=AppConfig.H):
+        self.max_gap = AlgoConfig.GAP_FILL_MAX if max_gap is None else max_gap
+        self.history = AlgoConfig.GAP_FILL_HISTORY if history is None else history
+        self.w, self.h = w, h
+        self.reset()
+
+    def reset(self):
+        k, n = self.history, NUM_LANDMARKS
+        self.hist_xy = np.zeros((k, n, 2))
+        self.hist_t = np.full((k, n), np.nan) # NaN 表示该槽位无实测
+        self.hist_vis = np.zeros(n)           # 最近一次实测的可见度
+        self.head = np.zeros(n, dtype=np.intp) # 各点下一次写入的槽位
+        self.t_last = np.full(n, -np.inf)     # 各点最近一次实测的时间戳
+
+    def fill(self, pts, t):
+        """
+        原地补全 PoseFrame 中短时缺失的关键点
+        :return: pts (补出的点名记入 pts['filled'])
+        """
+        n = NUM_LANDMARKS
+        filled = self.fill_xy(pts.data[:n], pts.valid[:n], t, record=not pts.get('predicted', False))
+        if filled.any():
+            pts.invalidate()
+            pts['filled'] = frozenset(LANDMARK_NAMES[i] for i in np.flatnonzero(filled))
+        return pts
+
+    def fill_xy(self, data, valid, t, record=True):
+        """
+        数组接口 (整段回放逐帧调用，与实时路径共用同一套运算)
+        :param data: (33, 4) [x, y, z, visibility] 像素坐标，补出的点原地写入 x / y / visibility
+        :param valid: (33,) 有效点掩码，补出的点原地置 True
+        :param record: 本帧有效点是否为实测 (预测帧为 False，只补点不入缓冲)
+        :return: (33,) bool 本帧补出的点
+        """
+        if record: self._record(data, valid, t)
+        elapsed = t - self.t_last
+        gap = ~valid & EXPOSED_MASK & (elapsed > 0) & (elapsed < self.max_gap)
+        if not gap.any(): return gap
+
+        idx = np.flatnonzero(gap)
+        ts, xs = self.hist_t[:, idx], self.hist_xy[:, idx]
+        last = xs[(self.head[idx] - 1) % self.history, np.arange(len(idx))]
+        # 最小二乘速度 (缓冲中至少两次实测，否则视为静止)
+        m = ~np.isnan(ts)
+        cnt = m.sum(axis=0)
+        tc = np.where(m, ts, 0.0)
+        tc = np.where(m, tc - tc.sum(axis=0) / np.maximum(cnt, 1), 0.0)
+        xc = xs - (xs * m[..., None]).sum(axis=0) / np.maximum(cnt, 1)[:, None]
+        den = (tc * tc).sum(axis=0)
+        vel = (tc[..., None] * xc * m[..., None]).sum(axis=0) / np.where(den > 0, den, 1.0)[:, None]
+        vel[(cnt < 2) | (den <= 0)] = 0.0
+
+        # 外推速度随置信度线性衰减到 0 (位移为其积分)，长时间缺失时不会沿切线越冲越远
+        e = elapsed[idx]
+        pos = last + vel * (e - e * e / (2 * self.max_gap))[:, None]
+        np.clip(pos[:, 0], 0, self.w - 1, out=pos[:, 0])
+        np.clip(pos[:, 1], 0, self.h - 1, out=pos[:, 1])
+        data[idx, :2] = pos
+        data[idx, 3] = self.hist_vis[idx] * (1.0 - e / self.max_gap)
+        valid[idx] = True
+        return gap
+
+    def _record(self, data, valid, t):
+        """实测点写入环形缓冲"""
+        idx = np.flatnonzero(valid)
+        if not len(idx): return
+        # 缺失超过时限后重新出现：旧实测不再参与速度估计
+        stale = idx[t - self.t_last[idx] > self.max_gap]
+        if len(stale):
+            self.hist_t[:, stale] = np.nan
+            self.head[stale] = 0
+        slot = self.head[idx]
+        self.hist_xy[slot, idx] = data[idx, :2]
+        self.hist_t[slot, idx] = t
+        self.hist_vis[idx] = data[idx, 3]
+        self.head[idx] = (slot + 1) % self.history
+        self.t_last[idx] = t
@@ -2,6 +2,13 @@ import math
 import numpy as np
 
 class GeomUtils:
+    """
+    几何计算
+    - 标量接口 (dist / angle / angle_vertical ...)：单个点，实时逐帧调用，纯 math 实现
+    - 批量接口 (*_batch)：点数组 (..., 2)，可同时处理多组点对 / 多帧，形状按 NumPy 广播规则对齐
+      例: xy 为 (帧数, 关键点数, 2) 的缓存坐标，GeomUtils.angle_batch(xy[:, LH], xy[:, LK], xy[:, LA]) 得到整段视频的膝角
+    两套接口公式与边界处理一致 (零长度向量、水平/竖直线段)，结果至多相差末位浮点舍入；无效点可用 NaN 表示，结果随之为 NaN。
+    """
     @staticmethod
     def dist(p1, p2):
         return math.hypot(p1[0] - p2[0], p1[1] - p2[1])
@@ -11,13 +18,13 @@ class GeomUtils:
         # Calculate angle <abc
         ba = (a[0]-b[0], a[1]-b[1])
         bc = (c[0]-b[0], c[1]-b[1])
-        
+
         dot = ba[0]*bc[0] + ba[1]*bc[1]
         mag_a = math.hypot(ba[0], ba[1])
         mag_c = math.hypot(bc[0], bc[1])
-        
+
         if mag_a * mag_c == 0: return 0.0
-        
+
         cos_ang = dot / (mag_a * mag_c)
         cos_ang = max(-1.0, min(1.0, cos_ang))
         return math.degrees(math.acos(cos_ang))
@@ -32,6 +39,27 @@ class GeomUtils:
         if dy == 0: return 90.0
         return math.degrees(math.atan(dx/dy))
 
+    @staticmethod
+    def angle_horizontal(p1, p2):
+        """
+        [New] 计算线段 p1-p2 相对于水平线(X轴)的夹角(0-90度)
+        """
+        dx = abs(p1[0] - p2[0])
+        dy = abs(p1[1] - p2[1])
+        if dx == 0: return 90.0
+        return math.degrees(math.atan(dy/dx))
+
+    @staticmethod
+    def line_deviation(p, a, b, normalize=False):
+        """
+        [New] 点 p 到直线 a-b 的垂直距离
+        :param normalize: True 时再除以线段长度 (相对偏离量，与画面尺度无关)
+        线段长度按不小于 1 像素计算，避免重合点除零
+        """
+        den = max(math.hypot(b[0] - a[0], b[1] - a[1]), 1.0)
+        d = abs((b[0] - a[0]) * (a[1] - p[1]) - (a[0] - p[0]) * (b[1] - a[1])) / den
+        return d / den if normalize else d
+
     @staticmethod
     def is_vertical(p1, p2, tolerance):
         """
@@ -40,4 +68,58 @@ class GeomUtils:
         :param tolerance: 容忍角度
         """
         ang = GeomUtils.angle_vertical(p1, p2)
-        return ang <= tolerance
\ No newline at end of file
+        return ang <= tolerance
+
+    # =========================================================================
+    # [New] 批量接口 (输入 array_like (..., 2)，输出形状为广播后的 (...))
+    # =========================================================================
+
+    @staticmethod
+    def dist_batch(p1, p2):
+        d = np.asarray(p1, dtype=np.float64) - np.asarray(p2, dtype=np.float64)
+        return np.hypot(d[..., 0], d[..., 1])
+
+    @staticmethod
+    def angle_batch(a, b, c):
+        """批量计算夹角 <abc (度)，任一边长度为 0 时为 0.0"""
+        b = np.asarray(b, dtype=np.float64)
+        ba = np.asarray(a, dtype=np.float64) - b
+        bc = np.asarray(c, dtype=np.float64) - b
+        dot = ba[..., 0] * bc[..., 0] + ba[..., 1] * bc[..., 1]
+        mag = np.hypot(ba[..., 0], ba[..., 1]) * np.hypot(bc[..., 0], bc[..., 1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_ang = np.clip(dot / mag, -1.0, 1.0)
+        return np.where(mag == 0, 0.0, np.degrees(np.arccos(cos_ang)))
+
+    @staticmethod
+    def angle_vertical_batch(p1, p2):
+        """批量计算线段相对垂直线的夹角 (0-90度)，dy 为 0 时为 90.0"""
+        d = np.abs(np.asarray(p1, dtype=np.float64) - np.asarray(p2, dtype=np.float64))
+        dx, dy = d[..., 0], d[..., 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ang = np.degrees(np.arctan(dx / dy))
+        return np.where(dy == 0, 90.0, ang)
+
+    @staticmethod
+    def angle_horizontal_batch(p1, p2):
+        """批量计算线段相对水平线的夹角 (0-90度)，dx 为 0 时为 90.0"""
+        d = np.abs(np.asarray(p1, dtype=np.float64) - np.asarray(p2, dtype=np.float64))
+        dx, dy = d[..., 0], d[..., 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ang = np.degrees(np.arctan(dy / dx))
+        return np.where(dx == 0, 90.0, ang)
+
+    @staticmethod
+    def line_deviation_batch(p, a, b, normalize=False):
+        """批量计算点到直线 a-b 的垂直距离 (语义同 line_deviation)"""
+        p = np.asarray(p, dtype=np.float64)
+        a = np.asarray(a, dtype=np.float64)
+        ab = np.asarray(b, dtype=np.float64) - a
+        pa = a - p
+        den = np.maximum(np.hypot(ab[..., 0], ab[..., 1]), 1.0)
+        d = np.abs(ab[..., 0] * pa[..., 1] - pa[..., 0] * ab[..., 1]) / den
+        return d / den if normalize else d
+
+    @staticmethod
+    def is_vertical_batch(p1, p2, tolerance):
+        return GeomUtils.angle_vertical_batch(p1, p2) <= tolerance
@@ -0,0 +1,174 @@
+"""
+数组化关键点帧 (PoseFrame)
+替代原先每帧新建的 {'ls': (x, y), ...} 字典，整帧只占一块数组：
+- data   : (33 + 5, 4) float64。前 33 行按 MediaPipe ID 索引 [x, y, z, visibility] (x/y 为像素坐标：
+           from_landmarks 构造时取整，经滤波器组平滑后为浮点，按名访问时再取整)，
+           其后为派生点槽位 (neck / hip / thorax / waist / mid_hip)，与原始关键点分开存放
+- valid  : (38,) bool 有效掩码 (可见度低于阈值 / 未映射 / 未计算的点为 False)
+- attrs  : 标量派生量 (rounding_bad / debug_* 等)
+
+同时实现 Mapping 接口，pts.get('ls') / pts['neck'] / 'lw' in pts 等旧写法保持可用，
+返回值仍是 (int, int) 元组：首次按名访问时用一次 tolist() 批量生成整帧的点视图，之后为纯字典查找；
+计算密集的模块 (平滑、脊柱) 直接读写数组。
+"""
+from collections.abc import MutableMapping
+import numpy as np
+
+NUM_LANDMARKS = 33
+
+# --- MediaPipe 关键点索引常量 ---
+NOSE = 0
+LS, RS, LE, RE, LW, RW = 11, 12, 13, 14, 15, 16
+LH, RH, LK, RK, LA, RA = 23, 24, 25, 26, 27, 28
+LT, RT = 29, 30
+LF, RF = 31, 32
+
+# 引擎对外暴露的关键点 (MediaPipe ID -> 点名)
+LANDMARK_NAMES = {
+    LS: 'ls', RS: 'rs', LE: 'le', RE: 're', LW: 'lw', RW: 'rw',
+    LH: 'lh', RH: 'rh', LK: 'lk', RK: 'rk', LA: 'la', RA: 'ra',
+    LF: 'lf', RF: 'rf', NOSE: 'nose'
+}
+
+# 配置文件 (JSON) 可引用的点名：暴露点 + 脚跟 (lt / rt)，实时路径与回放路径共用这一份映射
+CONFIG_POINT_NAMES = dict(LANDMARK_NAMES)
+CONFIG_POINT_NAMES.update({LT: 'lt', RT: 'rt'})
+
+# --- 派生点槽位 (紧随 33 个原始关键点之后) ---
+DERIVED_NAMES = ('neck', 'hip', 'thorax', 'waist', 'mid_hip')
+D_NECK, D_HIP, D_THORAX, D_WAIST, D_MID_HIP = range(NUM_LANDMARKS, NUM_LANDMARKS + len(DERIVED_NAMES))
+NUM_SLOTS = NUM_LANDMARKS + len(DERIVED_NAMES)
+
+# 可按名访问的槽位 (原始关键点 + 派生点)
+SLOT_NAMES = dict(LANDMARK_NAMES)
+SLOT_NAMES.update({NUM_LANDMARKS + i: n for i, n in enumerate(DERIVED_NAMES)})
+NAME_TO_INDEX = {n: i for i, n in SLOT_NAMES.items()}
+EXPOSED = np.array(list(LANDMARK_NAMES), dtype=np.intp)
+EXPOSED_MASK = np.zeros(NUM_LANDMARKS, dtype=bool)
+EXPOSED_MASK[EXPOSED] = True
+NAMED_SLOTS = np.array(list(SLOT_NAMES), dtype=np.intp)
+NAMED_SLOT_NAMES = tuple(SLOT_NAMES.values())
+
+class PoseFrame(MutableMapping):
+    __slots__ = ('data', 'valid', 'attrs', '_view', 'metrics')
+
+    def __init__(self, data=None, valid=None):
+        self.data = np.zeros((NUM_SLOTS, 4)) if data is None else data
+        self.valid = np.zeros(NUM_SLOTS, dtype=bool) if valid is None else valid
+        self.attrs = {}
+        self._view = None # 按名访问的点视图 (写入坐标时失效)
+        self.metrics = None # 帧级度量缓存 (logic/metrics.py FrameMetrics，原始关键点坐标改写时失效)
+
+    @classmethod
+    def from_landmarks(cls, lm_arr, w, h, vis_th=0.5):
+        """
+        由 (33, 4) 归一化关键点数组构建 (None 表示未检测到人体)
+        坐标按 int() 语义向零取整，与原先逐点 int(lm.x * w) 结果一致
+        """
+        if lm_arr is None: return cls()
+        data = np.zeros((NUM_SLOTS, 4))
+        d = data[:NUM_LANDMARKS]
+        d[:] = lm_arr
+        d[:, :2] *= (w, h)
+        np.trunc(d[:, :2], out=d[:, :2])
+        valid = np.zeros(NUM_SLOTS, dtype=bool)
+        np.greater(d[:, 3], vis_th, out=valid[:NUM_LANDMARKS])
+        valid[:NUM_LANDMARKS] &= EXPOSED_MASK
+        return cls(data, valid)
+
+    @classmethod
+    def from_dict(cls, pts):
+        """由旧式点字典构建 (工具脚本 / 兼容旧调用方)"""
+        f = cls()
+        for k, v in pts.items(): f[k] = v
+        return f
+
+    # --- 数组访问 ---
+    @property
+    def xy(self):
+        """(38, 2) 像素坐标视图 (可直接用关键点索引 / 派生点索引下标)"""
+        return self.data[:, :2]
+
+    def has(self, *idx):
+        """指定索引的关键点是否全部有效"""
+        v = self.valid
+        for i in idx:
+            if not v[i]: return False
+        return True
+
+    def set_derived(self, di, pt):
+        """写入派生点 (di 为 D_NECK 等槽位索引)"""
+        self.data[di, :2] = pt
+        self.valid[di] = True
+        self._view = None
+
+    def invalidate(self):
+        """直接改写 data / valid 数组后调用，使按名访问的点视图与帧级度量重新生成"""
+        self._view = None
+        self.metrics = None
+
+    def _build_view(self):
+        # int 转换与 int() 语义一致 (向零取整)
+        xy = self.data[NAMED_SLOTS, :2].astype(np.int64).tolist()
+        ok = self.valid[NAMED_SLOTS].tolist()
+        view = {n: (p[0], p[1]) for n, p, v in zip(NAMED_SLOT_NAMES, xy, ok) if v}
+        view.update(self.attrs) # 视图同时收录标量属性，get() 只需一次字典查找
+        self._view = view
+        return view
+
+    def points(self):
+        """遍历所有坐标点 (原始 + 派生)，不含标量属性"""
+        view = self._view if self._view is not None else self._build_view()
+        return [(k, v) for k, v in view.items() if k not in self.attrs]
+
+    def copy(self):
+        f = PoseFrame(self.data.copy(), self.valid.copy())
+        f.attrs = dict(self.attrs)
+        return f
+
+    # --- Mapping 兼容接口 ---
+    def get(self, key, default=None):
+        view = self._view
+        if view is None: view = self._build_view()
+        return view.get(key, default)
+
+    def __getitem__(self, key):
+        v = self.get(key, _MISSING)
+        if v is _MISSING: raise KeyError(key)
+        return v
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __setitem__(self, key, value):
+        i = NAME_TO_INDEX.get(key)
+        if i is None:
+            self.attrs[key] = value
+            if self._view is not None: self._view[key] = value
+            return
+        self._view = None
+        if i < NUM_LANDMARKS: self.metrics = None
+        if value is None: self.valid[i] = False
+        else: self.data[i, :2] = value[:2]; self.valid[i] = True
+
+    def __delitem__(self, key):
+        if key not in self: raise KeyError(key)
+        if key in self.attrs:
+            del self.attrs[key]
+            self._view = None
+        else: self[key] = None
+
+    def __iter__(self):
+        view = self._view if self._view is not None else self._build_view()
+        yield from list(view)
+
+    def __len__(self):
+        return int(self.valid[NAMED_SLOTS].sum()) + len(self.attrs)
+
+    def __bool__(self):
+        return bool(self.valid.any() or self.attrs)
+
+    def __repr__(self):
+        return f"PoseFrame({dict(self.items())})"
+
+_MISSING = object()
@@ -1,28 +1,258 @@
+"""
+关键点平滑 (Landmark Filter Bank)
+33 个关键点整帧向量化滤波，输出保持浮点精度 (不再取整)。时间步长取自帧时间戳，掉帧 / 跳帧推理时滤波强度不会随帧率漂移。
+常见情形 (有效点集合与上一帧相同) 全部点共用一个标量步长整帧计算；有效点集合变化的帧逐点计算步长与接续掩码。
+
+- OneEuroFilter    : One-Euro 滤波，速度越快截止频率越高 (静止去抖、运动跟手)，默认
+- KalmanFilter     : 常速度模型 Kalman 滤波 (逐坐标 [位置, 速度] 二维状态)
+- AdaptiveEmaFilter: 旧版按位移自适应 EMA (结果取整)，用于复现旧版报告
+
+关键点缺失超过 SMOOTH_GAP 秒后重新起始该点的滤波状态；缺失期间不外推、不输出。
+逐点速度取滤波器内部的速度状态，加速度为相邻两帧速度之差 / 步长，读取时才计算 (见 velocity / acceleration)。
+"""
 import math
+from abc import ABC, abstractmethod
+import numpy as np
+from core.config import AlgoConfig
+from utils.pose_frame import NUM_LANDMARKS
 
-class PointSmoother:
-    def __init__(self, alpha=0.5):
-        self.prev_pts = {}
-        self.min_alpha = 0.3
-        self.max_alpha = 0.95
-
-    def filter(self, current_pts):
-        if not self.prev_pts:
-            self.prev_pts = current_pts
-            return current_pts
-        smoothed = {}
-        for k, v in current_pts.items():
-            if v is None: 
-                smoothed[k] = None
-                continue
-            if k not in self.prev_pts or self.prev_pts[k] is None:
-                smoothed[k] = v
+DEFAULT_DT = 1.0 / 30 # 未提供时间戳时的帧间隔
+_TWO_PI = 2 * math.pi
+
+class LandmarkFilterBank(ABC):
+    """
+    滤波器组基类：维护逐点状态，子类实现 _step()
+    状态按坐标轴在前存放 (2, N)：逐点系数 / 掩码 (N,) 直接广播到 x / y 两行，不需要 reshape
+    - pos / vel : (2, N) 最近一次滤波位置、速度 (滤波器内部状态)
+    - vel_prev / dt_last : 上一帧的速度与本帧步长 (标量或 (N,)，未接续的点为 inf)，只供 acceleration 读取
+    - t_last    : (N,) 各点最近一次有效观测的时间戳 (上一帧有效的点以 t_frame 为准，见 _sync_t_last)
+    - fresh_key / fresh_m : 上一帧有效点掩码的字节串 (比较用) / 掩码本身 (全部有效时为 None)
+    """
+    def __init__(self, n=NUM_LANDMARKS, gap=None, d_cutoff=None):
+        self.n = n
+        self.gap = AlgoConfig.SMOOTH_GAP if gap is None else gap
+        self.d_cutoff = AlgoConfig.SMOOTH_D_CUTOFF if d_cutoff is None else d_cutoff
+        self._all_key = np.ones(n, dtype=bool).tobytes()
+        self.reset()
+
+    def reset(self):
+        n = self.n
+        self.pos = np.zeros((2, n))
+        self.vel = np.zeros((2, n))
+        self.vel_prev, self.dt_last = self.vel, math.inf
+        self.t_last = np.full(n, -np.inf)
+        self.fresh_key, self.fresh_m = None, None
+        self.t_frame = None # 最近一次 update() 的时间戳
+
+    def _continued(self, valid, dt):
+        """本帧可接续上一状态的点 (其余有效点重新起始；从未出现过的点 t_last 为 -inf，dt 为 inf)"""
+        return valid & (dt > 0) & (dt <= self.gap)
+
+    def _continued_all(self, dt):
+        """本帧有效点均为上一帧有效点时，是否全部可按帧间隔 dt 接续"""
+        return 0 < dt <= self.gap
+
+    def _sync_t_last(self):
+        # 有效点集合不变期间不逐帧写 t_last，离开快速路径时补写
+        if self.fresh_m is None: self.t_last.fill(self.t_frame)
+        else: self.t_last[self.fresh_m] = self.t_frame
+
+    def update(self, xy, valid, t=None):
+        """
+        原地滤波一帧
+        :param xy: (N, 2) 像素坐标 (float)，有效点被改写为滤波结果
+        :param valid: (N,) bool 有效点掩码
+        :param t: 时间戳 (秒)，None 时按 DEFAULT_DT 递增
+        """
+        if t is None: t = DEFAULT_DT if self.t_frame is None else self.t_frame + DEFAULT_DT
+        z = xy.T # (2, N) 视图
+        key = valid.tobytes()
+        if key == self.fresh_key and self._continued_all(t - self.t_frame):
+            # 常见情形：有效点集合与上一帧相同，全部可接续，标量步长整帧计算
+            m, dt = self.fresh_m, t - self.t_frame
+            x, v = self._step(z, dt, m)
+            self.dt_last = dt
+            if m is None:
+                self.vel_prev, self.pos, self.vel = self.vel, x, v # 直接换用新状态数组 (旧速度数组留作 vel_prev)
+                z[...] = x
             else:
-                prev = self.prev_pts[k]
-                dist = math.hypot(v[0]-prev[0], v[1]-prev[1])
-                dynamic_alpha = self.min_alpha + (self.max_alpha - self.min_alpha) * min(dist / 10.0, 1.0)
-                sx = int(dynamic_alpha * v[0] + (1 - dynamic_alpha) * prev[0])
-                sy = int(dynamic_alpha * v[1] + (1 - dynamic_alpha) * prev[1])
-                smoothed[k] = (sx, sy)
-        self.prev_pts = smoothed
-        return smoothed
\ No newline at end of file
+                self.vel_prev = self.vel.copy()
+                np.copyto(self.pos, x, where=m)
+                np.copyto(self.vel, v, where=m)
+                np.copyto(z, x, where=m)
+            self.t_frame = t
+            return xy
+
+        if self.t_frame is not None: self._sync_t_last()
+        dt = t - self.t_last
+        ok = self._continued(valid, dt)
+        self.vel_prev, self.dt_last = self.vel.copy(), np.where(ok, dt, math.inf)
+        # 全部点整体计算后按掩码写回，比按掩码取子集再散写更省 (行数很少，开销主要在调用次数)
+        if np.count_nonzero(ok): self._write(z, self._step(z, np.where(ok, dt, DEFAULT_DT), ok), ok)
+        new = valid ^ ok # ok 为 valid 的子集
+        if np.count_nonzero(new):
+            np.copyto(self.pos, z, where=new)
+            np.copyto(self.vel, 0.0, where=new)
+            self._start(new)
+        self.t_last[valid] = t
+        self.fresh_key, self.fresh_m = key, (None if key == self._all_key else valid.copy())
+        self.t_frame = t
+        return xy
+
+    @property
+    def velocity(self):
+        """(N, 2) 最近一帧的逐点速度 (像素/秒，只读视图)"""
+        v = self.vel.T.view()
+        v.flags.writeable = False
+        return v
+
+    @property
+    def acceleration(self):
+        """(N, 2) 最近一帧的逐点加速度 (像素/秒²)：相邻两帧速度差分，本帧新起始或未出现的点为 0"""
+        return ((self.vel - self.vel_prev) / self.dt_last).T
+
+    def _write(self, z, xv, m):
+        """按掩码写回滤波结果与状态"""
+        x, v = xv
+        np.copyto(self.pos, x, where=m)
+        np.copyto(self.vel, v, where=m)
+        np.copyto(z, x, where=m)
+
+    def _start(self, m):
+        """新起始点的额外状态初始化"""
+        pass
+
+    @abstractmethod
+    def _step(self, z, dt, m):
+        """
+        对全部点计算一步 (非接续点的结果会被丢弃)
+        :param z: (2, N) 观测；dt: (N,) 距各点上次观测的时长，或全部点共用的标量
+        :param m: (N,) 接续点掩码 (子类写回自有状态用)，None 表示全部接续
+        :return: (x, v) 滤波位置与速度，均为 (2, N) 新数组
+        """
+
+class OneEuroFilter(LandmarkFilterBank):
+    """
+    One-Euro 滤波 (Casiez et al., CHI 2012)：cutoff = min_cutoff + beta * |速度|
+    :param min_cutoff: 静止时截止频率 (Hz)，越小越稳
+    :param beta: 速度系数 (1/像素)，越大运动时越跟手
+    """
+    def __init__(self, min_cutoff=None, beta=None, **kw):
+        self.min_cutoff = AlgoConfig.SMOOTH_MIN_CUTOFF if min_cutoff is None else min_cutoff
+        self.beta = AlgoConfig.SMOOTH_BETA if beta is None else beta
+        super().__init__(**kw)
+
+    def _step(self, z, dt, m):
+        pos = self.pos
+        diff = z - pos
+        # 一阶低通系数 1 / (1 + tau / dt)，tau = 1 / (2π·cutoff)，即 c / (c + 1)，c = 2π·dt·cutoff
+        # 速度低通 vel + alpha_d * (diff / dt - vel) 即 (diff * 2π·d_cutoff + vel) / (c_d + 1)
+        k = _TWO_PI * dt
+        dx = diff * (_TWO_PI * self.d_cutoff)
+        dx += self.vel
+        dx /= k * self.d_cutoff + 1.0
+        c = np.hypot(dx[0], dx[1])
+        c *= self.beta * k
+        c += self.min_cutoff * k
+        diff *= c / (c + 1.0)
+        diff += pos
+        return diff, dx
+
+class KalmanFilter(LandmarkFilterBank):
+    """
+    常速度模型 Kalman 滤波，x / y 独立且模型相同，共用一份协方差 cov = (p00, p01, p11)，(3, N)
+    :param q: 加速度白噪声功率谱密度 (像素²/秒³)，越大越跟手
+    :param r: 观测噪声方差 (像素²)，越大越稳
+    """
+    def __init__(self, q=None, r=None, **kw):
+        self.q = AlgoConfig.SMOOTH_KALMAN_Q if q is None else q
+        self.r = AlgoConfig.SMOOTH_KALMAN_R if r is None else r
+        super().__init__(**kw)
+
+    def reset(self):
+        super().reset()
+        self.cov = np.zeros((3, self.n))
+
+    def _start(self, m):
+        # 初始位置方差取观测噪声，速度方差取一个较大的先验 (起始帧速度未知)
+        np.copyto(self.cov, np.array([[self.r], [0.0], [self.r / DEFAULT_DT ** 2]]), where=m)
+
+    def _step(self, z, dt, m):
+        q = self.q
+        p00, p01, p11 = self.cov
+        # 预测
+        x = self.pos + self.vel * dt
+        p00 = p00 + dt * (2 * p01 + dt * p11) + q * dt ** 3 / 3
+        p01 = p01 + dt * p11 + q * dt ** 2 / 2
+        p11 = p11 + q * dt
+        # 更新
+        s = 1.0 / (p00 + self.r)
+        k0, k1 = p00 * s, p01 * s
+        resid = z - x
+        cov = np.stack(((1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01))
+        if m is None: self.cov = cov
+        else: np.copyto(self.cov, cov, where=m)
+        return x + k0 * resid, self.vel + k1 * resid
+
+class AdaptiveEmaFilter(LandmarkFilterBank):
+    """
+    旧版自适应 EMA：位移越大 alpha 越大 (跟手)，位移越小 alpha 越小 (去抖)，结果向零取整
+    只与上一帧 (上一次调用) 的结果混合，不维护速度
+    """
+    def __init__(self, min_alpha=0.3, max_alpha=0.95, **kw):
+        self.min_alpha, self.max_alpha = min_alpha, max_alpha
+        super().__init__(**kw)
+
+    def _continued(self, valid, dt):
+        return valid & (self.t_last == self.t_frame)
+
+    def _continued_all(self, dt):
+        return True
+
+    def _step(self, z, dt, m):
+        prev = self.pos
+        alpha = np.minimum(np.hypot(z[0] - prev[0], z[1] - prev[1]) / 10.0, 1.0)
+        alpha *= self.max_alpha - self.min_alpha
+        alpha += self.min_alpha
+        return np.trunc(alpha * z + (1 - alpha) * prev), self.vel
+
+FILTERS = {
+    'one_euro': OneEuroFilter,
+    'kalman': KalmanFilter,
+    'ema': AdaptiveEmaFilter,
+}
+
+class PointSmoother:
+    """
+    [Mod] 关键点平滑入口：按 AlgoConfig.SMOOTH_FILTER 选择滤波器，输入/输出为 PoseFrame
+    velocity / acceleration 为最近一帧的逐点估计 (33, 2) (ema 不维护速度，恒为 0)
+    """
+    def __init__(self, kind=None):
+        kind = AlgoConfig.SMOOTH_FILTER if kind is None else kind
+        if kind not in FILTERS: raise ValueError(f"Unknown smoothing filter: {kind}")
+        self.bank = FILTERS[kind]()
+
+    @property
+    def velocity(self):
+        return self.bank.velocity
+
+    @property
+    def acceleration(self):
+        return self.bank.acceleration
+
+    def reset(self):
+        self.bank.reset()
+
+    def filter(self, current_pts, t=None):
+        # 只平滑原始关键点 (派生点由下游每帧重新计算)；当前帧为本帧新建对象，直接原地写回
+        n = NUM_LANDMARKS
+        self.bank.update(current_pts.data[:n, :2], current_pts.valid[:n], t)
+        current_pts.invalidate()
+        return current_pts
+
+    def filter_xy(self, cur_xy, cur_valid, t=None):
+        """
+        数组接口：原地平滑一帧 (33, 2) 像素坐标
+        整段回放 (offline/replay.py) 逐帧调用，与实时路径共用同一套运算
+        """
+        return self.bank.update(cur_xy, cur_valid, t)
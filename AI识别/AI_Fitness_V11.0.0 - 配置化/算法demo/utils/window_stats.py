@@ -0,0 +1,109 @@
+"""
+滑动窗口统计 (Sliding Window Statistics)
+配置中的 "幅动" (窗口极差率) 等窗口度量需要对最近 N 帧的数值求极差 / 均值 / 标准差 / 斜率。
+每帧对整段历史重新遍历的开销随窗口长度线性增长，这里每次 push 均摊 O(1)：
+- min / max / range : 单调双端队列 (队首即窗口极值)
+- mean / std        : 滑动和、平方和 (相对首个样本平移，减小大数相减的舍入误差)
+- slope             : 最小二乘斜率，滑动维护 Σt、Σt²、Σtv (t 相对锚点平移)
+
+滑动和在长时间运行后会累积加减舍入误差，每淘汰一个窗口长度的样本按当前窗口精确重算一次 (仍为均摊 O(1))。
+窗口按样本数 (size) 和 / 或时长 (span，秒) 截断。
+"""
+import collections
+import math
+
+STATS = ('range', 'mean', 'std', 'min', 'max', 'slope')
+
+class SlidingWindow:
+    """
+    :param size: 最多保留的样本数 (None 表示不按样本数截断)
+    :param span: 最长保留时长 (秒，None 表示不按时长截断；需 push 时提供时间戳)
+    """
+    def __init__(self, size=None, span=None):
+        if size is None and span is None: raise ValueError("SlidingWindow needs size or span")
+        self.size, self.span = size, span
+        self.reset()
+
+    def reset(self):
+        self.buf = collections.deque()  # (序号, t, v)
+        self._lo = collections.deque()  # 单调递增 (序号, v)，队首为最小值
+        self._hi = collections.deque()  # 单调递减 (序号, v)，队首为最大值
+        self._seq = 0
+        self._evicted = 0
+        self._shift = self._t0 = 0.0
+        self._s = self._ss = self._st = self._stt = self._stv = 0.0
+
+    def __len__(self):
+        return len(self.buf)
+
+    def push(self, v, t=None):
+        """追加一个样本；t 为 None 时以样本序号作为斜率的横轴"""
+        seq = self._seq
+        self._seq += 1
+        x = float(seq if t is None else t)
+        if not self.buf:
+            self._shift, self._t0 = v, x
+        self.buf.append((seq, x, v))
+        while self._lo and self._lo[-1][1] >= v: self._lo.pop()
+        self._lo.append((seq, v))
+        while self._hi and self._hi[-1][1] <= v: self._hi.pop()
+        self._hi.append((seq, v))
+        self._add(x, v, 1.0)
+
+        buf = self.buf
+        while (self.size is not None and len(buf) > self.size) or (self.span is not None and x - buf[0][1] > self.span):
+            s, x0, v0 = buf.popleft()
+            if self._lo[0][0] == s: self._lo.popleft()
+            if self._hi[0][0] == s: self._hi.popleft()
+            self._add(x0, v0, -1.0)
+            self._evicted += 1
+        if self._evicted >= max(len(buf), 64): self._rebuild()
+
+    def _add(self, x, v, sign):
+        d, dt = v - self._shift, x - self._t0
+        self._s += sign * d
+        self._ss += sign * d * d
+        self._st += sign * dt
+        self._stt += sign * dt * dt
+        self._stv += sign * dt * d
+
+    def _rebuild(self):
+        """按当前窗口精确重算滑动和，并把平移量 / 锚点移到窗口首个样本"""
+        self._evicted = 0
+        self._s = self._ss = self._st = self._stt = self._stv = 0.0
+        if not self.buf: return
+        _, self._t0, self._shift = self.buf[0]
+        for _, x, v in self.buf: self._add(x, v, 1.0)
+
+    # --- 统计量 (窗口为空时为 0.0) ---
+    def min(self):
+        return self._lo[0][1] if self._lo else 0.0
+
+    def max(self):
+        return self._hi[0][1] if self._hi else 0.0
+
+    def range(self):
+        return self._hi[0][1] - self._lo[0][1] if self.buf else 0.0
+
+    def mean(self):
+        n = len(self.buf)
+        return self._shift + self._s / n if n else 0.0
+
+    def std(self):
+        """总体标准差"""
+        n = len(self.buf)
+        if n < 2: return 0.0
+        m = self._s / n
+        return math.sqrt(max(self._ss / n - m * m, 0.0))
+
+    def slope(self):
+        """v 对 t 的最小二乘斜率 (每秒 / 每样本)，样本不足两个或横轴无跨度时为 0.0"""
+        n = len(self.buf)
+        if n < 2: return 0.0
+        den = n * self._stt - self._st * self._st
+        if den <= 0: return 0.0
+        return (n * self._stv - self._st * self._s) / den
+
+    def stat(self, name):
+        if name not in STATS: raise ValueError(f"Unknown window statistic: {name}")
+        return getattr(self, name)()